@@ -1,32 +1,123 @@
 import os
 import json
+import logging
 import time
-from typing import TypedDict, List, Dict, Any
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+from datetime import date, timedelta
+import functools
+import queue
+import threading
+from typing import TypedDict, List, Dict, Any, Iterator, Tuple, Callable, Optional
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, START, END
+from .eligibility_rules import evaluate_eligibility
+from .feature_ranker import FeatureRanker
+from .metrics import record_budget_exhausted, record_cache, record_degraded, record_llm_call, record_node, record_run
+from .prompts import PromptBuilder, eligibility_text, profile_summary, shorten
+from .resilience import AdaptiveTimeout, CircuitBreaker, CircuitOpenError, backoff_delay, is_transient
+from .routing import ModelRouter, model_name
 
+logger = logging.getLogger(__name__)
 
 # load_dotenv()
 
+# bump whenever a prompt changes so cached LLM decisions from older prompts are not reused
+PROMPT_TEMPLATE_VERSION = "3"
+
+ELIGIBILITY_SYSTEM_PROMPT = "You are an eligibility checker. Respond only with valid JSON."
+SCORE_SYSTEM_PROMPT = "You are a subsidy scorer. Return ONLY valid JSON, no markdown formatting."
+
+# kinds of call whose answers are stored under each cached decision kind
+DECISION_KINDS = {"eligibility": ("eligibility",), "score": ("score", "batch_score")}
+
+# profile fields each prompt shows, with their labels
+ELIGIBILITY_PROFILE_FIELDS = {"income": "Income ₹", "land_size": "Land size (acres)", "farmer_type": "Farmer type", "crop_type": "Crop", "state": "State"}
+SCORE_PROFILE_FIELDS = {"farmer_type": "Farmer type", "land_size": "Land size (acres)", "crop_type": "Crop", "income": "Income ₹", "district": "District", "state": "State"}
+
+# share of a request's remaining latency budget the eligibility checks may use, the rest is left for scoring
+ELIGIBILITY_BUDGET_SHARE = 0.4
+# schemes that opened within this many days get the recency bonus of the local scorer
+RECENT_DAYS = 90
+# graph nodes that call the model, each of them cut off at node_deadline
+MODEL_NODES = ("filter_eligibility", "score_subsidies")
+
+# Background event loop shared by every recommender, so the per-subsidy LLM
+# calls can be fanned out with ainvoke from synchronous (WSGI) request threads.
+_event_loop = None
+_event_loop_lock = threading.Lock()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None or _event_loop.is_closed():
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="subsidy-recommender-loop", daemon=True).start()
+    return _event_loop
+
+def strip_code_fence(content: str) -> str:
+    """The model's JSON without the Markdown code fence (```json ... ```) it sometimes wraps answers in."""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`").removeprefix("json").strip()
+    return content
+
 class RecommendationState(TypedDict) :
     farmer_profile : Dict[str, Any]
     all_subsidies : List[Dict[str,Any]]
     eligible_subsidies : List[Dict[str,Any]]
+    shortlisted_subsidies : List[Dict[str,Any]]
     scored_subsidies : List[Dict[str,Any]]
     recommended_subsidies : List[Dict[str,Any]]
     analysis : str
     final_recommendations : Dict[str, Any]
+    deadline : Optional[float]   # time.monotonic() by which the request wants an answer, None without a latency budget
     
 class SubsidyRecommander:
     
-    def __init__(self):
+    def __init__(self, model=None, max_concurrency: int = None, node_deadline: float = None, score_batch_size: int = None, decision_cache=None, retriever=None,
+                 max_retries: int = None, call_timeout: float = None, breaker: CircuitBreaker = None, ranker: FeatureRanker = None,
+                 router: ModelRouter = None):
         self.groq_api_key = os.getenv("GROQ_API_KEY")
-        self.model = ChatGroq(
-            model = "openai/gpt-oss-120b", 
-            temperature=0.3,
-            max_tokens=1500,  
-            timeout=30
+        if model is None:
+            # the registry's default route (SUBSIDY_RECOMMENDER_MODEL), imported here as the registry imports this module
+            from .registry import build_model, model_config
+            config = model_config()
+            model = build_model(config)
+            call_timeout = call_timeout or config["TIMEOUT"]
+        self.model = model
+        # picks the model per kind of call (see routing.py), by default self.model answers everything
+        self.router = router or ModelRouter(default=self.model)
+        # max parallel LLM calls per node and wall-clock budget (seconds) for each node
+        self.max_concurrency = max_concurrency or int(os.getenv("RECOMMENDER_MAX_CONCURRENCY", "8"))
+        self.node_deadline = node_deadline or float(os.getenv("RECOMMENDER_NODE_DEADLINE", "40"))
+        # subsidies packed into one scoring prompt, 1 scores each subsidy with its own call
+        self.score_batch_size = score_batch_size or int(os.getenv("RECOMMENDER_SCORE_BATCH_SIZE", "5"))
+        # optional store of past eligibility/score answers (see llm_cache.DecisionCache)
+        self.decision_cache = decision_cache
+        # optional nearest-neighbour index (see semantic_index.SubsidyIndex), only its top shortlist_size eligible subsidies get scored
+        self.retriever = retriever
+        self.shortlist_size = int(os.getenv("RECOMMENDER_SHORTLIST_SIZE", "15"))
+        # local pre-ranking on season, soil, water, climate and rating, only its top prerank_size subsidies reach the model
+        self.ranker = ranker or FeatureRanker()
+        self.prerank_size = int(os.getenv("RECOMMENDER_PRERANK_SIZE", "30"))
+        # kept back from a request's latency budget for local ranking and the response, in seconds
+        self.budget_reserve = float(os.getenv("RECOMMENDER_BUDGET_RESERVE_MS", "100")) / 1000
+        # retries per call with jittered backoff, and the per-call timeout range, the upper bound is used until latencies are observed
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("RECOMMENDER_MAX_RETRIES", "2"))
+        self.retry_base_delay = float(os.getenv("RECOMMENDER_RETRY_BASE_DELAY", "0.5"))
+        self.call_timeout = AdaptiveTimeout(
+            minimum=float(os.getenv("RECOMMENDER_CALL_TIMEOUT_MIN", "5")),
+            maximum=call_timeout or float(os.getenv("RECOMMENDER_CALL_TIMEOUT", "30")),
+        )
+        # a small eligibility model answers much faster than the scoring one, so each model learns its own timeout
+        self._call_timeouts = {}
+        self._call_timeouts_lock = threading.Lock()
+        # once open, nodes skip the model and fall back to rules and cached decisions
+        self.prompts = PromptBuilder()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.getenv("RECOMMENDER_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("RECOMMENDER_BREAKER_RESET", "30")),
         )
         self.graph = self.build_graph()
     
@@ -35,149 +126,562 @@ class SubsidyRecommander:
         graph = StateGraph(RecommendationState)
         
         # --------------------- Define Nodes --------------------- #
-        graph.add_node("filter_eligibility", self._filter_eligibility)
-        graph.add_node("score_subsidies", self._score_subsidies)
-        graph.add_node("generate_recommendations", self._generate_recommendations)
+        graph.add_node("filter_eligibility", self._instrumented("filter_eligibility", self._filter_eligibility, "eligible_subsidies"))
+        graph.add_node("shortlist_subsidies", self._instrumented("shortlist_subsidies", self._shortlist_subsidies, "shortlisted_subsidies"))
+        graph.add_node("score_subsidies", self._instrumented("score_subsidies", self._score_subsidies, "scored_subsidies"))
+        graph.add_node("generate_recommendations", self._instrumented("generate_recommendations", self._generate_recommendations))
         
         # --------------------- Define Edges --------------------- #
         graph.add_edge(START,"filter_eligibility")
-        graph.add_edge("filter_eligibility","score_subsidies")
+        graph.add_edge("filter_eligibility","shortlist_subsidies")
+        graph.add_edge("shortlist_subsidies","score_subsidies")
         graph.add_edge("score_subsidies","generate_recommendations")
         graph.add_edge("generate_recommendations",END)
         
         return graph.compile()
 
+    @staticmethod
+    def _instrumented(name: str, node: Callable[[RecommendationState], RecommendationState], output: str = None) -> Callable[[RecommendationState], RecommendationState]:
+        """Record the node's wall time, outcome and the size of its output list (see metrics.py)."""
+        @functools.wraps(node)
+        def run(state: RecommendationState) -> RecommendationState:
+            start = time.perf_counter()
+            try:
+                state = node(state)
+            except Exception as e:
+                record_node(name, time.perf_counter() - start, error=e)
+                raise
+            details = {"subsidies": len(state.get(output) or [])} if output else {}
+            record_node(name, time.perf_counter() - start, **details)
+            return state
+        return run
+
+    # ---------------------- Concurrent LLM calls ---------------------- #
+    def _invoke_concurrently(self, prompts: List[List[Any]], timeout: float = None, on_response: Callable[[int, Any], None] = None, kind: str = "llm",
+                             on_short_circuit: Callable[[int], None] = None) -> List[Any]:
+        """Run one model call per prompt concurrently. Returns a response per prompt, or None if it failed or missed the deadline.
+
+        on_response(index, response) is called on the calling thread as each successful call completes,
+        on_short_circuit(index) as each call the circuit breaker refused completes.
+        kind labels the calls in the metrics.
+        """
+        if not prompts:
+            return []
+        completed = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._gather_with_deadline(prompts, timeout or self.node_deadline, completed, kind), _get_event_loop())
+        
+        # the coroutine puts None once every call has finished or been cancelled
+        for index, response in iter(completed.get, None):
+            if isinstance(response, CircuitOpenError):
+                if on_short_circuit is not None:
+                    on_short_circuit(index)
+            elif on_response is not None:
+                on_response(index, response)
+        return future.result()
+
+    async def _gather_with_deadline(self, prompts: List[List[Any]], timeout: float, completed: queue.Queue, kind: str = "llm") -> List[Any]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        deadline = time.monotonic() + timeout
+
+        async def call(index, messages):
+            try:
+                async with semaphore:
+                    response = await self._call_model(messages, deadline, kind)
+            except CircuitOpenError as e:
+                completed.put((index, e))
+                raise
+            completed.put((index, response))
+            return response
+
+        try:
+            tasks = [asyncio.ensure_future(call(index, messages)) for index, messages in enumerate(prompts)]
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        finally:
+            completed.put(None)
+
+        responses = []
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception() is None:
+                responses.append(task.result())
+            else:
+                responses.append(None)
+        return responses
+
+    def _timeout_for(self, model: Any) -> AdaptiveTimeout:
+        if model is self.model :
+            return self.call_timeout
+        with self._call_timeouts_lock :
+            if id(model) not in self._call_timeouts :
+                self._call_timeouts[id(model)] = AdaptiveTimeout(minimum=self.call_timeout.minimum, maximum=self.call_timeout.maximum)
+            return self._call_timeouts[id(model)]
+
+    async def _call_model(self, messages: List[Any], deadline: float, kind: str) -> Any:
+        """One model call with retries. Each attempt's timeout is the adaptive timeout, cut to what is left of the node's deadline."""
+        start = time.perf_counter()
+        retries = 0
+        model = self.router.model_for(kind)
+        call_timeout = self._timeout_for(model)
+        while True:
+            if not self.breaker.allow():
+                record_llm_call(kind, 0, error=CircuitOpenError(), retries=retries)
+                raise CircuitOpenError()
+            
+            attempt_start = time.monotonic()
+            try:
+                response = await asyncio.wait_for(model.ainvoke(messages), timeout=min(call_timeout.current(), deadline - attempt_start))
+            except asyncio.CancelledError as e:
+                # the node deadline passed, the model is not to blame
+                self.breaker.abandon()
+                record_llm_call(kind, time.perf_counter() - start, error=e, retries=retries)
+                raise
+            except Exception as e:
+                if not is_transient(e):
+                    # a bad key or request fails the same way on retry and says nothing about the model's health
+                    self.breaker.abandon()
+                    record_llm_call(kind, time.perf_counter() - start, error=e, retries=retries)
+                    raise
+                self.breaker.record_failure()
+                delay = backoff_delay(retries, self.retry_base_delay, cap=call_timeout.minimum)
+                if retries >= self.max_retries or time.monotonic() + delay >= deadline:
+                    record_llm_call(kind, time.perf_counter() - start, error=e, retries=retries)
+                    raise
+                retries += 1
+                await asyncio.sleep(delay)
+                continue
+            
+            self.breaker.record_success()
+            call_timeout.observe(time.monotonic() - attempt_start)
+            record_llm_call(kind, time.perf_counter() - start, response=response, retries=retries)
+            return response
+
+    def _time_left(self, state: RecommendationState, share: float = 1.0) -> float:
+        """Seconds a node may spend on model calls: node_deadline, or less when the request's latency budget is shorter."""
+        deadline = state.get('deadline')
+        if deadline is None :
+            return self.node_deadline
+        return min(self.node_deadline, (deadline - time.monotonic() - self.budget_reserve) * share)
+
+    def worst_case_seconds(self) -> float:
+        """Longest a run can take. Every model call, with its retries and backoff, is cancelled at its node's deadline,
+        so that is each model node's share; one call timeout on top covers the local nodes."""
+        return len(MODEL_NODES) * self.node_deadline + self.call_timeout.maximum
+
+    @property
+    def degraded(self) -> bool:
+        """True while the breaker is open and the model is not being called (half-open, it lets one probe call through)."""
+        return self.breaker.state == "open"
+
+    @staticmethod
+    def _stream_writer() -> Callable[[Any], None]:
+        """LangGraph custom stream writer of the running node, or a no-op when the node runs outside a graph."""
+        try:
+            return get_stream_writer()
+        except RuntimeError:
+            return lambda chunk: None
+
+    # ---------------------- Decision cache ---------------------- #
+    def _cache_keys(self, kind: str, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]]) -> List[str]:
+        if self.decision_cache is None:
+            return [None] * len(subsidies)
+        bucket = self.decision_cache.bucket(farmer_profile, kind)
+        version = self._decision_version(kind)
+        return [self.decision_cache.key(kind, version, subsidy, bucket) for subsidy in subsidies]
+
+    def _decision_version(self, kind: str) -> str:
+        """The prompt version and the models that answer kind, so routing kind to another model doesn't reuse the old one's answers."""
+        kinds = DECISION_KINDS.get(kind, (kind,))
+        return ":".join([PROMPT_TEMPLATE_VERSION, *sorted({model_name(self.router.model_for(call)) for call in kinds})])
+
+    def _cached_decisions(self, keys: List[str]) -> Dict[str, Any]:
+        if self.decision_cache is None:
+            return {}
+        return self.decision_cache.get_many([key for key in keys if key])
+
+    def _store_decisions(self, kind: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        if self.decision_cache is not None and entries:
+            self.decision_cache.set_many(kind, entries)
+
     # ---------------------- filter_eligibility Node ---------------------- #
     def _filter_eligibility(self, state: RecommendationState) -> RecommendationState:
-        start = time.time()
         farmer_profile = state['farmer_profile']
-        all_subsidies = state['all_subsidies']
-        eligible_subsidies = []
+        # best profile match first, past and already applied for subsidies left out
+        all_subsidies = self.ranker.rank(farmer_profile, state['all_subsidies'])
+        decisions = {}   # index in all_subsidies -> eligible
+        undecided = []   # indexes the rules could not decide
         
-        for subsidy in all_subsidies : 
+        for index, subsidy in enumerate(all_subsidies) : 
             eligibility = subsidy.get('eligibility_criteria', [])
             
-            # if eligibility is defined that time it goes to the ai model for checking
-            if eligibility :
-                user_prompt =  f"""Does this farmer meet the eligibility criteria for this subsidy?
-                                Farmer Profile:
-                                - Income: {farmer_profile.get('income')}
-                                - Land Size: {farmer_profile.get('land_size')} acres
-                                - Farmer Type: {farmer_profile.get('farmer_type')}
-                                - Crop: {farmer_profile.get('crop_type')}
-                                - State: {farmer_profile.get('state')}
-
-                                Subsidy: {subsidy.get('title')}
-                                Eligibility Criteria: {json.dumps(eligibility)}
-
-                                Answer with JSON:
-                                {{"eligible": true/false, "reason": "brief explanation"}}"""
-
-                try:
-                    messages = [
-                        SystemMessage(content = "You are an eligibility checker. Respond only with valid JSON."),
-                        HumanMessage(content = user_prompt)
-                    ]
-                    
-                    response = self.model.invoke(messages)
-                    result = json.loads(response.content)
-                    
-                    if result.get('eligible', False):
-                        eligible_subsidies.append(subsidy)
-                
-                except:
-                    eligible_subsidies.append(subsidy)
-                    
+            # structured rules settle most subsidies in-process, only undecided ones go to the ai model
+            decision = evaluate_eligibility(eligibility, farmer_profile) if eligibility else True
+            if decision is None and index >= self.prerank_size :
+                # below the pre-ranked head it would never be scored, keep it for the count without asking the model
+                decisions[index] = True
+            elif decision is None :
+                undecided.append(index)
             else :
-                eligible_subsidies.append(subsidy)
+                decisions[index] = decision
+        
+        keys = self._cache_keys("eligibility", farmer_profile, [all_subsidies[index] for index in undecided])
+        cached = self._cached_decisions(keys)
+        if self.decision_cache is not None :
+            record_cache("eligibility", len(cached), len(keys) - len(cached))
+        checks = []
+        
+        for index, key in zip(undecided, keys) :
+            if key in cached :
+                decisions[index] = cached[key].get('eligible', True)
+            else :
+                checks.append((index, key))
+        
+        # while the model is down, or the latency budget is spent, the rules and cache decide alone, undecided subsidies are kept for the scorer
+        time_left = self._time_left(state, ELIGIBILITY_BUDGET_SHARE)
+        if checks and (self.degraded or time_left <= 0) :
+            if self.degraded :
+                record_degraded("filter_eligibility", len(checks))
+            else :
+                record_budget_exhausted("filter_eligibility", len(checks))
+            checks, skipped = [], checks
+            for index, _ in skipped :
+                decisions[index] = True
+        
+        responses = self._invoke_concurrently([self._eligibility_prompt(farmer_profile, all_subsidies[index]) for index, _ in checks], timeout=time_left, kind="eligibility")
+        new_decisions = {}
+        
+        for (index, key), response in zip(checks, responses) :
+            # failed, timed out or unreadable checks keep the subsidy, the scorer decides on it
+            eligible = self._parse_eligibility(response.content) if response is not None else None
+            if eligible is None :
+                decisions[index] = True
+                continue
+            decisions[index] = eligible
+            
+            if key :
+                new_decisions[key] = {"subsidy_id": all_subsidies[index].get('id'), "value": {"eligible": decisions[index]}}
+        
+        self._store_decisions("eligibility", new_decisions)
+        eligible_subsidies = [subsidy for index, subsidy in enumerate(all_subsidies) if decisions.get(index)]
         
         state['eligible_subsidies'] = eligible_subsidies
-        print(f"Filter: {time.time()-start:.1f}s → {len(eligible_subsidies)} eligible")
+        return state
+
+    @staticmethod
+    def _parse_eligibility(content: str):
+        """The model's eligible answer as a bool, or None if the answer is not the JSON object asked for."""
+        content = strip_code_fence(content)
+        try:
+            result = json.loads(content)
+        except ValueError:
+            logger.warning("Unreadable eligibility answer: %.200s", content)
+            return None
+        eligible = result.get('eligible') if isinstance(result, dict) else None
+        if isinstance(eligible, str):
+            eligible = {"true": True, "false": False}.get(eligible.strip().lower())
+        if not isinstance(eligible, bool):
+            logger.warning("Eligibility answer without a true/false verdict: %.200s", content)
+            return None
+        return eligible
+
+    def _eligibility_prompt(self, farmer_profile: Dict[str, Any], subsidy: Dict[str, Any]) -> List[Any]:
+        template = """Does this farmer meet the eligibility criteria for this subsidy?
+                        Farmer: {profile}
+                        Subsidy: {title}
+                        Eligibility Criteria: {criteria}
+                        Answer with JSON:
+                        {{"eligible": true/false, "reason": "brief explanation"}}"""
+        # the criteria are sent whole, a verdict on part of them would be cached as a verdict on all of them
+        fields = {"profile": profile_summary(farmer_profile, ELIGIBILITY_PROFILE_FIELDS), "criteria": eligibility_text(subsidy.get('eligibility_criteria', []))}
+        
+        budget = self.prompts.part_budget(ELIGIBILITY_SYSTEM_PROMPT, template.format(title="", **fields))
+        user_prompt = template.format(title=shorten(subsidy.get('title'), budget), **fields)
+        return self.prompts.messages("eligibility", ELIGIBILITY_SYSTEM_PROMPT, user_prompt)
+
+    # ---------------------- shortlist_subsidies Node ---------------------- #
+    def _shortlist_subsidies(self, state: RecommendationState) -> RecommendationState:
+        eligible_subsidies = state['eligible_subsidies']
+        
+        # eligible subsidies are in pre-rank order, the index (if any) picks the closest ones within the pre-ranked head
+        if self.retriever is None or len(eligible_subsidies) <= self.shortlist_size :
+            state['shortlisted_subsidies'] = eligible_subsidies[:self.shortlist_size]
+        else :
+            state['shortlisted_subsidies'] = self.retriever.nearest(state['farmer_profile'], eligible_subsidies[:self.prerank_size], self.shortlist_size)
         return state
 
     # ---------------------- score_subsidies Node ---------------------- #
     def _score_subsidies(self, state: RecommendationState) -> RecommendationState:
         start = time.time()
         farmer_profile = state['farmer_profile']
-        eligible_subsidies = state['eligible_subsidies']
+        shortlisted_subsidies = state['shortlisted_subsidies']
         scored_subsidies = []
+        to_score = []
+        writer = self._stream_writer()
         
-        for subsidy in eligible_subsidies : 
-            user_prompt = f"""Score this subsidy's relevance (0-100) for this farmer.
-                            Farmer: {farmer_profile.get('farmer_type')} with {farmer_profile.get('land_size')} acres, growing {farmer_profile.get('crop_type')}, income ₹{farmer_profile.get('income')}, from {farmer_profile.get('district')}, {farmer_profile.get('state')}
-                            Subsidy: {subsidy.get('title')} - {subsidy.get('description', 'N/A')} (Amount: ₹{subsidy.get('amount')})
-                            Score based on: crop match (40pts), income/land fit (30pts), region relevance (20pts), timing (10pts)
-                            Return ONLY this JSON format, no markdown, no explanation:
-                            {{"score": 85, "reasoning": "Brief reason for score", "key_benefits": ["benefit1", "benefit2"]}}"""
-        
-            messages = [
-                SystemMessage(content="You are a subsidy scorer. Return ONLY valid JSON, no markdown formatting."),
-                HumanMessage(content=user_prompt)
-            ]
-            
-            response = self.model.invoke(messages)
-            result = json.loads(response.content)
-            subsidy['score'] = result.get('score', 0)
-            subsidy['scoring_reasoning'] = result.get('reasoning', '')
-            subsidy['key_benefits'] = result.get('key_benefits', [])
+        # scores are recorded as they arrive so streaming clients see each one immediately
+        def record(subsidy, result, scored_by="llm"):
+            self._apply_score(subsidy, result, scored_by)
             scored_subsidies.append(subsidy)
+            writer({"event": "scored", "subsidy": self.format_recommendation(subsidy)})
+        
+        keys = self._cache_keys("score", farmer_profile, shortlisted_subsidies)
+        cached = self._cached_decisions(keys)
+        if self.decision_cache is not None :
+            record_cache("score", len(cached), len(keys) - len(cached))
+        keys_by_id = {}
+        
+        for subsidy, key in zip(shortlisted_subsidies, keys) :
+            if key in cached :
+                record(subsidy, cached[key])
+            else :
+                keys_by_id[subsidy.get('id')] = key
+                to_score.append(subsidy)
+        cached_count = len(scored_subsidies)
+        # subsidies whose call the breaker refused, e.g. all but the probe while it is half-open
+        short_circuited = []
         
+        if self.degraded or self._time_left(state) <= 0 :
+            unscored = []
+        elif self.score_batch_size > 1 :
+            unscored = self._score_in_batches(farmer_profile, to_score, record, timeout=self._time_left(state), on_short_circuit=short_circuited.extend)
+        else :
+            unscored = to_score
+        
+        # per-item calls, also the fallback for batches the model answered with a malformed array
+        remaining = min(self.node_deadline - (time.time() - start), self._time_left(state))
+        if unscored and remaining > 0 :
+            def on_response(index, response):
+                try:
+                    result = json.loads(strip_code_fence(response.content))
+                except ValueError:
+                    return
+                record(unscored[index], result)
+            
+            # subsidies whose call failed or missed the deadline are skipped, the rest are returned
+            prompts = [self._score_prompt(farmer_profile, subsidy) for subsidy in unscored]
+            self._invoke_concurrently(prompts, timeout=remaining, on_response=on_response, kind="score",
+                                      on_short_circuit=lambda index: short_circuited.append(unscored[index]))
+        
+        self._store_decisions("score", {
+            keys_by_id[subsidy.get('id')]: {
+                "subsidy_id": subsidy.get('id'),
+                "value": {"score": subsidy['score'], "reasoning": subsidy['scoring_reasoning'], "key_benefits": subsidy['key_benefits']},
+            }
+            for subsidy in scored_subsidies[cached_count:] if keys_by_id.get(subsidy.get('id'))
+        })
+        
+        # with the breaker open, or a latency budget to meet, what the model did not score gets a local estimate instead of being dropped,
+        # and so does every subsidy the breaker refused to send to the model
+        scored_ids = {id(subsidy) for subsidy in scored_subsidies}
+        if self.degraded or state.get('deadline') is not None :
+            fallback = [subsidy for subsidy in to_score if id(subsidy) not in scored_ids]
+        else :
+            fallback = [subsidy for subsidy in short_circuited if id(subsidy) not in scored_ids]
+        if fallback :
+            if self.degraded or short_circuited :
+                record_degraded("score_subsidies", len(fallback))
+                reasoning = "Estimated from your profile and the subsidy rules while AI scoring is unavailable."
+            else :
+                record_budget_exhausted("score_subsidies", len(fallback))
+                reasoning = "Estimated from your profile and the subsidy rules to answer within the requested time."
+            for subsidy in fallback :
+                record(subsidy, dict(self._rule_score(farmer_profile, subsidy), reasoning=reasoning), scored_by="heuristic")
+        
+        # back to catalogue order first, so equal scores rank the same way whatever order calls finished in
+        scored_ids = {id(subsidy) for subsidy in scored_subsidies}
+        scored_subsidies = [subsidy for subsidy in shortlisted_subsidies if id(subsidy) in scored_ids]
         scored_subsidies.sort(key=lambda x: x.get('score', 0), reverse=True)
         state['scored_subsidies'] = scored_subsidies
-        print(f"Score: {time.time()-start:.1f}s → {len(scored_subsidies)} scored")
         return state
 
+    def _score_in_batches(self, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]], record: Callable[[Dict[str, Any], Dict[str, Any]], None], timeout: float = None,
+                          on_short_circuit: Callable[[List[Dict[str, Any]]], None] = None) -> List[Dict[str, Any]]:
+        """Score subsidies score_batch_size at a time, one prompt per batch. Returns the subsidies that need per-item calls.
+
+        on_short_circuit(batch) gets the subsidies of each batch the circuit breaker refused.
+        """
+        size = self.score_batch_size
+        batches = [subsidies[i:i + size] for i in range(0, len(subsidies), size)]
+        unscored = []
+        
+        # a failed or timed out batch never reaches on_response and is dropped like a failed per-item call
+        def on_response(index, response):
+            batch = batches[index]
+            results = self._parse_batch_scores(response.content)
+            if results is None :
+                unscored.extend(batch)
+                return
+            for subsidy in batch :
+                result = results.get(str(subsidy.get('id')))
+                if result is None :
+                    unscored.append(subsidy)
+                else :
+                    record(subsidy, result)
+        
+        def short_circuit(index):
+            if on_short_circuit is not None :
+                on_short_circuit(batches[index])
+        
+        self._invoke_concurrently([self._batch_score_prompt(farmer_profile, batch) for batch in batches], timeout=timeout, on_response=on_response, kind="batch_score",
+                                  on_short_circuit=short_circuit)
+        return unscored
+
+    @staticmethod
+    def _subsidy_line(subsidy: Dict[str, Any], description_budget: int = None) -> str:
+        description = subsidy.get('description') or 'N/A'
+        if description_budget is not None :
+            description = shorten(description, description_budget)
+        return f"{subsidy.get('title')} - {description} (Amount: ₹{subsidy.get('amount')})"
+
+    def _score_prompt(self, farmer_profile: Dict[str, Any], subsidy: Dict[str, Any]) -> List[Any]:
+        template = """Score this subsidy's relevance (0-100) for this farmer.
+                        Farmer: {profile}
+                        Subsidy: {subsidy}
+                        Score based on: crop match (40pts), income/land fit (30pts), region relevance (20pts), timing (10pts)
+                        Return ONLY this JSON format, no markdown, no explanation:
+                        {{"score": 85, "reasoning": "Brief reason for score", "key_benefits": ["benefit1", "benefit2"]}}"""
+        profile = profile_summary(farmer_profile, SCORE_PROFILE_FIELDS)
+        
+        budget = self.prompts.part_budget(SCORE_SYSTEM_PROMPT, template.format(profile=profile, subsidy=self._subsidy_line(subsidy, 0)))
+        user_prompt = template.format(profile=profile, subsidy=self._subsidy_line(subsidy, budget))
+        return self.prompts.messages("score", SCORE_SYSTEM_PROMPT, user_prompt)
+
+    def _batch_score_prompt(self, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]]) -> List[Any]:
+        template = """Score each subsidy's relevance (0-100) for this farmer.
+                        Farmer: {profile}
+                        Subsidies:
+                        {subsidies}
+                        Score based on: crop match (40pts), income/land fit (30pts), region relevance (20pts), timing (10pts)
+                        Return ONLY a JSON array with one object per subsidy, no markdown, no explanation:
+                        [{{"id": 1, "score": 85, "reasoning": "Brief reason for score", "key_benefits": ["benefit1", "benefit2"]}}]"""
+        profile = profile_summary(farmer_profile, SCORE_PROFILE_FIELDS)
+        
+        def lines(budget):
+            return "\n".join(f"- id {subsidy.get('id')}: {self._subsidy_line(subsidy, budget)}" for subsidy in subsidies)
+        
+        # the budget left after the fixed text is shared evenly between the descriptions
+        budget = self.prompts.part_budget(SCORE_SYSTEM_PROMPT, template.format(profile=profile, subsidies=lines(0)), parts=len(subsidies))
+        user_prompt = template.format(profile=profile, subsidies=lines(budget))
+        return self.prompts.messages("batch_score", SCORE_SYSTEM_PROMPT, user_prompt)
+
+    @staticmethod
+    def _parse_batch_scores(content: str):
+        """Map subsidy id (as str) to its score object, or None if the array is malformed."""
+        try:
+            results = json.loads(strip_code_fence(content))
+        except ValueError:
+            return None
+        if not isinstance(results, list) or not all(isinstance(item, dict) and 'id' in item for item in results):
+            return None
+        return {str(item['id']): item for item in results}
+
+    @staticmethod
+    def _rule_score(farmer_profile: Dict[str, Any], subsidy: Dict[str, Any]) -> Dict[str, Any]:
+        """Score from the profile, the rules, the rating and how recently the scheme opened, used when the model can't be asked."""
+        text = f"{subsidy.get('title', '')} {subsidy.get('description', '')}".lower()
+        criteria = subsidy.get('eligibility_criteria') or []
+        rules = {}
+        for item in criteria if isinstance(criteria, list) else [criteria] :
+            if isinstance(item, dict) :
+                rules.update(item)
+        
+        def matches(value, rule_values):
+            value = str(value or "").strip().lower()
+            return bool(value) and (value in text or value in [str(v).lower() for v in rule_values or []])
+        
+        score = 0
+        if matches(farmer_profile.get('crop_type'), rules.get('crops')) :
+            score += 35
+        score += 25 if evaluate_eligibility(criteria, farmer_profile) else 10
+        if matches(farmer_profile.get('state'), rules.get('states')) or matches(farmer_profile.get('district'), rules.get('districts')) :
+            score += 15
+        today = date.today().isoformat()
+        if (subsidy.get('application_start_date') or today) <= today <= (subsidy.get('application_end_date') or today) :
+            score += 10
+        score += round(min(max(float(subsidy.get('rating') or 0), 0), 5) * 2)
+        recent = (date.today() - timedelta(days=RECENT_DAYS)).isoformat()
+        if recent <= (subsidy.get('application_start_date') or "") <= today :
+            score += 5
+        
+        return {"score": score, "reasoning": "Estimated from your profile and the subsidy rules.", "key_benefits": []}
+
+    @staticmethod
+    def _apply_score(subsidy: Dict[str, Any], result: Dict[str, Any], scored_by: str = "llm") -> None:
+        subsidy['score'] = result.get('score', 0)
+        subsidy['scored_by'] = scored_by
+        subsidy['scoring_reasoning'] = result.get('reasoning', '')
+        subsidy['key_benefits'] = result.get('key_benefits', [])
+
     # ---------------------- generate_recommendations Node ---------------------- #
     def _generate_recommendations(self, state: RecommendationState) -> RecommendationState:
         top_subsidies = state['scored_subsidies'][:5]
         recommendate_subsidies = []
         
         for i, subsidy in enumerate(top_subsidies,1):
-            recommendate_subsidies.append({
-                "rank": i,
-                "subsidy_id": subsidy.get('id'),
-                "title": subsidy.get('title'),
-                "description": subsidy.get('description',""),
-                "amount": subsidy.get('amount',0),
-                "relevance_score": subsidy.get('score',0),
-                "why_recommended": subsidy.get('scoring_reasoning',""),
-                "key_benefits": subsidy.get('key_benefits',[]),
-                "application_dates": {
-                    "start": subsidy.get('application_start_date',"N/A"),
-                    "end": subsidy.get('application_end_date',"N/A")
-                },
-                "documents_required": subsidy.get('documents_required', [])
-            })
+            recommendate_subsidies.append(self.format_recommendation(subsidy, rank=i))
             
         state['final_recommendations'] = {
             "recommended_subsidies": recommendate_subsidies,
-            "total_recommended": len(state['eligible_subsidies'])
+            "total_recommended": len(state['eligible_subsidies']),
+            "heuristic_scored": sum(1 for subsidy in recommendate_subsidies if subsidy['scored_by'] == "heuristic"),
         }
         return state
 
+    @staticmethod
+    def format_recommendation(subsidy: Dict[str, Any], rank: int = None) -> Dict[str, Any]:
+        return {
+            "rank": rank,
+            "subsidy_id": subsidy.get('id'),
+            "title": subsidy.get('title'),
+            "description": subsidy.get('description',""),
+            "amount": subsidy.get('amount',0),
+            "relevance_score": subsidy.get('score',0),
+            "why_recommended": subsidy.get('scoring_reasoning',""),
+            "scored_by": subsidy.get('scored_by', "llm"),
+            "key_benefits": subsidy.get('key_benefits',[]),
+            "application_dates": {
+                "start": subsidy.get('application_start_date',"N/A"),
+                "end": subsidy.get('application_end_date',"N/A")
+            },
+            "documents_required": subsidy.get('documents_required', [])
+        }
+
     # ---------------------- End of Nodes --------------------- #
-    def recommend_subsidies(self, farmer_profile: Dict[str,Any], all_subsidies: List[Dict[str,Any]]) -> Dict[str,Any]:
-        overall_start = time.time()
-        
-        initial_state : RecommendationState = {
+    def _initial_state(self, farmer_profile: Dict[str,Any], all_subsidies: List[Dict[str,Any]], max_ms: float = None) -> RecommendationState:
+        return {
             "farmer_profile" : farmer_profile,
             "all_subsidies" : all_subsidies,
             "eligible_subsidies" : [],
+            "shortlisted_subsidies" : [],
             "scored_subsidies" : [],
             "recommended_subsidies" : [],
             "analysis" : "",
-            "final_recommendations" : {}
+            "final_recommendations" : {},
+            "deadline" : time.monotonic() + max_ms / 1000 if max_ms else None,
         }
+
+    def recommend_subsidies(self, farmer_profile: Dict[str,Any], all_subsidies: List[Dict[str,Any]], max_ms: float = None) -> Dict[str,Any]:
+        """Top recommendations. With max_ms, model calls stop in time to answer within that many milliseconds and
+        whatever the model did not score is ranked locally (scored_by "heuristic")."""
+        overall_start = time.perf_counter()
         
-        result = self.graph.invoke(initial_state)
-        
-        # Print total time taken
-        total_time = time.time() - overall_start
-        print(f"{'='*60}")
-        print(f" TOTAL TIME: {total_time:.1f}s")
-        print(f"{'='*60}\n")
+        result = self.graph.invoke(self._initial_state(farmer_profile, all_subsidies, max_ms))
         
+        record_run(time.perf_counter() - overall_start, len(all_subsidies), len(result['final_recommendations'].get('recommended_subsidies', [])))
         return result['final_recommendations']
 
+    def stream_recommendations(self, farmer_profile: Dict[str,Any], all_subsidies: List[Dict[str,Any]], max_ms: float = None) -> Iterator[Tuple[str, Any]]:
+        """Yield (event, payload) as the graph runs: ("eligibility", {"eligible_count"}), ("scored", recommendation) per subsidy, then ("final", final_recommendations)."""
+        for mode, chunk in self.graph.stream(self._initial_state(farmer_profile, all_subsidies, max_ms), stream_mode=["updates", "custom"]):
+            # score_subsidies writes one custom chunk per subsidy as its score arrives
+            if mode == "custom":
+                yield chunk["event"], chunk["subsidy"]
+                continue
+            for node, node_state in chunk.items():
+                if node == "filter_eligibility":
+                    yield "eligibility", {"eligible_count": len(node_state['eligible_subsidies'])}
+                elif node == "generate_recommendations":
+                    yield "final", node_state['final_recommendations']
+
 if __name__ == "__main__":
     recommander = SubsidyRecommander()
\ No newline at end of file
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from .models import LLMDecision, ProfileCohort, RecommendationJob
+
+
+@admin.register(LLMDecision)
+class LLMDecisionAdmin(admin.ModelAdmin):
+    list_display = ("kind", "subsidy_id", "last_used_at", "expires_at")
+    list_filter = ("kind",)
+    search_fields = ("key",)
+    readonly_fields = ("created_at",)
+
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = ("job_id", "status", "stage", "scored_count", "created_at", "expires_at")
+    list_filter = ("status",)
+    search_fields = ("job_id",)
+    readonly_fields = ("job_id", "created_at", "updated_at")
+
+
+@admin.register(ProfileCohort)
+class ProfileCohortAdmin(admin.ModelAdmin):
+    list_display = ("state", "farmer_type", "crop_type", "land_band", "income_band", "request_count", "computed_at")
+    list_filter = ("state", "farmer_type")
+    search_fields = ("state", "crop_type")
+    readonly_fields = ("key", "computed_at", "invalidated_at")
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SubsidyrecommandationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'SubsidyRecommandation'
+
+    def ready(self):
+        import SubsidyRecommandation.signals
@@ -0,0 +1,372 @@
+"""
+Offline benchmark of SubsidyRecommander.
+
+FakeChatModel stands in for ChatGroq: it answers eligibility, score and batch
+score prompts deterministically (same seed and prompt, same answer) after a
+configurable latency, and fails a configurable share of calls the way Groq
+does: mostly with timeouts, 429s and 503s, which the recommender retries and
+counts against its circuit breaker, and optionally some permanent 400s. Each
+attempt draws its own failure, so a retry can succeed. run_benchmark()
+runs the graph over synthetic farmer profiles against catalogues of each size
+and reports per-node wall time, LLM calls, retries, calls refused by the open
+breaker and estimated tokens with p50/p95/p99, as JSON so results can be diffed across commits.
+
+Run it with `python manage.py benchmark_recommender`.
+
+cache_key_hit_rate() replays synthetic traffic in which each farmer sends
+their profile spelled a different way each time, and reports how often the
+raw and the canonical (profile_key.py) cache keys would hit. Run it with
+`python manage.py cache_key_report`.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.messages import AIMessage
+
+from .SubsidyRecommander import SubsidyRecommander
+from .metrics import metrics
+from .profile_key import profile_cache_key
+from .prompts import estimate_tokens
+from .semantic_index import SubsidyIndex
+
+DEFAULT_SIZES = [10, 100, 1000]
+NODES = ["filter_eligibility", "shortlist_subsidies", "score_subsidies", "generate_recommendations"]
+PERCENTILES = [50, 95, 99]
+
+STATES = ["Gujarat", "Rajasthan", "Maharashtra", "Punjab", "Uttar Pradesh", "Madhya Pradesh"]
+DISTRICTS = ["Anand", "Kutch", "Jaipur", "Nashik", "Ludhiana", "Indore"]
+FARMER_TYPES = ["marginal", "small", "medium", "large"]
+CROPS = ["wheat", "cotton", "rice", "groundnut", "sugarcane", "millet", "soybean"]
+SEASONS = ["kharif", "rabi", "zaid"]
+SOIL_TYPES = ["black", "alluvial", "red", "sandy", "loamy"]
+WATER_SOURCES = ["canal", "borewell", "rainfed", "river", "pond"]
+SCHEMES = ["seed", "drip irrigation", "solar pump", "crop insurance", "tractor", "soil health", "warehouse", "organic input"]
+FREE_TEXT_CRITERIA = ["Must own a bank account linked to Aadhaar", "Land must be registered in the applicant's name",
+                      "Applicant must not have defaulted on a crop loan", "Member of a registered farmer producer organisation"]
+
+_SUBSIDY_ID_RE = re.compile(r"- id (\d+):")
+
+# transient failures, in the proportions drawn: a timeout, rate limiting, an overloaded upstream
+TRANSIENT_FAILURES = ["timeout", 429, 503]
+
+
+class FakeAPIError(Exception):
+    """An error answer from the API, with the status_code resilience.is_transient reads."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"fake API error {status_code}")
+        self.status_code = status_code
+
+
+class FakeChatModel:
+    """Deterministic async stand-in for ChatGroq. permanent_share of the failures are 400s, the rest transient."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0, seed: int = 0,
+                 permanent_share: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.permanent_share = permanent_share
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = Counter()
+            self.failures = Counter()
+            self.attempts = Counter()
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": dict(self.calls),
+                "failures": sum(self.failures.values()),
+                "failures_by_error": {str(error): count for error, count in self.failures.items()},
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    async def ainvoke(self, messages):
+        system, prompt = messages[0].content, messages[-1].content
+        rng = random.Random(f"{self.seed}:{prompt}")
+        kind = self._kind(system, prompt)
+
+        await asyncio.sleep(max(0.0, self.latency * (1 + self.jitter * rng.uniform(-1, 1))))
+
+        prompt_tokens = sum(estimate_tokens(message.content) for message in messages)
+        with self._lock:
+            self.calls[kind] += 1
+            self.prompt_tokens += prompt_tokens
+            self.attempts[prompt] += 1
+            attempt = self.attempts[prompt]
+        # drawn per attempt, so a retried prompt doesn't fail the same way every time
+        failure = random.Random(f"{self.seed}:{prompt}:{attempt}")
+        if failure.random() < self.failure_rate:
+            error = 400 if failure.random() < self.permanent_share else failure.choice(TRANSIENT_FAILURES)
+            with self._lock:
+                self.failures[error] += 1
+            if error == "timeout":
+                raise TimeoutError(f"fake {kind} call timed out")
+            raise FakeAPIError(error)
+
+        content = self._answer(kind, prompt, rng)
+        completion_tokens = estimate_tokens(content)
+        with self._lock:
+            self.completion_tokens += completion_tokens
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        })
+
+    def invoke(self, messages):
+        return asyncio.run(self.ainvoke(messages))
+
+    @staticmethod
+    def _kind(system: str, prompt: str) -> str:
+        if "eligibility" in system.lower():
+            return "eligibility"
+        if _SUBSIDY_ID_RE.search(prompt):
+            return "batch_score"
+        return "score"
+
+    @staticmethod
+    def _score(rng: random.Random) -> Dict[str, Any]:
+        return {"score": rng.randint(0, 100), "reasoning": "synthetic score", "key_benefits": ["benefit"]}
+
+    def _answer(self, kind: str, prompt: str, rng: random.Random) -> str:
+        if kind == "eligibility":
+            return json.dumps({"eligible": rng.random() < 0.7, "reason": "synthetic check"})
+        if kind == "batch_score":
+            return json.dumps([dict(self._score(rng), id=int(subsidy_id)) for subsidy_id in _SUBSIDY_ID_RE.findall(prompt)])
+        return json.dumps(self._score(rng))
+
+
+# ---------------------- synthetic data ---------------------- #
+def generate_profiles(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(f"profiles:{seed}")
+    return [
+        {
+            "income": str(rng.choice([40000, 90000, 150000, 300000, 800000, 1500000])),
+            "farmer_type": rng.choice(FARMER_TYPES),
+            "land_size": str(rng.choice([1, 2.5, 4, 8, 15, 30])),
+            "crop_type": rng.choice(CROPS),
+            "season": rng.choice(SEASONS),
+            "soil_type": rng.choice(SOIL_TYPES),
+            "water_sources": rng.sample(WATER_SOURCES, 2),
+            "state": rng.choice(STATES),
+            "district": rng.choice(DISTRICTS),
+        }
+        for _ in range(count)
+    ]
+
+
+def _eligibility(rng: random.Random) -> Any:
+    """A mix the catalogue really holds: no criteria, structured rules, free text, or rules plus free text."""
+    rules = {
+        "income": {"max": rng.choice([100000, 250000, 500000, 1000000])},
+        "states": rng.sample(STATES, rng.randint(1, 4)),
+        "crops": rng.sample(CROPS, rng.randint(2, 5)),
+    }
+    shape = rng.random()
+    if shape < 0.2:
+        return []
+    if shape < 0.55:
+        return [rules]
+    if shape < 0.8:
+        return rng.sample(FREE_TEXT_CRITERIA, 2)
+    return [dict(rules, criteria=[rng.choice(FREE_TEXT_CRITERIA)])]
+
+
+def generate_subsidies(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(f"subsidies:{seed}")
+    subsidies = []
+    for subsidy_id in range(1, count + 1):
+        scheme, crop = rng.choice(SCHEMES), rng.choice(CROPS)
+        subsidies.append({
+            "id": subsidy_id,
+            "title": f"{crop.title()} {scheme} support scheme {subsidy_id}",
+            "description": f"Assistance for {crop} farmers in {rng.choice(STATES)} towards {scheme} during {rng.choice(SEASONS)}.",
+            "amount": float(rng.choice([5000, 10000, 25000, 50000, 100000])),
+            "eligibility_criteria": _eligibility(rng),
+            "documents_required": ["Aadhaar", "Land record"],
+            "application_start_date": "2026-01-01",
+            "application_end_date": "2026-12-31",
+        })
+    return subsidies
+
+
+def respell_profile(farmer_profile: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """The same profile as a client might send it: other case and spacing, other number formats, lists reordered."""
+    def text(value):
+        value = rng.choice([value, value.lower(), value.upper(), value.title()])
+        return rng.choice([value, f" {value}", f"{value} "])
+
+    land, income = float(farmer_profile["land_size"]), int(farmer_profile["income"])
+    water_sources = [text(source) for source in rng.sample(farmer_profile["water_sources"], len(farmer_profile["water_sources"]))]
+    respelled = {field: text(value) if isinstance(value, str) else value for field, value in farmer_profile.items()}
+    respelled.update({
+        # no hectares: a rounded conversion is a different land size, not another spelling of it
+        "land_size": rng.choice([str(land), f"{land:g}", land, f"{land:g} acres"]),
+        "income": rng.choice([str(income), income, f"{income:,}", f"{income / 100000:g} lakh"]),
+        "water_sources": water_sources,
+        "past_subsidies": rng.choice([[], ""]),
+    })
+    return respelled
+
+
+def _raw_cache_key(farmer_profile: Dict[str, Any], generation: int) -> str:
+    """The key recommendation_cache_key used before profiles were canonicalized."""
+    data = {"farmer_profile": farmer_profile, "catalogue_generation": generation}
+    return f"subsidy_rec_{hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()}"
+
+
+def cache_key_hit_rate(requests: int = 1000, farmers: int = 100, respelled: float = 0.5, seed: int = 0) -> Dict[str, Any]:
+    """Replay `requests` requests from `farmers` distinct farmers against an unbounded cache under both keys.
+
+    A `respelled` share of the requests spell the profile differently, the rest resend it exactly.
+    """
+    rng = random.Random(f"traffic:{seed}")
+    profiles = generate_profiles(farmers, seed)
+    traffic = []
+    for _ in range(requests):
+        farmer_profile = dict(rng.choice(profiles), past_subsidies=[])
+        traffic.append(respell_profile(farmer_profile, rng) if rng.random() < respelled else farmer_profile)
+
+    report = {"requests": requests, "farmers": farmers, "respelled": respelled, "seed": seed,
+              "best_possible_hit_rate": round(1 - len({json.dumps(p, sort_keys=True) for p in profiles}) / requests, 3)}
+    for name, key in [("raw", _raw_cache_key), ("canonical", profile_cache_key)]:
+        seen, hits = set(), 0
+        for farmer_profile in traffic:
+            cache_key = key(farmer_profile, 1)
+            hits += cache_key in seen
+            seen.add(cache_key)
+        report[name] = {"hits": hits, "hit_rate": round(hits / max(requests, 1), 3), "distinct_keys": len(seen)}
+    return report
+
+
+# ---------------------- measurement ---------------------- #
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    summary = {f"p{p}": round(float(np.percentile(values, p)), 2) for p in PERCENTILES}
+    summary["mean"] = round(float(np.mean(values)), 2)
+    return summary
+
+
+def timed_run(recommender: SubsidyRecommander, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run the graph once. Nodes run one after another, so each node's time is the gap since the previous update."""
+    node_ms = {}
+    final = {}
+    start = previous = time.perf_counter()
+    for chunk in recommender.graph.stream(recommender._initial_state(farmer_profile, subsidies), stream_mode="updates"):
+        now = time.perf_counter()
+        for node, node_state in chunk.items():
+            node_ms[node] = (now - previous) * 1000
+            if node == "generate_recommendations":
+                final = node_state["final_recommendations"]
+        previous = now
+    return {"total_ms": (time.perf_counter() - start) * 1000, "node_ms": node_ms, "final": final}
+
+
+def benchmark_catalogue(size: int, runs: int, model: FakeChatModel, seed: int = 0, use_index: bool = True,
+                        **recommender_options) -> Dict[str, Any]:
+    catalogue = generate_subsidies(size, seed)
+    profiles = generate_profiles(runs, seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        retriever = None
+        if use_index:
+            retriever = SubsidyIndex(Path(directory) / "subsidy_index.npz")
+            retriever.upsert(catalogue)  # built ahead, like the signal-maintained production index
+
+        recommender = SubsidyRecommander(model=model, retriever=retriever, **recommender_options)
+        totals, nodes, calls, recommended = [], {node: [] for node in NODES}, [], []
+        model.reset()
+        counters_before = metrics.snapshot()["counters"]
+
+        for farmer_profile in profiles:
+            before = model.stats()
+            run = timed_run(recommender, farmer_profile, copy.deepcopy(catalogue))
+            after = model.stats()
+
+            totals.append(run["total_ms"])
+            for node, ms in run["node_ms"].items():
+                nodes.setdefault(node, []).append(ms)
+            calls.append(sum(after["calls"].values()) - sum(before["calls"].values()))
+            recommended.append(len(run["final"].get("recommended_subsidies", [])))
+
+    stats = model.stats()
+    counters = Counter(metrics.snapshot()["counters"])
+    counters.subtract(counters_before)
+    return {
+        "catalogue_size": size,
+        "runs": runs,
+        "total_ms": percentiles(totals),
+        "node_ms": {node: percentiles(values) for node, values in nodes.items()},
+        "llm_calls": {
+            "total": sum(stats["calls"].values()),
+            "per_run": percentiles(calls),
+            "by_kind": stats["calls"],
+            "failed": stats["failures"],
+            "failed_by_error": stats["failures_by_error"],
+            "retries": sum(count for name, count in counters.items() if name.startswith("llm_retries")),
+            # refused without calling the model while the circuit breaker was open
+            "short_circuited": sum(count for name, count in counters.items() if "outcome=short_circuited" in name),
+        },
+        "tokens": {
+            "prompt": stats["prompt_tokens"],
+            "completion": stats["completion_tokens"],
+            "per_run": round((stats["prompt_tokens"] + stats["completion_tokens"]) / max(runs, 1), 1),
+        },
+        "recommended_per_run": percentiles(recommended),
+    }
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmark(sizes: List[int] = None, runs: int = 20, latency: float = 0.05, jitter: float = 0.5,
+                  failure_rate: float = 0.02, permanent_share: float = 0.0, seed: int = 0, use_index: bool = True,
+                  **recommender_options) -> Dict[str, Any]:
+    model = FakeChatModel(latency=latency, jitter=jitter, failure_rate=failure_rate, seed=seed, permanent_share=permanent_share)
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "commit": current_commit(),
+        "config": {
+            "runs": runs,
+            "latency": latency,
+            "jitter": jitter,
+            "failure_rate": failure_rate,
+            "permanent_share": permanent_share,
+            "seed": seed,
+            "use_index": use_index,
+            **recommender_options,
+        },
+        "results": [
+            benchmark_catalogue(size, runs, model, seed=seed, use_index=use_index, **recommender_options)
+            for size in (sizes or DEFAULT_SIZES)
+        ],
+    }
@@ -0,0 +1,46 @@
+"""
+Subsidy catalogue generation.
+
+The generation lives in the database so every gunicorn worker sees the same
+value, and it is bumped after each committed Subsidy write (see signals.py).
+Cache keys that embed it (the catalogue, per-profile recommendations) simply
+stop matching after a write, so they can be cached for hours without serving
+stale subsidies. A second counter follows rating writes; together with their
+updated_at they give the subsidies API its ETag and Last-Modified (see
+app.conditional).
+"""
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CatalogueGeneration
+
+SUBSIDIES = "subsidies"
+# bumped by rating writes, which leave the subsidies generation (and the cached rankings) alone
+RATINGS = "ratings"
+
+
+def generations(*names):
+    """{name: (value, updated_at)} of the named counters that were ever bumped, in one query."""
+    rows = CatalogueGeneration.objects.filter(name__in=names).values_list("name", "value", "updated_at")
+    return {name: (value, updated_at) for name, value, updated_at in rows}
+
+
+def bump_generation(name: str) -> None:
+    # update() skips auto_now, updated_at is set here so it can serve as Last-Modified
+    def increment():
+        return CatalogueGeneration.objects.filter(name=name).update(value=F("value") + 1, updated_at=timezone.now())
+
+    if not increment():
+        _, created = CatalogueGeneration.objects.get_or_create(name=name, defaults={"value": 1})
+        if not created:
+            # a concurrent first bump created the row, ours still has to count
+            increment()
+
+
+def catalogue_generation() -> int:
+    return CatalogueGeneration.objects.filter(name=SUBSIDIES).values_list("value", flat=True).first() or 0
+
+
+def bump_catalogue_generation() -> None:
+    bump_generation(SUBSIDIES)
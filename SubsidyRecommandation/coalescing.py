@@ -0,0 +1,66 @@
+"""
+Single-flight recommendation runs.
+
+A double-tapped "Recommend" or a reloaded page sends the same profile again
+while the first pipeline is still running. recommend_once() runs the pipeline
+for a cache key at most once at a time: identical requests wait on the
+running one, across threads and, through the cache's lock file, across
+gunicorn workers, then read its result from the cache. Callers pass the
+recommender's worst_case_seconds() as the lock timeout, so a slow run is not
+duplicated because the cache's generic LOCK_TIMEOUT ran out first.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from .metrics import metrics
+
+RESULT_TIMEOUT = 300  # the 5 minute recommendation cache
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+@contextmanager
+def _process_lock(key):
+    with _locks_lock:
+        entry = _locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _locks_lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[key]
+
+
+def single_flight(key, timeout=None):
+    """The cache backend's cross-worker lock (back.cache.TwoTierCache), or a per-process lock for other backends.
+
+    timeout is how long to wait for the holder, the backend's LOCK_TIMEOUT when None.
+    """
+    if hasattr(cache, "single_flight"):
+        return cache.single_flight(key, timeout=timeout)
+    return _process_lock(key)
+
+
+def cached_or_coalesced(key):
+    """The cached result for key, counting it as coalesced when it was computed while this request waited."""
+    result = cache.get(key)
+    if result is not None:
+        metrics.increment("coalesced_requests")
+    return result
+
+
+def recommend_once(key, compute, timeout=RESULT_TIMEOUT, lock_timeout=None):
+    """Return the cached result for key, or compute and cache it, with one computation in flight per key."""
+    with single_flight(key, lock_timeout):
+        result = cached_or_coalesced(key)
+        if result is None:
+            result = compute()
+            cache.set(key, result, timeout)
+        return result
@@ -0,0 +1,113 @@
+"""
+Precomputed recommendations per farmer profile cohort.
+
+A cohort is the coarse profile bucket the decision cache already uses (income
+band, land band, state, crop, farmer type). Every profile sent to the
+recommendation endpoints is counted against its cohort, the
+precompute_cohort_recommendations command runs the recommender off-peak for
+the recently active cohorts, and the endpoints answer from a warm cohort
+without touching the model. Any Subsidy change clears the stored rankings
+(see signals.py) until the next run.
+
+Requests to existing cohorts are counted in memory and each worker writes
+them in one bulk UPDATE every RECOMMENDER_COHORT_FLUSH_INTERVAL seconds, so a
+request costs one SELECT. A worker that dies loses at most that interval's
+counts, which only shifts the precompute order a little.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .llm_cache import profile_bucket
+from .models import ProfileCohort
+
+
+def cohort_key(farmer_profile: Dict[str, Any]) -> str:
+    return hashlib.sha256(profile_bucket(farmer_profile).encode()).hexdigest()
+
+
+# cohort id -> [requests, last requested at, latest profile], not yet written
+_pending = {}
+_pending_lock = threading.Lock()
+_next_flush = 0.0
+
+
+def _count_request(cohort_id: int, now, farmer_profile: Dict[str, Any]) -> None:
+    with _pending_lock:
+        entry = _pending.setdefault(cohort_id, [0, now, farmer_profile])
+        entry[0] += 1
+        entry[1:] = [now, farmer_profile]
+        due = time.monotonic() >= _next_flush
+    if due:
+        flush_counts()
+
+
+def flush_counts() -> int:
+    """Write the request counts gathered since the last flush in one UPDATE. Returns how many cohorts it touched."""
+    global _pending, _next_flush
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _next_flush = time.monotonic() + getattr(settings, "RECOMMENDER_COHORT_FLUSH_INTERVAL", 60)
+    if not pending:
+        return 0
+
+    cohorts = [
+        ProfileCohort(pk=cohort_id, request_count=F("request_count") + count, last_requested_at=requested_at, farmer_profile=farmer_profile)
+        for cohort_id, (count, requested_at, farmer_profile) in pending.items()
+    ]
+    ProfileCohort.objects.bulk_update(cohorts, ["request_count", "last_requested_at", "farmer_profile"])
+    return len(cohorts)
+
+
+def warm_recommendations(farmer_profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Count the request against the profile's cohort and return the cohort's precomputed result, if any."""
+    key = cohort_key(farmer_profile)
+    now = timezone.now()
+    # the ranking is shared by the cohort, so it is computed without any one farmer's past subsidies
+    farmer_profile = {field: value for field, value in farmer_profile.items() if field != "past_subsidies"}
+    cohort = ProfileCohort.objects.filter(key=key).only("id", "result").first()
+
+    if cohort is not None:
+        _count_request(cohort.pk, now, farmer_profile)
+        return cohort.result
+
+    income_band, land_band, state, crop_type, farmer_type = profile_bucket(farmer_profile).split("|")
+    try:
+        with transaction.atomic():
+            ProfileCohort.objects.create(
+                key=key, state=state, farmer_type=farmer_type, crop_type=crop_type, land_band=land_band,
+                income_band=income_band, farmer_profile=farmer_profile, request_count=1, last_requested_at=now,
+            )
+    except IntegrityError:
+        # a concurrent request created it first
+        _count_request(ProfileCohort.objects.values_list("id", flat=True).get(key=key), now, farmer_profile)
+    return None
+
+
+def active_cohorts(days: int = None, min_requests: int = 1, limit: int = None) -> List[ProfileCohort]:
+    """Cohorts requested within the last `days`, most requested first."""
+    days = days or getattr(settings, "RECOMMENDER_COHORT_ACTIVE_DAYS", 30)
+    cohorts = ProfileCohort.objects.filter(
+        last_requested_at__gte=timezone.now() - timedelta(days=days), request_count__gte=min_requests,
+    ).order_by("-request_count", "id")
+    return list(cohorts[:limit] if limit else cohorts)
+
+
+def store_result(cohort: ProfileCohort, result: Dict[str, Any], started_at) -> bool:
+    """Save a precomputed result unless the catalogue changed since the run started. Returns whether it was saved."""
+    saved = ProfileCohort.objects.filter(pk=cohort.pk).exclude(invalidated_at__gte=started_at).update(
+        result=result, computed_at=started_at,
+    )
+    return bool(saved)
+
+
+def invalidate_all() -> int:
+    return ProfileCohort.objects.update(result=None, computed_at=None, invalidated_at=timezone.now())
@@ -0,0 +1,176 @@
+"""
+Deterministic eligibility rules for Subsidy.eligibility.
+
+Subsidy.eligibility is either a list of free-text criteria (read by the LLM),
+or structured rules, or a mix of both. Structured rules are a dict, given as
+the whole field or as an item of the list:
+
+    {
+        "income": {"min": 0, "max": 250000},
+        "land_size": {"max": 5},                  # acres
+        "states": ["Gujarat", "Rajasthan"],
+        "districts": ["Anand"],
+        "farmer_types": ["small", "marginal"],
+        "crops": ["wheat", "cotton"],
+        "seasons": ["kharif"],
+        "criteria": ["Must own a bank account"]   # free text, left to the LLM
+    }
+
+Any other key is kept as a free-text criterion too, so a provider can add a
+rule the code does not know yet (e.g. "caste") without being rejected.
+
+evaluate_eligibility() returns False as soon as one rule rules the farmer out,
+True when every rule passes and no free-text criteria are left, and None when
+the rules cannot decide (free text or missing profile data), in which case the
+subsidy goes to the model.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+RANGE_RULES = {
+    "income": "income",
+    "land_size": "land_size",
+}
+
+SET_RULES = {
+    "states": "state",
+    "districts": "district",
+    "farmer_types": "farmer_type",
+    "crops": "crop_type",
+    "seasons": "season",
+}
+
+TEXT_KEY = "criteria"
+
+_MULTIPLIERS = {
+    "lakh": 100000,
+    "lakhs": 100000,
+    "lac": 100000,
+    "crore": 10000000,
+    "crores": 10000000,
+    "hectare": 2.471,
+    "hectares": 2.471,
+    "ha": 2.471,
+}
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def to_number(value: Any) -> Optional[float]:
+    """Parse profile values like 150000, "1,50,000", "₹1.5 lakh" or "2 hectares" (converted to acres)."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    text = str(value).lower().replace(",", "")
+    match = _NUMBER_RE.search(text)
+    if not match:
+        return None
+
+    number = float(match.group())
+    for word in re.findall(r"[a-z]+", text[match.end():]):
+        if word in _MULTIPLIERS:
+            number *= _MULTIPLIERS[word]
+            break
+    return number
+
+
+def _normalize(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+def _profile_values(value: Any) -> set:
+    """Profile fields may hold a single value, a comma separated string or a list."""
+    if isinstance(value, (list, tuple, set)):
+        items = value
+    else:
+        items = str(value).split(",")
+    return {_normalize(item) for item in items if str(item).strip()}
+
+
+def _range_bounds(rule: Any) -> Optional[tuple]:
+    """(min, max) of a range rule, either may be None, or None if the rule isn't an object of numeric bounds."""
+    if not isinstance(rule, dict) or not set(rule) <= {"min", "max"}:
+        return None
+    bounds = tuple(to_number(rule.get(bound)) for bound in ("min", "max"))
+    if any(rule.get(bound) is not None and number is None for bound, number in zip(("min", "max"), bounds)):
+        return None
+    return bounds
+
+
+def split_eligibility(eligibility: Any):
+    """Split the raw JSON field into (merged structured rules, free-text criteria)."""
+    rules: Dict[str, Any] = {}
+    criteria = []
+
+    items = eligibility if isinstance(eligibility, list) else [eligibility]
+    for item in items:
+        if isinstance(item, dict):
+            for key, value in item.items():
+                if key == TEXT_KEY:
+                    criteria.extend(value if isinstance(value, list) else [value])
+                else:
+                    rules[key] = value
+        elif item not in (None, ""):
+            criteria.append(item)
+
+    return rules, criteria
+
+
+def validate_rules(eligibility: Any) -> None:
+    """Raise ValueError if a known structured rule is malformed; other keys are free text for the LLM."""
+    rules, _ = split_eligibility(eligibility)
+
+    for key, rule in rules.items():
+        if key in RANGE_RULES:
+            if not isinstance(rule, dict) or not set(rule) <= {"min", "max"}:
+                raise ValueError(f"'{key}' must be an object with 'min' and/or 'max'.")
+            if _range_bounds(rule) is None:
+                raise ValueError(f"'{key}' bounds must be numbers.")
+        elif key in SET_RULES:
+            if not isinstance(rule, list):
+                raise ValueError(f"'{key}' must be a list.")
+
+
+def evaluate_eligibility(eligibility: Any, farmer_profile: Dict[str, Any]) -> Optional[bool]:
+    """Return True/False when the structured rules decide eligibility, None when the model has to."""
+    rules, criteria = split_eligibility(eligibility)
+    undecided = bool(criteria)
+
+    for key, field in RANGE_RULES.items():
+        if key not in rules:
+            continue
+        bounds = _range_bounds(rules[key])
+        if bounds is None:
+            # a malformed rule such as "below 2 lakh", left to the model like free text
+            undecided = True
+            continue
+        low, high = bounds
+        value = to_number(farmer_profile.get(field))
+        if value is None:
+            undecided = True
+            continue
+        if (low is not None and value < low) or (high is not None and value > high):
+            return False
+
+    for key, field in SET_RULES.items():
+        allowed = rules.get(key)
+        if not allowed:
+            continue
+        if not isinstance(allowed, list):
+            # e.g. "states": "Punjab" instead of a list, the model reads it
+            undecided = True
+            continue
+        values = _profile_values(farmer_profile.get(field) or "")
+        if not values:
+            undecided = True
+            continue
+        if values.isdisjoint(_normalize(item) for item in allowed):
+            return False
+
+    if any(key not in RANGE_RULES and key not in SET_RULES for key in rules):
+        undecided = True
+
+    return None if undecided else True
@@ -0,0 +1,107 @@
+"""
+Local pre-ranking of subsidies on the farmer's agronomic profile.
+
+The recommendation form collects season, soil type, water sources, rainfall
+region and temperature zone, which the eligibility rules don't use. The
+FeatureRanker scores every subsidy on how many of those terms its title,
+description and eligibility mention, plus its star rating, as one matrix
+product over a 0/1 term matrix of the catalogue, so only the best-matching
+head of the catalogue is sent to the model. Subsidies in past_subsidies (ids
+or titles, the views add the ones the farmer already applied for) are left
+out altogether.
+"""
+
+import threading
+from typing import Any, Dict, List, Set
+
+import numpy as np
+
+from .semantic_index import subsidy_text, tokenize
+
+# weight of each profile field's match, and of a 5 star rating
+FEATURE_WEIGHTS = {
+    "crop_type": 3.0,
+    "season": 2.0,
+    "soil_type": 1.5,
+    "water_sources": 1.5,
+    "rainfall_region": 1.0,
+    "temperature_zone": 1.0,
+    "rating": 1.0,
+}
+# words the form puts next to the actual value ("black soil", "high rainfall region")
+FIELD_WORDS = {"soil", "season", "region", "zone", "rainfall", "temperature", "water", "source", "crop", "crops"}
+
+
+def _values(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple)):
+        value = [value]
+    return [" ".join(str(item).split()) for item in value if item not in (None, "") and str(item).strip()]
+
+
+def past_subsidy_keys(farmer_profile: Dict[str, Any]) -> Set[str]:
+    """Lower-cased ids and titles of the subsidies the farmer already received or applied for."""
+    return {value.lower() for value in _values(farmer_profile.get("past_subsidies"))}
+
+
+def is_past_subsidy(keys: Set[str], subsidy_id: Any, title: Any) -> bool:
+    return bool(keys) and (str(subsidy_id).lower() in keys or " ".join(str(title or "").split()).lower() in keys)
+
+
+class FeatureRanker:
+    """Scores subsidies against the profile fields in FEATURE_WEIGHTS with vectorized NumPy arithmetic."""
+
+    def __init__(self, weights: Dict[str, float] = None):
+        self.weights = {**FEATURE_WEIGHTS, **(weights or {})}
+        self.fields = [field for field in self.weights if field != "rating"]
+        self._lock = threading.Lock()
+        # term matrix of the last catalogue seen, rebuilt when the catalogue changes
+        self._fingerprint = None
+        self._vocabulary = {}
+        self._terms = np.zeros((0, 0), dtype=bool)
+
+    def _fit(self, subsidies: List[Dict[str, Any]]) -> tuple:
+        # the exact text tokenized below, so an edit to the eligibility criteria refits as well as one to the title
+        texts = [subsidy_text(subsidy) for subsidy in subsidies]
+        fingerprint = hash(tuple(texts))
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                documents = [set(tokenize(text)) for text in texts]
+                vocabulary = {token: column for column, token in enumerate(sorted(set().union(*documents)))}
+                terms = np.zeros((len(subsidies), len(vocabulary)), dtype=bool)
+                for row, tokens in enumerate(documents):
+                    terms[row, [vocabulary[token] for token in tokens]] = True
+                self._fingerprint, self._vocabulary, self._terms = fingerprint, vocabulary, terms
+            return self._vocabulary, self._terms
+
+    def _field_match(self, values: List[str], vocabulary: Dict[str, int], terms: np.ndarray) -> np.ndarray:
+        """Per subsidy, the share of the field's values it mentions, a value counting as the share of its words found."""
+        match = np.zeros(len(terms), dtype=np.float32)
+        for value in values:
+            tokens = [token for token in tokenize(value) if token not in FIELD_WORDS] or tokenize(value)
+            columns = [vocabulary[token] for token in tokens if token in vocabulary]
+            if columns:
+                match += terms[:, columns].sum(axis=1) / len(tokens)
+        return match / max(len(values), 1)
+
+    def scores(self, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]]) -> np.ndarray:
+        if not subsidies:
+            return np.zeros(0, dtype=np.float32)
+        vocabulary, terms = self._fit(subsidies)
+
+        features = np.empty((len(subsidies), len(self.fields) + 1), dtype=np.float32)
+        for column, field in enumerate(self.fields):
+            features[:, column] = self._field_match(_values(farmer_profile.get(field)), vocabulary, terms)
+        features[:, -1] = np.clip(np.array([float(subsidy.get("rating") or 0) for subsidy in subsidies]) / 5, 0, 1)
+
+        weights = np.array([self.weights[field] for field in self.fields] + [self.weights["rating"]], dtype=np.float32)
+        return features @ weights
+
+    def rank(self, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Subsidies best match first (catalogue order among ties), without the farmer's past subsidies."""
+        keys = past_subsidy_keys(farmer_profile)
+        # scored over the whole catalogue so its term matrix is reused across farmers
+        order = np.argsort(-self.scores(farmer_profile, subsidies), kind="stable")
+        return [subsidies[position] for position in order
+                if not is_past_subsidy(keys, subsidies[position].get("id"), subsidies[position].get("title"))]
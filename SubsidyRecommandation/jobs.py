@@ -0,0 +1,108 @@
+"""
+Background recommendation jobs.
+
+create_recommendation_job queues a run here and returns straight away, so a
+slow LangGraph run occupies a job thread instead of a gunicorn request thread.
+Progress and the best results so far are written to the RecommendationJob row
+as the graph streams, and recommendation_job_status reads them back.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .coalescing import RESULT_TIMEOUT, cached_or_coalesced, single_flight
+from .models import RecommendationJob
+from .registry import get_recommender
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_TOP_N = 5
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "RECOMMENDER_JOB_WORKERS", 2),
+                thread_name_prefix="recommendation-job",
+            )
+    return _executor
+
+
+def submit_job(farmer_profile, subsidies, cache_key, cached_result=None) -> RecommendationJob:
+    """Create a job row and hand the run to the worker pool. A cached result completes the job immediately."""
+    RecommendationJob.objects.filter(expires_at__lte=timezone.now()).delete()
+
+    job = RecommendationJob.objects.create(farmer_profile=farmer_profile, total_subsidies=len(subsidies))
+    if cached_result is not None:
+        job.status = "done"
+        job.result = cached_result
+        job.save(update_fields=["status", "result", "updated_at"])
+        return job
+
+    _get_executor().submit(run_job, job.pk, farmer_profile, subsidies, cache_key)
+    return job
+
+
+def run_job(job_pk, farmer_profile, subsidies, cache_key):
+    try:
+        job = RecommendationJob.objects.get(pk=job_pk)
+        job.status = "running"
+        job.stage = "filter_eligibility"
+        job.save(update_fields=["status", "stage", "updated_at"])
+
+        # a duplicate job for the same profile waits for the first one and takes its result
+        recommender = get_recommender()
+        with single_flight(cache_key, recommender.worst_case_seconds()):
+            cached_result = cached_or_coalesced(cache_key)
+            if cached_result is not None:
+                job.status = "done"
+                job.stage = ""
+                job.result = cached_result
+                job.save(update_fields=["status", "stage", "result", "updated_at"])
+                return
+
+            _stream_into_job(job, recommender, farmer_profile, subsidies, cache_key)
+
+    except Exception as e:
+        logger.exception("Recommendation job %s failed", job_pk)
+        RecommendationJob.objects.filter(pk=job_pk).update(status="failed", error=str(e))
+
+    finally:
+        # job threads outlive requests, so they release their DB connection like a request would
+        close_old_connections()
+
+
+def _stream_into_job(job, recommender, farmer_profile, subsidies, cache_key):
+    scored = []
+
+    for event, payload in recommender.stream_recommendations(farmer_profile, subsidies):
+        if event == "eligibility":
+            job.eligible_count = payload["eligible_count"]
+            job.stage = "score_subsidies"
+            job.save(update_fields=["eligible_count", "stage", "updated_at"])
+
+        elif event == "scored":
+            scored.append(payload)
+            scored.sort(key=lambda item: item.get("relevance_score", 0), reverse=True)
+            job.scored_count = len(scored)
+            job.partial_results = [dict(item, rank=i) for i, item in enumerate(scored[:PARTIAL_TOP_N], 1)]
+            job.save(update_fields=["scored_count", "partial_results", "updated_at"])
+
+        elif event == "final":
+            job.status = "done"
+            job.stage = ""
+            job.result = payload
+            job.save(update_fields=["status", "stage", "result", "updated_at"])
+            # same 5 minute cache the synchronous endpoint uses
+            cache.set(cache_key, payload, RESULT_TIMEOUT)
@@ -0,0 +1,131 @@
+"""
+Persistent cache of individual LLM eligibility and score decisions.
+
+Entries are keyed on the prompt template version and the model that answers,
+the subsidy id plus a hash of its content, and a coarse bucket of the farmer
+profile (with the district for scores, which the score prompt shows), so
+farmers with near-identical profiles share answers, and editing a subsidy or
+routing its calls to another model naturally misses. Rows live in the
+database, so they survive worker restarts and are shared by every gunicorn
+worker. Expired rows are ignored, and the least recently used rows are pruned
+once the table grows past its cap. Pruning deletes and counts the whole
+table, so each worker does it at most once per prune interval rather than on
+every write, and the table may overshoot its cap in between.
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from .eligibility_rules import to_number
+from .models import LLMDecision
+
+# upper bounds of each band, the last band is open ended
+INCOME_BANDS = [50000, 100000, 250000, 500000, 1000000]
+LAND_BANDS = [2.5, 5, 10, 25]  # acres: marginal, small, semi-medium, medium, large
+
+SUBSIDY_FIELDS = ["title", "description", "amount", "eligibility_criteria", "application_start_date", "application_end_date"]
+
+
+def _band(value: Any, bands) -> str:
+    number = to_number(value)
+    if number is None:
+        return "unknown"
+    for index, upper in enumerate(bands):
+        if number < upper:
+            return str(index)
+    return str(len(bands))
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ",".join(sorted(_text(item) for item in value))
+    return " ".join(str(value or "").lower().split())
+
+
+def profile_bucket(farmer_profile: Dict[str, Any]) -> str:
+    """Coarse, normalized view of the profile fields the prompts depend on."""
+    return "|".join([
+        _band(farmer_profile.get("income"), INCOME_BANDS),
+        _band(farmer_profile.get("land_size"), LAND_BANDS),
+        _text(farmer_profile.get("state")),
+        _text(farmer_profile.get("crop_type")),
+        _text(farmer_profile.get("farmer_type")),
+    ])
+
+
+def subsidy_revision(subsidy: Dict[str, Any]) -> str:
+    """Content hash of the subsidy fields that go into the prompts."""
+    content = json.dumps({field: subsidy.get(field) for field in SUBSIDY_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def decision_key(kind: str, version: str, subsidy: Dict[str, Any], bucket: str) -> str:
+    raw = f"{kind}:{version}:{subsidy.get('id')}:{subsidy_revision(subsidy)}:{bucket}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class DecisionCache:
+    """Database-backed LLM decision cache with TTL expiry and LRU pruning."""
+
+    def __init__(self, ttl: int = None, max_entries: int = None, prune_interval: float = None):
+        self.ttl = ttl or getattr(settings, "RECOMMENDER_DECISION_CACHE_TTL", 7 * 24 * 3600)
+        self.max_entries = max_entries or getattr(settings, "RECOMMENDER_DECISION_CACHE_MAX_ENTRIES", 50000)
+        self.prune_interval = prune_interval if prune_interval is not None else getattr(settings, "RECOMMENDER_DECISION_CACHE_PRUNE_INTERVAL", 300)
+        self._next_prune = 0.0  # time.monotonic() after which the next write prunes
+
+    def bucket(self, farmer_profile: Dict[str, Any], kind: str = "eligibility") -> str:
+        # the score prompt also shows the district (region relevance), and its reasoning may name it
+        if kind == "score":
+            return f"{profile_bucket(farmer_profile)}|{_text(farmer_profile.get('district'))}"
+        return profile_bucket(farmer_profile)
+
+    def key(self, kind: str, version: str, subsidy: Dict[str, Any], bucket: str) -> str:
+        return decision_key(kind, version, subsidy, bucket)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        now = timezone.now()
+        hits = dict(
+            LLMDecision.objects.filter(key__in=keys, expires_at__gt=now).values_list("key", "value")
+        )
+        if hits:
+            LLMDecision.objects.filter(key__in=list(hits)).update(last_used_at=now)
+        return hits
+
+    def set_many(self, kind: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """entries maps key -> {"subsidy_id": ..., "value": ...}."""
+        if not entries:
+            return
+
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.ttl)
+        LLMDecision.objects.bulk_create(
+            [
+                LLMDecision(key=key, kind=kind, subsidy_id=entry["subsidy_id"], value=entry["value"],
+                            last_used_at=now, expires_at=expires_at)
+                for key, entry in entries.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["value", "last_used_at", "expires_at"],
+        )
+        if time.monotonic() >= self._next_prune:
+            self._next_prune = time.monotonic() + self.prune_interval
+            self.prune()
+
+    def prune(self) -> None:
+        LLMDecision.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        excess = LLMDecision.objects.count() - self.max_entries
+        if excess > 0:
+            oldest = LLMDecision.objects.order_by("last_used_at").values_list("id", flat=True)[:excess]
+            LLMDecision.objects.filter(id__in=list(oldest)).delete()
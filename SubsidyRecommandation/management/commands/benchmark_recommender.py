@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from SubsidyRecommandation.benchmark import DEFAULT_SIZES, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark the subsidy recommender offline against a fake chat model and synthetic catalogues."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Catalogue sizes to benchmark.")
+        parser.add_argument("--runs", type=int, default=20, help="Synthetic farmer profiles per catalogue size.")
+        parser.add_argument("--latency", type=float, default=0.05, help="Mean fake LLM latency in seconds.")
+        parser.add_argument("--jitter", type=float, default=0.5, help="Latency jitter as a fraction of --latency.")
+        parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of fake LLM calls that raise (timeouts, 429s and 503s).")
+        parser.add_argument("--permanent-share", type=float, default=0.0, help="Share of those failures that are permanent 400s instead.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--max-concurrency", type=int, default=None)
+        parser.add_argument("--score-batch-size", type=int, default=None)
+        parser.add_argument("--node-deadline", type=float, default=None)
+        parser.add_argument("--no-index", action="store_true", help="Score every eligible subsidy instead of the vector index shortlist.")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        recommender_options = {
+            name: options[name]
+            for name in ["max_concurrency", "score_batch_size", "node_deadline"]
+            if options[name] is not None
+        }
+        report = run_benchmark(
+            sizes=options["sizes"],
+            runs=options["runs"],
+            latency=options["latency"],
+            jitter=options["jitter"],
+            failure_rate=options["failure_rate"],
+            permanent_share=options["permanent_share"],
+            seed=options["seed"],
+            use_index=not options["no_index"],
+            **recommender_options,
+        )
+        output = json.dumps(report, indent=2)
+
+        if not options["output"]:
+            self.stdout.write(output)
+            return
+
+        path = Path(options["output"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(output + "\n")
+        for result in report["results"]:
+            self.stdout.write(
+                f"{result['catalogue_size']:>5} subsidies: p50 {result['total_ms'].get('p50')}ms, "
+                f"p95 {result['total_ms'].get('p95')}ms, p99 {result['total_ms'].get('p99')}ms, "
+                f"{result['llm_calls']['total']} LLM calls, {result['llm_calls']['retries']} retries, "
+                f"{result['llm_calls']['short_circuited']} short-circuited"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Benchmark written to {path}"))
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from SubsidyRecommandation.benchmark import cache_key_hit_rate
+
+
+class Command(BaseCommand):
+    help = "Report recommendation cache hit rates of the raw and the canonical profile cache keys on synthetic traffic."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Synthetic requests to replay.")
+        parser.add_argument("--farmers", type=int, default=100, help="Distinct farmer profiles behind the requests.")
+        parser.add_argument("--respelled", type=float, default=0.5, help="Share of requests that spell the profile differently.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a summary.")
+
+    def handle(self, *args, **options):
+        report = cache_key_hit_rate(
+            requests=options["requests"], farmers=options["farmers"], respelled=options["respelled"], seed=options["seed"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{report['requests']} requests from {report['farmers']} farmers, {report['respelled']:.0%} respelled, "
+                          f"best possible hit rate {report['best_possible_hit_rate']:.1%}")
+        for name in ["raw", "canonical"]:
+            result = report[name]
+            self.stdout.write(f"{name:>9} key: {result['hit_rate']:.1%} hit rate, {result['distinct_keys']} distinct keys")
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from SubsidyRecommandation.cohorts import active_cohorts, store_result
+from SubsidyRecommandation.registry import get_recommender
+from SubsidyRecommandation.views import load_subsidies
+
+
+class Command(BaseCommand):
+    help = "Precompute recommendations for recently active farmer profile cohorts. Meant to run nightly, off-peak."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Cohorts requested within this many days (RECOMMENDER_COHORT_ACTIVE_DAYS).")
+        parser.add_argument("--min-requests", type=int, default=1, help="Skip cohorts requested fewer times than this.")
+        parser.add_argument("--limit", type=int, default=None, help="Only the N most requested cohorts.")
+        parser.add_argument("--only-cold", action="store_true", help="Skip cohorts that already have a result.")
+
+    def handle(self, *args, **options):
+        cohorts = active_cohorts(days=options["days"], min_requests=options["min_requests"], limit=options["limit"])
+        if options["only_cold"]:
+            cohorts = [cohort for cohort in cohorts if cohort.result is None]
+
+        subsidies = load_subsidies()
+        if not subsidies:
+            self.stdout.write(self.style.WARNING("No subsidies in the catalogue, nothing to precompute."))
+            return
+
+        recommender = get_recommender()
+        computed = skipped = failed = 0
+        start = time.time()
+
+        for cohort in cohorts:
+            started_at = timezone.now()
+            try:
+                # the recommender annotates subsidies in place, so every cohort gets its own copies
+                result = recommender.recommend_subsidies(cohort.farmer_profile, [dict(subsidy) for subsidy in subsidies])
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"Cohort {cohort}: {e}")
+                continue
+
+            if store_result(cohort, result, started_at):
+                computed += 1
+            else:
+                skipped += 1  # the catalogue changed mid-run, the next run recomputes it
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Precomputed {computed} of {len(cohorts)} cohorts in {time.time() - start:.1f}s "
+            f"({skipped} invalidated during the run, {failed} failed)."
+        ))
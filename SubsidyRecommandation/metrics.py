@@ -0,0 +1,165 @@
+"""
+Recommender instrumentation.
+
+Every graph node and LLM call is logged on the "SubsidyRecommandation.metrics"
+logger (configured in back/settings.py LOGGING) and recorded in an in-process
+MetricsRegistry. The registry keeps a rolling window of samples per metric and
+label set, so recommender_metrics can report recent p50/p95/p99 per worker.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict
+
+from django.conf import settings
+
+from .resilience import CircuitOpenError
+
+logger = logging.getLogger("SubsidyRecommandation.metrics")
+
+PERCENTILES = [50, 95, 99]
+
+
+def metric_name(name: str, labels: Dict[str, Any]) -> str:
+    """Flat name with sorted labels, e.g. llm_call_ms{kind=score,outcome=ok}."""
+    if not labels:
+        return name
+    return f"{name}{{{','.join(f'{key}={value}' for key, value in sorted(labels.items()))}}}"
+
+
+class RollingHistogram:
+    """Samples from the last window seconds, capped at max_samples."""
+
+    def __init__(self, window: float, max_samples: int):
+        self.window = window
+        self.samples = deque(maxlen=max_samples)  # (timestamp, value)
+
+    def observe(self, value: float, now: float) -> None:
+        self.samples.append((now, value))
+
+    def summary(self, now: float) -> Dict[str, float]:
+        while self.samples and self.samples[0][0] < now - self.window:
+            self.samples.popleft()
+        values = sorted(value for _, value in self.samples)
+        if not values:
+            return {"count": 0}
+
+        summary = {"count": len(values), "mean": round(sum(values) / len(values), 2), "max": round(values[-1], 2)}
+        for p in PERCENTILES:
+            # nearest-rank percentile
+            summary[f"p{p}"] = round(values[max(0, math.ceil(p / 100 * len(values)) - 1)], 2)
+        return summary
+
+
+class MetricsRegistry:
+    """Thread-safe counters and rolling histograms, keyed by metric name and labels."""
+
+    def __init__(self, window: float = None, max_samples: int = None):
+        self.window = window or getattr(settings, "RECOMMENDER_METRICS_WINDOW", 900)
+        self.max_samples = max_samples or getattr(settings, "RECOMMENDER_METRICS_MAX_SAMPLES", 2000)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters = defaultdict(int)
+            self._histograms = {}
+
+    def increment(self, name: str, amount: int = 1, **labels) -> None:
+        with self._lock:
+            self._counters[metric_name(name, labels)] += amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = metric_name(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = RollingHistogram(self.window, self.max_samples)
+            histogram.observe(value, time.monotonic())
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "window_seconds": self.window,
+                "counters": dict(sorted(self._counters.items())),
+                "histograms": {key: histogram.summary(now) for key, histogram in sorted(self._histograms.items())},
+            }
+
+
+metrics = MetricsRegistry()
+
+
+# ---------------------- recording helpers ---------------------- #
+def record_node(node: str, duration: float, error: BaseException = None, **details) -> None:
+    outcome = "error" if error else "ok"
+    metrics.observe("node_ms", duration * 1000, node=node)
+    metrics.increment("node_runs", node=node, outcome=outcome)
+    logger.info(
+        "node=%s duration_ms=%.1f outcome=%s %s", node, duration * 1000, outcome,
+        " ".join(f"{key}={value}" for key, value in details.items()),
+        extra={"node": node, "duration_ms": duration * 1000, "outcome": outcome, **details},
+    )
+
+
+def record_llm_call(kind: str, duration: float, response: Any = None, error: BaseException = None, retries: int = 0) -> None:
+    """One model call, including its retries. outcome is ok, error, timeout, or short_circuited when the breaker was open."""
+    if error is None:
+        outcome = "ok"
+    elif isinstance(error, CircuitOpenError):
+        outcome = "short_circuited"
+    elif isinstance(error, (TimeoutError, asyncio.CancelledError)):
+        outcome = "timeout"
+    else:
+        outcome = "error"
+
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+    metrics.observe("llm_call_ms", duration * 1000, kind=kind)
+    metrics.increment("llm_calls", kind=kind, outcome=outcome)
+    if retries:
+        metrics.increment("llm_retries", retries, kind=kind)
+    if usage:
+        metrics.increment("llm_prompt_tokens", prompt_tokens, kind=kind)
+        metrics.increment("llm_completion_tokens", completion_tokens, kind=kind)
+        metrics.observe("llm_tokens", prompt_tokens + completion_tokens, kind=kind)
+
+    log = logger.warning if outcome == "error" else logger.debug
+    log(
+        "llm_call kind=%s duration_ms=%.1f outcome=%s prompt_tokens=%s completion_tokens=%s retries=%s%s",
+        kind, duration * 1000, outcome, prompt_tokens, completion_tokens, retries,
+        f" error={error!r}" if outcome == "error" else "",
+        extra={"kind": kind, "duration_ms": duration * 1000, "outcome": outcome, "prompt_tokens": prompt_tokens,
+               "completion_tokens": completion_tokens, "retries": retries},
+    )
+
+
+def record_degraded(node: str, subsidies: int) -> None:
+    """The circuit breaker is open and the node decided without the model."""
+    metrics.increment("degraded_subsidies", subsidies, node=node)
+    logger.warning("node=%s degraded=true subsidies=%s", node, subsidies, extra={"node": node, "degraded": True, "subsidies": subsidies})
+
+
+def record_budget_exhausted(node: str, subsidies: int) -> None:
+    """The request's latency budget ran out and the node decided without the model."""
+    metrics.increment("budget_exhausted_subsidies", subsidies, node=node)
+    logger.info("node=%s budget_exhausted=true subsidies=%s", node, subsidies, extra={"node": node, "budget_exhausted": True, "subsidies": subsidies})
+
+
+def record_cache(kind: str, hits: int, misses: int) -> None:
+    metrics.increment("decision_cache_hits", hits, kind=kind)
+    metrics.increment("decision_cache_misses", misses, kind=kind)
+
+
+def record_run(duration: float, subsidies: int, recommended: int) -> None:
+    metrics.observe("recommendation_ms", duration * 1000)
+    logger.info(
+        "recommendation duration_ms=%.1f subsidies=%s recommended=%s", duration * 1000, subsidies, recommended,
+        extra={"duration_ms": duration * 1000, "subsidies": subsidies, "recommended": recommended},
+    )
+
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:34
+
+import SubsidyRecommandation.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SubsidyRecommandation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(editable=False, max_length=26, unique=True)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('stage', models.CharField(blank=True, max_length=50)),
+                ('farmer_profile', models.JSONField(default=dict)),
+                ('total_subsidies', models.PositiveIntegerField(default=0)),
+                ('eligible_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('scored_count', models.PositiveIntegerField(default=0)),
+                ('partial_results', models.JSONField(blank=True, default=list)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(db_index=True, default=SubsidyRecommandation.models.job_expiry)),
+            ],
+        ),
+    ]
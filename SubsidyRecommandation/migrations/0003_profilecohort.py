@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('SubsidyRecommandation', '0002_recommendationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileCohort',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('state', models.CharField(blank=True, max_length=100)),
+                ('farmer_type', models.CharField(blank=True, max_length=50)),
+                ('crop_type', models.CharField(blank=True, max_length=100)),
+                ('land_band', models.CharField(max_length=10)),
+                ('income_band', models.CharField(max_length=10)),
+                ('farmer_profile', models.JSONField(default=dict)),
+                ('request_count', models.PositiveIntegerField(default=0)),
+                ('last_requested_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('invalidated_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
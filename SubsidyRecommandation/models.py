@@ -0,0 +1,95 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+import ulid
+
+
+class LLMDecision(models.Model):
+    """One cached eligibility or score answer from the model, for a subsidy revision and a profile bucket."""
+    KIND_CHOICES = [
+        ("eligibility", "Eligibility"),
+        ("score", "Score"),
+    ]
+
+    key = models.CharField(max_length=64, unique=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    subsidy_id = models.BigIntegerField(db_index=True)
+    value = models.JSONField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.kind} for subsidy {self.subsidy_id}"
+
+
+def job_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, "RECOMMENDER_JOB_TTL", 3600))
+
+
+class RecommendationJob(models.Model):
+    """A recommendation run executed by the background job pool (see jobs.py)."""
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    job_id = models.CharField(max_length=26, unique=True, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    stage = models.CharField(max_length=50, blank=True)
+
+    farmer_profile = models.JSONField(default=dict)
+    total_subsidies = models.PositiveIntegerField(default=0)
+    eligible_count = models.PositiveIntegerField(null=True, blank=True)
+    scored_count = models.PositiveIntegerField(default=0)
+    partial_results = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(default=job_expiry, db_index=True)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.job_id:
+            self.job_id = str(ulid.new())
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Recommendation job {self.job_id} ({self.status})"
+
+
+class ProfileCohort(models.Model):
+    """Farmers sharing a recommendation profile bucket, with rankings precomputed off-peak (see cohorts.py)."""
+    key = models.CharField(max_length=64, unique=True)
+    state = models.CharField(max_length=100, blank=True)
+    farmer_type = models.CharField(max_length=50, blank=True)
+    crop_type = models.CharField(max_length=100, blank=True)
+    land_band = models.CharField(max_length=10)
+    income_band = models.CharField(max_length=10)
+
+    # most recent profile submitted for the cohort, the one the nightly run recommends for
+    farmer_profile = models.JSONField(default=dict)
+    request_count = models.PositiveIntegerField(default=0)
+    last_requested_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    result = models.JSONField(null=True, blank=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+    invalidated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.state} / {self.farmer_type} / {self.crop_type} (land {self.land_band}, income {self.income_band})"
+
+
+class CatalogueGeneration(models.Model):
+    """Named counter bumped on every Subsidy (or rating) write, embedded in cache keys and ETags (see catalogue.py)."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} generation {self.value}"
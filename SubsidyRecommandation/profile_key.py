@@ -0,0 +1,71 @@
+"""
+Canonical farmer profiles for the recommendation cache key.
+
+The same farmer arrives spelled many ways: "Gujarat" or "gujarat ", "5",
+"5.0" or "5 acres" of land, "1,50,000" or "1.5 lakh" income, water sources
+in any order. canonical_profile() reduces these to one form, so
+profile_cache_key() gives equivalent requests the same key and they hit the
+cached result instead of paying for a new run.
+
+Numbers are parsed with eligibility_rules.to_number (lakh, crore and hectare
+aware, land in acres) and only their formatting is normalised: the value
+itself is kept, so farmers either side of an eligibility threshold never
+share a key. Text is lower-cased with whitespace, hyphens and underscores
+collapsed, list fields are deduplicated and sorted, and empty values are
+dropped so a missing field and an empty one are the same profile.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, List
+
+from .eligibility_rules import to_number
+
+# rupees of income, acres of land
+NUMERIC_FIELDS = {"income", "land_size"}
+LIST_FIELDS = {"water_sources", "past_subsidies"}
+
+_SEPARATORS_RE = re.compile(r"[\s_\-]+")
+
+
+def canonical_text(value: Any) -> str:
+    return _SEPARATORS_RE.sub(" ", str(value if value is not None else "")).strip(" .,;").lower()
+
+
+def canonical_number(value: Any) -> Any:
+    number = to_number(value)
+    if number is None:
+        return canonical_text(value)
+    # 5, "5.0" and the float noise of "1.37 lakh" format alike; 10 significant digits keep real values apart
+    return f"{number:.10g}"
+
+
+def canonical_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple, set)):
+        value = [value]
+    return sorted({canonical_text(item) for item in value if canonical_text(item)})
+
+
+def canonical_profile(farmer_profile: Dict[str, Any]) -> Dict[str, Any]:
+    canonical = {}
+    for field, value in farmer_profile.items():
+        if field in NUMERIC_FIELDS:
+            value = canonical_number(value)
+        elif field in LIST_FIELDS or isinstance(value, (list, tuple, set)):
+            value = canonical_list(value)
+        else:
+            value = canonical_text(value)
+        if value not in ("", []):
+            canonical[field] = value
+    return canonical
+
+
+def profile_cache_key(farmer_profile: Dict[str, Any], generation: int) -> str:
+    cache_key_data = {
+        'farmer_profile': canonical_profile(farmer_profile),
+        'catalogue_generation': generation,
+    }
+    return f"subsidy_rec_{hashlib.md5(json.dumps(cache_key_data, sort_keys=True).encode()).hexdigest()}"
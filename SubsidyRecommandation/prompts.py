@@ -0,0 +1,129 @@
+"""
+Compact, token-budgeted prompts for SubsidyRecommander.
+
+Prompts are written as indented triple-quoted templates for readability, and
+compact() strips that indentation before sending. The farmer profile is
+rendered once per prompt, without empty or repeated values, and eligibility
+rules are rendered as short text rather than raw JSON. Descriptions (and
+the titles of eligibility prompts) are shortened, whole sentences first, so
+each prompt stays within RECOMMENDER_PROMPT_TOKEN_BUDGET. Eligibility criteria
+are never cut, since a verdict on partial criteria would be cached as if it
+were whole: a prompt they push over the budget is sent as it is and counted
+as prompt_over_budget. Estimated tokens per prompt are recorded in the
+metrics.
+
+Token counts are estimates (about 4 characters per token), good enough for
+budgeting and trends, not for billing.
+"""
+
+import os
+import re
+from typing import Any, Dict, List
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from .metrics import metrics
+
+CHARS_PER_TOKEN = 4
+# a description is never cut below this, however many subsidies share the prompt
+MIN_PART_TOKENS = 15
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+_SPACES_RE = re.compile(r"[ \t]+")
+_NUMBER_RE = re.compile(r"[\d,.]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def compact(text: str) -> str:
+    """Drop indentation, trailing spaces, repeated spaces and blank lines."""
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in text.strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def shorten(text: str, max_tokens: int) -> str:
+    """Fit text into max_tokens, keeping whole leading sentences when it can, cutting at a word otherwise."""
+    text = " ".join(str(text or "").split())
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    kept = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        candidate = f"{kept} {sentence}".strip()
+        if len(candidate) > max_chars:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    return text[:max_chars - 1].rsplit(" ", 1)[0] + "…"
+
+
+def _values(value: Any) -> List[str]:
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [" ".join(str(item).split()) for item in values if item not in (None, "") and str(item).strip()]
+
+
+def profile_summary(farmer_profile: Dict[str, Any], fields: Dict[str, str]) -> str:
+    """One line of `label: value` for the given fields, skipping empty values and values already given."""
+    seen = set()
+    parts = []
+    for field, label in fields.items():
+        values = []
+        for value in _values(farmer_profile.get(field)):
+            # numbers are only repeated by coincidence (2 acres, 2 lakh), text is repeated text (district == state)
+            if value.lower() in seen:
+                continue
+            if not _NUMBER_RE.fullmatch(value):
+                seen.add(value.lower())
+            values.append(value)
+        if values:
+            parts.append(f"{label}: {', '.join(values)}")
+    return "; ".join(parts)
+
+
+def _rule_text(key: str, value: Any) -> str:
+    if isinstance(value, dict):
+        low, high = value.get("min"), value.get("max")
+        if low is not None and high is not None:
+            return f"{key} {low}-{high}"
+        return f"{key} {'≥' if low is not None else '≤'} {low if low is not None else high}"
+    return f"{key}: {', '.join(_values(value))}"
+
+
+def eligibility_text(eligibility: Any) -> str:
+    """Structured rules and free-text criteria as one short line instead of raw JSON."""
+    items = eligibility if isinstance(eligibility, list) else [eligibility]
+    parts = []
+    for item in items:
+        if isinstance(item, dict):
+            parts.extend(_rule_text(key, value) for key, value in item.items() if value not in (None, "", []))
+        elif item not in (None, ""):
+            parts.append(" ".join(str(item).split()))
+    return "; ".join(dict.fromkeys(parts)) or "none stated"
+
+
+class PromptBuilder:
+    """Turns templates into chat messages within a per-call token budget."""
+
+    def __init__(self, token_budget: int = None):
+        self.token_budget = token_budget or int(os.getenv("RECOMMENDER_PROMPT_TOKEN_BUDGET", "600"))
+
+    def part_budget(self, system: str, fixed: str, parts: int = 1) -> int:
+        """Tokens each of `parts` variable texts may use so that system + fixed + parts fit the budget."""
+        remaining = self.token_budget - estimate_tokens(system) - estimate_tokens(compact(fixed))
+        return max(MIN_PART_TOKENS, remaining // max(parts, 1))
+
+    def messages(self, kind: str, system: str, user: str) -> List[Any]:
+        user = compact(user)
+        tokens = estimate_tokens(system) + estimate_tokens(user)
+        metrics.observe("prompt_tokens_estimated", tokens, kind=kind)
+        if tokens > self.token_budget:
+            metrics.increment("prompt_over_budget", kind=kind)
+        return [SystemMessage(content=system), HumanMessage(content=user)]
+
+    @staticmethod
+    def estimated_tokens(messages: List[Any]) -> int:
+        return sum(estimate_tokens(message.content) for message in messages)
@@ -0,0 +1,100 @@
+"""
+Process-wide SubsidyRecommander registry.
+
+Building a recommender creates the ChatGroq client (and its HTTP connection
+pools) and compiles the LangGraph, so views share one instance per process
+instead of paying for that on every request. The recommender keeps no
+per-request state, so one instance serves all of gunicorn's threads. It is
+rebuilt when SUBSIDY_RECOMMENDER_MODEL, SUBSIDY_RECOMMENDER_ROUTES or
+SUBSIDY_RECOMMENDER_ROUTER change, or on reload_recommender().
+
+SUBSIDY_RECOMMENDER_MODEL configures the default model, which scores.
+SUBSIDY_RECOMMENDER_ROUTES overrides it per kind of call, by default a small
+model with a tiny completion limit answers the yes/no eligibility checks.
+"""
+
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from langchain_groq import ChatGroq
+
+from .SubsidyRecommander import SubsidyRecommander
+from .llm_cache import DecisionCache
+from .semantic_index import get_subsidy_index
+
+DEFAULT_MODEL_CONFIG = {
+    "MODEL": "openai/gpt-oss-120b",
+    "TEMPERATURE": 0.3,
+    "MAX_TOKENS": 1500,
+    "TIMEOUT": 30,
+}
+
+# per kind of call (eligibility, score, batch_score), merged over the default model config
+DEFAULT_ROUTES = {
+    "eligibility": {"MODEL": "llama-3.1-8b-instant", "TEMPERATURE": 0, "MAX_TOKENS": 100, "TIMEOUT": 10},
+}
+DEFAULT_ROUTER = "SubsidyRecommandation.routing.ModelRouter"
+
+_lock = threading.Lock()
+_current = None  # (config, recommender), swapped as one reference so readers never see a mismatched pair
+
+
+def model_config():
+    return {**DEFAULT_MODEL_CONFIG, **getattr(settings, "SUBSIDY_RECOMMENDER_MODEL", {})}
+
+
+def route_configs(default):
+    """Full model config per routed kind of call. A route set to None (or {}) uses the default model."""
+    routes = {**DEFAULT_ROUTES, **getattr(settings, "SUBSIDY_RECOMMENDER_ROUTES", {})}
+    return {kind: {**default, **overrides} for kind, overrides in routes.items() if overrides}
+
+
+def recommender_config():
+    default = model_config()
+    return {
+        "default": default,
+        "routes": route_configs(default),
+        "router": getattr(settings, "SUBSIDY_RECOMMENDER_ROUTER", DEFAULT_ROUTER),
+    }
+
+
+def build_model(config) -> ChatGroq:
+    return ChatGroq(
+        model=config["MODEL"],
+        temperature=config["TEMPERATURE"],
+        max_tokens=config["MAX_TOKENS"],
+        timeout=config["TIMEOUT"],
+        max_retries=0,  # SubsidyRecommander retries with jitter and a circuit breaker itself
+    )
+
+
+def build_recommender(config) -> SubsidyRecommander:
+    default = config["default"]
+    # routes with the default config share its client
+    routed = {kind: build_model(route) for kind, route in config["routes"].items() if route != default}
+    model = build_model(default)
+    router = import_string(config["router"])(default=model, models=routed)
+    return SubsidyRecommander(model=model, router=router, decision_cache=DecisionCache(), retriever=get_subsidy_index(),
+                              call_timeout=default["TIMEOUT"])
+
+
+def get_recommender() -> SubsidyRecommander:
+    global _current
+    config = recommender_config()
+
+    current = _current
+    if current is not None and current[0] == config:
+        return current[1]
+
+    with _lock:
+        if _current is None or _current[0] != config:
+            _current = (config, build_recommender(config))
+        return _current[1]
+
+
+def reload_recommender() -> SubsidyRecommander:
+    global _current
+    with _lock:
+        _current = None
+    return get_recommender()
@@ -0,0 +1,111 @@
+"""
+Failure handling around the chat model.
+
+AdaptiveTimeout sizes each call's timeout from recently observed latency,
+CircuitBreaker stops calling the model after repeated failures and lets a
+single probe call through once reset_timeout has passed, and backoff_delay
+spaces retries with full jitter so retrying workers do not stampede Groq.
+Only is_transient() errors are retried and counted against the model: a bad
+API key or a malformed request fails the same way every time.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import groq
+import httpx
+
+TRANSIENT_ERRORS = (TimeoutError, asyncio.TimeoutError, ConnectionError, groq.APIConnectionError, httpx.TransportError)
+
+
+class CircuitOpenError(Exception):
+    """The breaker is open, the call was not attempted."""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff for the given retry (0 for the first retry)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_transient(error: Exception) -> bool:
+    """Timeouts, connection errors and 429 or 5xx answers, which a later attempt may get past."""
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+class AdaptiveTimeout:
+    """Smoothed latency plus four deviations, like a TCP retransmission timer, clamped to [minimum, maximum]."""
+
+    def __init__(self, minimum: float, maximum: float):
+        self.minimum = minimum
+        self.maximum = maximum
+        self._lock = threading.Lock()
+        self._mean = None
+        self._deviation = 0.0
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            if self._mean is None:
+                self._mean, self._deviation = latency, latency / 2
+            else:
+                self._deviation = 0.75 * self._deviation + 0.25 * abs(self._mean - latency)
+                self._mean = 0.875 * self._mean + 0.125 * latency
+
+    def current(self) -> float:
+        with self._lock:
+            if self._mean is None:
+                return self.maximum
+            return max(self.minimum, min(self.maximum, self._mean + 4 * self._deviation))
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures, half-opens for one probe after reset_timeout seconds."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self.clock() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at >= self.reset_timeout and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._probing = False
+
+    def abandon(self) -> None:
+        """The call was cancelled before the model answered, so it says nothing about the model's health."""
+        with self._lock:
+            self._probing = False
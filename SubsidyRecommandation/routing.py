@@ -0,0 +1,29 @@
+"""
+Per-call model routing for SubsidyRecommander.
+
+Eligibility checks only answer yes or no, so they don't need the large scoring
+model: a router hands each kind of call (eligibility, score, batch_score) its
+own chat model, and the recommender asks the router instead of holding one
+model. registry.py builds the models from SUBSIDY_RECOMMENDER_MODEL (the
+default, used for scoring) and SUBSIDY_RECOMMENDER_ROUTES (per-kind overrides),
+and the router class from SUBSIDY_RECOMMENDER_ROUTER, so a project can plug in
+its own routing, e.g. by catalogue size or time of day.
+"""
+
+from typing import Any, Dict
+
+
+class ModelRouter:
+    """Routes each kind of call to its model, falling back to the default model."""
+
+    def __init__(self, default: Any, models: Dict[str, Any] = None):
+        self.default = default
+        self.models = dict(models or {})
+
+    def model_for(self, kind: str) -> Any:
+        return self.models.get(kind, self.default)
+
+
+def model_name(model: Any) -> str:
+    """The model a chat client talks to (ChatGroq's model_name), or its class name for clients without one."""
+    return getattr(model, "model_name", None) or type(model).__name__
@@ -0,0 +1,194 @@
+"""
+Local vector index over subsidies, used to shortlist what the LLM scores.
+
+Each subsidy (title, description, eligibility) is stored as one row of a NumPy
+matrix saved to RECOMMENDER_INDEX_PATH. Rows are hashed log term frequencies,
+weighted by IDF at query time, unless RECOMMENDER_EMBEDDING_FUNCTION names a
+CPU embedding callable (list of texts -> 2D array), in which case its vectors
+are stored as-is. Subsidy saves and deletes update the file incrementally
+(see signals.py); other workers reload it when its mtime changes.
+"""
+
+import json
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, fall back to the in-process lock only
+    fcntl = None
+
+DIMENSIONS = 1024
+TFIDF_KIND = "tfidf"
+
+TOKEN_RE = re.compile(r"\w+")
+STOP_WORDS = {"the", "and", "for", "with", "from", "this", "that", "are", "all", "any", "per", "of", "to", "in", "or", "a", "an", "is", "on", "by", "be"}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def hashed_term_frequencies(text: str) -> np.ndarray:
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for token in tokenize(text):
+        vector[zlib.crc32(token.encode()) % DIMENSIONS] += 1
+    return np.log1p(vector)
+
+
+def subsidy_text(subsidy: Dict[str, Any]) -> str:
+    eligibility = subsidy.get("eligibility_criteria", subsidy.get("eligibility")) or []
+    # title twice so it weighs more than a long description
+    return " ".join([subsidy.get("title") or "", subsidy.get("title") or "", subsidy.get("description") or "",
+                     json.dumps(eligibility, ensure_ascii=False)])
+
+
+def profile_text(farmer_profile: Dict[str, Any]) -> str:
+    parts = []
+    for field in ["farmer_type", "crop_type", "season", "soil_type", "water_sources", "state", "district", "rainfall_region", "temperature_zone"]:
+        value = farmer_profile.get(field)
+        parts.extend(value if isinstance(value, (list, tuple)) else [value or ""])
+    return " ".join(str(part) for part in parts)
+
+
+class SubsidyIndex:
+
+    def __init__(self, path, embedding_function=None):
+        self.path = Path(path)
+        self.embedding_function = embedding_function
+        self.kind = getattr(embedding_function, "__qualname__", "embedding") if embedding_function else TFIDF_KIND
+        # re-entrant: nearest() upserts missing rows inside its own critical section
+        self._lock = threading.RLock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = np.empty((0, DIMENSIONS), dtype=np.float32)
+        self._rows = {}
+        self._mtime = None
+
+    # ---------------------- storage ---------------------- #
+    @contextmanager
+    def _file_lock(self):
+        """Serialise read-modify-write across gunicorn workers."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _set(self, ids: np.ndarray, matrix: np.ndarray) -> None:
+        self._ids = ids
+        self._matrix = matrix
+        self._rows = {int(subsidy_id): row for row, subsidy_id in enumerate(ids)}
+
+    def _load_if_changed(self) -> None:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        with np.load(self.path) as data:
+            # an index built with another vectorizer is unusable, it gets rebuilt row by row
+            if str(data["kind"]) == self.kind:
+                self._set(data["ids"], data["matrix"])
+        self._mtime = mtime
+
+    def _save(self) -> None:
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, ids=self._ids, matrix=self._matrix, kind=np.array(self.kind))
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    # ---------------------- updates ---------------------- #
+    def _vectorize(self, texts: List[str]) -> np.ndarray:
+        if self.embedding_function is not None:
+            return np.asarray(self.embedding_function(texts), dtype=np.float32)
+        return np.vstack([hashed_term_frequencies(text) for text in texts])
+
+    def upsert(self, subsidies: List[Dict[str, Any]]) -> None:
+        if not subsidies:
+            return
+        vectors = self._vectorize([subsidy_text(subsidy) for subsidy in subsidies])
+        with self._lock, self._file_lock():
+            self._load_if_changed()
+            ids, matrix = self._ids, self._matrix
+            if matrix.shape[1:] != vectors.shape[1:]:
+                ids, matrix = np.empty(0, dtype=np.int64), np.empty((0,) + vectors.shape[1:], dtype=np.float32)
+
+            rows = {int(subsidy_id): row for row, subsidy_id in enumerate(ids)}
+            new_ids, new_vectors = [], []
+            for subsidy, vector in zip(subsidies, vectors):
+                row = rows.get(int(subsidy["id"]))
+                if row is None:
+                    new_ids.append(int(subsidy["id"]))
+                    new_vectors.append(vector)
+                else:
+                    matrix[row] = vector
+            if new_ids:
+                ids = np.concatenate([ids, np.array(new_ids, dtype=np.int64)])
+                matrix = np.vstack([matrix, np.vstack(new_vectors)])
+
+            self._set(ids, matrix)
+            self._save()
+
+    def remove(self, subsidy_ids: List[int]) -> None:
+        with self._lock, self._file_lock():
+            self._load_if_changed()
+            keep = ~np.isin(self._ids, np.array(subsidy_ids, dtype=np.int64))
+            self._set(self._ids[keep], self._matrix[keep])
+            self._save()
+
+    # ---------------------- queries ---------------------- #
+    def nearest(self, farmer_profile: Dict[str, Any], subsidies: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """The k subsidies most similar to the profile, in their original order."""
+        if len(subsidies) <= k:
+            return subsidies
+
+        # one critical section, so a concurrent remove() can't drop a row between the upsert and the lookup
+        with self._lock:
+            self._load_if_changed()
+            missing = [subsidy for subsidy in subsidies if int(subsidy["id"]) not in self._rows]
+            if missing:
+                self.upsert(missing)
+
+            rows = np.array([self._rows[int(subsidy["id"])] for subsidy in subsidies])
+            candidates = self._matrix[rows]
+            query = self._vectorize([profile_text(farmer_profile)])[0]
+            if self.embedding_function is None:
+                document_frequency = np.count_nonzero(self._matrix, axis=0)
+                idf = np.log((1 + len(self._matrix)) / (1 + document_frequency)) + 1
+                candidates = candidates * idf
+                query = query * idf
+
+        norms = np.linalg.norm(candidates, axis=1) * (np.linalg.norm(query) or 1.0)
+        similarity = candidates @ query / np.where(norms == 0, 1.0, norms)
+        top = set(np.argsort(-similarity, kind="stable")[:k].tolist())
+        return [subsidy for position, subsidy in enumerate(subsidies) if position in top]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_subsidy_index() -> SubsidyIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            path = getattr(settings, "RECOMMENDER_INDEX_PATH", Path(settings.BASE_DIR) / "var" / "subsidy_index.npz")
+            function_path = getattr(settings, "RECOMMENDER_EMBEDDING_FUNCTION", None)
+            _index = SubsidyIndex(path, import_string(function_path) if function_path else None)
+    return _index
@@ -0,0 +1,54 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from app.models import Subsidy
+from .catalogue import bump_catalogue_generation
+from .cohorts import invalidate_all
+from .semantic_index import get_subsidy_index
+
+logger = logging.getLogger(__name__)
+
+INDEXED_FIELDS = {"title", "description", "eligibility"}
+# saving only these keeps the cached catalogue and rankings, the pre-ranker can use a rating that is a few hours old
+UNRANKED_FIELDS = {"rating", "rating_sum", "rating_count"}
+
+
+def _update_index(action, *args):
+    # the index is only a shortlist aid, a failed update must never fail the subsidy write
+    try:
+        getattr(get_subsidy_index(), action)(*args)
+    except Exception:
+        logger.exception("Subsidy index %s failed", action)
+
+
+@receiver(post_save, sender=Subsidy)
+def index_subsidy(sender, instance, update_fields=None, **kwargs):
+    # saving only the rating fields doesn't change the indexed text (ratings themselves update them without a save)
+    if update_fields and not INDEXED_FIELDS & set(update_fields):
+        return
+    subsidy = {
+        "id": instance.pk,
+        "title": instance.title,
+        "description": instance.description,
+        "eligibility_criteria": instance.eligibility,
+    }
+    transaction.on_commit(lambda: _update_index("upsert", [subsidy]))
+
+
+@receiver(post_delete, sender=Subsidy)
+def unindex_subsidy(sender, instance, **kwargs):
+    subsidy_id = instance.pk
+    transaction.on_commit(lambda: _update_index("remove", [subsidy_id]))
+
+
+@receiver(post_save, sender=Subsidy)
+@receiver(post_delete, sender=Subsidy)
+def catalogue_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= UNRANKED_FIELDS:
+        return
+    # after commit, so no worker can cache the old catalogue under the new generation
+    transaction.on_commit(bump_catalogue_generation)
+    transaction.on_commit(invalidate_all)
@@ -0,0 +1,202 @@
+"""
+Unit tests for SubsidyRecommander._call_model retries, the circuit breaker fallback and eligibility parsing.
+"""
+
+import asyncio
+import json
+import re
+import pytest
+from types import SimpleNamespace
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.resilience import CircuitBreaker
+from SubsidyRecommandation.routing import ModelRouter
+
+
+class FlakyModel:
+    """Fails the first `failures` calls, then scores every subsidy 70."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("groq unavailable")
+        return SimpleNamespace(content=json.dumps({"score": 70, "reasoning": "r", "key_benefits": []}))
+
+
+class BadKeyModel:
+    """Fails every call like Groq does with an invalid API key."""
+
+    status_code = 401
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        error = PermissionError("invalid api key")
+        error.status_code = self.status_code
+        raise error
+
+
+class SlowModel:
+    """Scores every subsidy it is asked about 70 after a short wait, so concurrent calls overlap."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        ids = re.findall(r"- id (\d+):", messages[-1].content)
+        if not ids:
+            return SimpleNamespace(content=json.dumps({"score": 70, "reasoning": "r", "key_benefits": []}))
+        return SimpleNamespace(content=json.dumps([{"id": int(i), "score": 70, "reasoning": "r", "key_benefits": []} for i in ids]))
+
+
+class EligibleModel:
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content=json.dumps({"eligible": True, "reason": "ok"}))
+
+
+FARMER_PROFILE = {"income": 100000, "land_size": 2, "farmer_type": "small", "crop_type": "wheat", "state": "Gujarat"}
+
+SUBSIDIES = [
+    {"id": 1, "title": "Wheat seed support", "description": "Seeds for wheat farmers", "amount": 1.0, "eligibility_criteria": [{"states": ["Gujarat"]}]},
+    {"id": 2, "title": "Tractor loan", "description": "Tractors", "amount": 1.0, "eligibility_criteria": ["Must own land"]},
+]
+
+
+def make_state(subsidies):
+    return {"farmer_profile": FARMER_PROFILE, "all_subsidies": subsidies, "eligible_subsidies": subsidies, "shortlisted_subsidies": subsidies}
+
+
+class TestCallModel:
+
+    @pytest.mark.happy_path
+    def test_transient_failure_is_retried(self, monkeypatch):
+        monkeypatch.setenv("RECOMMENDER_RETRY_BASE_DELAY", "0.01")
+        model = FlakyModel(failures=1)
+        recommender = SubsidyRecommander(model=model, score_batch_size=1, max_retries=2)
+
+        state = recommender._score_subsidies(make_state([dict(SUBSIDIES[0])]))
+
+        assert model.calls == 2
+        assert state["scored_subsidies"][0]["score"] == 70
+
+    @pytest.mark.edge_case
+    def test_open_breaker_skips_model_and_uses_rule_scores(self):
+        model = FlakyModel(failures=0)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        recommender = SubsidyRecommander(model=model, score_batch_size=1, breaker=breaker)
+
+        state = recommender._score_subsidies(make_state([dict(s) for s in SUBSIDIES]))
+
+        assert model.calls == 0
+        assert [s["id"] for s in state["scored_subsidies"]] == [1, 2]
+        # crop, rules passed, region and an open application window, no rating or recent opening
+        assert state["scored_subsidies"][0]["score"] == 85
+        assert state["scored_subsidies"][0]["scored_by"] == "heuristic"
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("score_batch_size", [1, 2])
+    def test_half_open_breaker_rule_scores_the_refused_calls(self, score_batch_size):
+        model = SlowModel()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        recommender = SubsidyRecommander(model=model, score_batch_size=score_batch_size, breaker=breaker)
+        subsidies = [dict(SUBSIDIES[0], id=i) for i in range(1, 6)]
+
+        state = recommender._score_subsidies(make_state(subsidies))
+
+        # only the probe reaches the model, every other subsidy is still returned
+        assert model.calls == 1
+        assert sorted(s["id"] for s in state["scored_subsidies"]) == [1, 2, 3, 4, 5]
+        scored_by = [s["scored_by"] for s in state["scored_subsidies"]]
+        assert scored_by.count("llm") == score_batch_size
+        assert scored_by.count("heuristic") == 5 - score_batch_size
+        assert breaker.state == "closed"
+
+    @pytest.mark.edge_case
+    def test_open_breaker_keeps_undecided_subsidies(self):
+        model = FlakyModel(failures=0)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        recommender = SubsidyRecommander(model=model, breaker=breaker)
+
+        state = recommender._filter_eligibility(make_state([dict(s) for s in SUBSIDIES]))
+
+        assert model.calls == 0
+        assert [s["id"] for s in state["eligible_subsidies"]] == [1, 2]
+
+    @pytest.mark.edge_case
+    def test_permanent_errors_are_not_retried_or_counted(self):
+        model = BadKeyModel()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        recommender = SubsidyRecommander(model=model, score_batch_size=1, max_retries=2, breaker=breaker)
+
+        state = recommender._score_subsidies(make_state([dict(s) for s in SUBSIDIES]))
+
+        # one attempt per subsidy, and other users keep reaching the model
+        assert model.calls == 2
+        assert state["scored_subsidies"] == []
+        assert breaker.state == "closed"
+
+    @pytest.mark.edge_case
+    def test_failures_open_the_breaker(self):
+        model = FlakyModel(failures=100)
+        recommender = SubsidyRecommander(model=model, score_batch_size=1, max_retries=0,
+                                         breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+        recommender._score_subsidies(make_state([dict(s) for s in SUBSIDIES] + [dict(SUBSIDIES[0], id=3)]))
+
+        assert recommender.degraded
+
+    @pytest.mark.edge_case
+    def test_worst_case_covers_every_model_node(self):
+        recommender = SubsidyRecommander(model=FlakyModel(0), node_deadline=40, call_timeout=30, max_retries=2)
+
+        # eligibility and scoring may each use their whole deadline, whatever the retries add up to
+        assert recommender.worst_case_seconds() == 2 * 40 + 30
+
+
+class TestParseEligibility:
+
+    @pytest.mark.happy_path
+    @pytest.mark.parametrize("content, expected", [
+        ('{"eligible": true}', True),
+        ('{"eligible": "false"}', False),
+        ('```json\n{"eligible": false, "reason": "r"}\n```', False),
+    ])
+    def test_verdicts(self, content, expected):
+        assert SubsidyRecommander._parse_eligibility(content) is expected
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("content", ["not json", '["eligible"]', '{"reason": "unsure"}', '{"eligible": "maybe"}'])
+    def test_unreadable_answers_are_none(self, content):
+        assert SubsidyRecommander._parse_eligibility(content) is None
+
+
+class TestModelRouting:
+
+    @pytest.mark.happy_path
+    def test_eligibility_and_scoring_calls_go_to_their_routed_models(self):
+        scorer, checker = FlakyModel(failures=0), EligibleModel()
+        recommender = SubsidyRecommander(model=scorer, score_batch_size=1, router=ModelRouter(default=scorer, models={"eligibility": checker}))
+
+        result = recommender.recommend_subsidies(FARMER_PROFILE, [dict(s) for s in SUBSIDIES])
+
+        # only the free-text subsidy needs a model eligibility check
+        assert checker.calls == 1
+        assert scorer.calls == 2
+        assert [item["relevance_score"] for item in result["recommended_subsidies"]] == [70, 70]
+        assert recommender._timeout_for(checker) is not recommender.call_timeout
@@ -0,0 +1,96 @@
+"""
+Unit tests for SubsidyRecommander._filter_eligibility.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from types import SimpleNamespace
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+
+
+class StubChatModel:
+    """Answers eligibility prompts from a {title: eligible} map, optionally slowly."""
+
+    def __init__(self, answers, delay=0.0, slow_titles=()):
+        self.answers = answers
+        self.delay = delay
+        self.slow_titles = slow_titles
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        prompt = messages[-1].content
+        title = next(t for t in self.answers if f"Subsidy: {t}" in prompt)
+        await asyncio.sleep(5 if title in self.slow_titles else self.delay)
+        return SimpleNamespace(content=json.dumps({"eligible": self.answers[title], "reason": "stub"}))
+
+
+def make_state(subsidies):
+    return {
+        "farmer_profile": {"income": 100000, "land_size": 2, "farmer_type": "small", "crop_type": "wheat", "state": "Gujarat"},
+        "all_subsidies": subsidies,
+    }
+
+
+class TestFilterEligibility:
+
+    @pytest.mark.happy_path
+    def test_keeps_only_eligible_subsidies(self):
+        model = StubChatModel({"A": True, "B": False})
+        recommender = SubsidyRecommander(model=model)
+        subsidies = [
+            {"id": 1, "title": "A", "eligibility_criteria": ["small farmers"]},
+            {"id": 2, "title": "B", "eligibility_criteria": ["large farmers"]},
+            {"id": 3, "title": "C", "eligibility_criteria": []},
+        ]
+
+        state = recommender._filter_eligibility(make_state(subsidies))
+
+        assert [s["id"] for s in state["eligible_subsidies"]] == [1, 3]
+        assert model.calls == 2
+
+    @pytest.mark.happy_path
+    def test_calls_run_concurrently(self):
+        answers = {f"S{i}": True for i in range(10)}
+        model = StubChatModel(answers, delay=0.2)
+        recommender = SubsidyRecommander(model=model, max_concurrency=10)
+        subsidies = [{"id": i, "title": f"S{i}", "eligibility_criteria": ["x"]} for i in range(10)]
+
+        start = time.time()
+        state = recommender._filter_eligibility(make_state(subsidies))
+
+        assert len(state["eligible_subsidies"]) == 10
+        assert time.time() - start < 1.0
+
+    @pytest.mark.edge_case
+    def test_timed_out_checks_keep_subsidy(self):
+        model = StubChatModel({"A": False, "B": False}, slow_titles=("B",))
+        recommender = SubsidyRecommander(model=model, node_deadline=0.3)
+        subsidies = [
+            {"id": 1, "title": "A", "eligibility_criteria": ["x"]},
+            {"id": 2, "title": "B", "eligibility_criteria": ["x"]},
+        ]
+
+        start = time.time()
+        state = recommender._filter_eligibility(make_state(subsidies))
+
+        assert [s["id"] for s in state["eligible_subsidies"]] == [2]
+        assert time.time() - start < 2.0
+
+    @pytest.mark.happy_path
+    def test_structured_rules_skip_the_model(self):
+        model = StubChatModel({"C": True})
+        recommender = SubsidyRecommander(model=model)
+        subsidies = [
+            {"id": 1, "title": "A", "eligibility_criteria": {"income": {"max": 50000}}},
+            {"id": 2, "title": "B", "eligibility_criteria": {"states": ["gujarat"]}},
+            {"id": 3, "title": "C", "eligibility_criteria": [{"states": ["gujarat"]}, "Owns a tractor"]},
+        ]
+
+        state = recommender._filter_eligibility(make_state(subsidies))
+
+        assert [s["id"] for s in state["eligible_subsidies"]] == [2, 3]
+        assert model.calls == 1
@@ -0,0 +1,90 @@
+"""
+Unit tests for the batched scoring mode of SubsidyRecommander._score_subsidies.
+"""
+
+import json
+import re
+import pytest
+from types import SimpleNamespace
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+
+
+class BatchStubChatModel:
+    """Answers batch prompts with a JSON array and single prompts with one object. malformed=True breaks batch replies,
+    fenced=True wraps every reply in a Markdown code fence."""
+
+    def __init__(self, malformed=False, fenced=False):
+        self.malformed = malformed
+        self.fenced = fenced
+        self.batch_calls = 0
+        self.single_calls = 0
+
+    def reply(self, answer):
+        content = json.dumps(answer)
+        return SimpleNamespace(content=f"```json\n{content}\n```" if self.fenced else content)
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        if "JSON array" in prompt:
+            self.batch_calls += 1
+            if self.malformed:
+                return SimpleNamespace(content="Here are your scores: [oops")
+            ids = [int(i) for i in re.findall(r"- id (\d+):", prompt)]
+            return self.reply([{"id": i, "score": 10 * i, "reasoning": "batch", "key_benefits": []} for i in ids])
+        self.single_calls += 1
+        return self.reply({"score": 1, "reasoning": "single", "key_benefits": []})
+
+
+def make_state(count):
+    return {
+        "farmer_profile": {"income": 100000, "land_size": 2, "farmer_type": "small", "crop_type": "wheat", "state": "Gujarat"},
+        "shortlisted_subsidies": [{"id": i, "title": f"S{i}", "description": "d", "amount": 1000} for i in range(1, count + 1)],
+    }
+
+
+class TestScoreInBatches:
+
+    @pytest.mark.happy_path
+    def test_packs_subsidies_into_batches(self):
+        model = BatchStubChatModel()
+        recommender = SubsidyRecommander(model=model, score_batch_size=4)
+
+        state = recommender._score_subsidies(make_state(10))
+
+        assert model.batch_calls == 3
+        assert model.single_calls == 0
+        assert [s["id"] for s in state["scored_subsidies"]] == list(range(10, 0, -1))
+        assert state["scored_subsidies"][0]["scoring_reasoning"] == "batch"
+
+    @pytest.mark.edge_case
+    def test_malformed_array_falls_back_to_per_item_calls(self):
+        model = BatchStubChatModel(malformed=True)
+        recommender = SubsidyRecommander(model=model, score_batch_size=5)
+
+        state = recommender._score_subsidies(make_state(5))
+
+        assert model.batch_calls == 1
+        assert model.single_calls == 5
+        assert {s["scoring_reasoning"] for s in state["scored_subsidies"]} == {"single"}
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("score_batch_size, reasoning", [(5, "batch"), (1, "single")])
+    def test_fenced_answers_are_read(self, score_batch_size, reasoning):
+        model = BatchStubChatModel(fenced=True)
+        recommender = SubsidyRecommander(model=model, score_batch_size=score_batch_size)
+
+        state = recommender._score_subsidies(make_state(5))
+
+        assert model.batch_calls + model.single_calls == 5 // score_batch_size
+        assert len(state["scored_subsidies"]) == 5
+        assert {s["scoring_reasoning"] for s in state["scored_subsidies"]} == {reasoning}
+
+    @pytest.mark.edge_case
+    def test_parse_batch_scores_keys_by_str_id(self):
+        recommender = SubsidyRecommander(model=BatchStubChatModel(), score_batch_size=5)
+
+        results = recommender._parse_batch_scores(json.dumps([{"id": "2", "score": 50}]))
+
+        assert results == {"2": {"id": "2", "score": 50}}
+        assert recommender._parse_batch_scores(json.dumps({"id": 2})) is None
@@ -0,0 +1,63 @@
+"""
+Unit tests for SubsidyRecommander._score_subsidies.
+"""
+
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+
+
+class StubChatModel:
+    """Scores subsidies from a {title: score} map. Titles mapped to None fail, titles in slow_titles hang."""
+
+    def __init__(self, scores, slow_titles=()):
+        self.scores = scores
+        self.slow_titles = slow_titles
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        title = next(t for t in self.scores if f"Subsidy: {t} -" in prompt)
+        if title in self.slow_titles:
+            await asyncio.sleep(5)
+        if self.scores[title] is None:
+            raise RuntimeError("upstream error")
+        return SimpleNamespace(content=json.dumps({"score": self.scores[title], "reasoning": "stub", "key_benefits": ["b"]}))
+
+
+def make_state(titles):
+    return {
+        "farmer_profile": {"income": 100000, "land_size": 2, "farmer_type": "small", "crop_type": "wheat", "state": "Gujarat"},
+        "shortlisted_subsidies": [{"id": i, "title": t, "description": "d", "amount": 1000} for i, t in enumerate(titles)],
+    }
+
+
+class TestScoreSubsidies:
+
+    @pytest.mark.happy_path
+    def test_sorts_by_score(self):
+        recommender = SubsidyRecommander(model=StubChatModel({"A": 40, "B": 90, "C": 70}), score_batch_size=1)
+
+        state = recommender._score_subsidies(make_state(["A", "B", "C"]))
+
+        assert [s["title"] for s in state["scored_subsidies"]] == ["B", "C", "A"]
+        assert state["scored_subsidies"][0]["key_benefits"] == ["b"]
+
+    @pytest.mark.edge_case
+    def test_failed_calls_are_skipped(self):
+        recommender = SubsidyRecommander(model=StubChatModel({"A": 40, "B": None}), score_batch_size=1)
+
+        state = recommender._score_subsidies(make_state(["A", "B"]))
+
+        assert [s["title"] for s in state["scored_subsidies"]] == ["A"]
+
+    @pytest.mark.edge_case
+    def test_returns_partial_results_on_deadline(self):
+        model = StubChatModel({"A": 40, "B": 90}, slow_titles=("B",))
+        recommender = SubsidyRecommander(model=model, node_deadline=0.3, score_batch_size=1)
+
+        state = recommender._score_subsidies(make_state(["A", "B"]))
+
+        assert [s["title"] for s in state["scored_subsidies"]] == ["A"]
@@ -0,0 +1,115 @@
+"""
+Unit tests for SubsidyRecommander.recommend_subsidies with a max_ms latency budget, and the endpoint's max_ms parameter.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+
+from app.models import Subsidy
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.catalogue import catalogue_generation
+from SubsidyRecommandation.metrics import metrics
+from SubsidyRecommandation.views import build_farmer_profile, recommend_subsidies, recommendation_cache_key
+
+
+class SlowModel:
+    """Answers every call after `latency` seconds: eligible, score 70."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if "eligibility" in messages[0].content:
+            return SimpleNamespace(content=json.dumps({"eligible": True, "reason": "ok"}))
+        return SimpleNamespace(content=json.dumps({"score": 70, "reasoning": "r", "key_benefits": []}))
+
+
+FARMER_PROFILE = {"income": "100000", "farmer_type": "small", "land_size": "2", "crop_type": "wheat", "state": "Gujarat"}
+
+SUBSIDIES = [
+    {"id": 1, "title": "Wheat seed support", "description": "Seeds for wheat farmers", "amount": 1.0, "rating": 4,
+     "eligibility_criteria": ["Must own land"]},
+    {"id": 2, "title": "Tractor loan", "description": "Tractors", "amount": 1.0, "rating": 0, "eligibility_criteria": []},
+]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    metrics.reset()
+    yield
+    cache.clear()
+
+
+class TestLatencyBudget:
+
+    @pytest.mark.happy_path
+    def test_without_budget_everything_is_scored_by_the_model(self):
+        recommender = SubsidyRecommander(model=SlowModel(0.01), score_batch_size=1)
+
+        result = recommender.recommend_subsidies(FARMER_PROFILE, [dict(s) for s in SUBSIDIES])
+
+        assert {item["scored_by"] for item in result["recommended_subsidies"]} == {"llm"}
+        assert result["heuristic_scored"] == 0
+
+    @pytest.mark.happy_path
+    def test_short_budget_answers_in_time_with_heuristic_scores(self):
+        recommender = SubsidyRecommander(model=SlowModel(2), score_batch_size=1)
+
+        start = time.monotonic()
+        result = recommender.recommend_subsidies(FARMER_PROFILE, [dict(s) for s in SUBSIDIES], max_ms=300)
+
+        assert time.monotonic() - start < 1
+        assert [item["subsidy_id"] for item in result["recommended_subsidies"]] == [1, 2]
+        assert {item["scored_by"] for item in result["recommended_subsidies"]} == {"heuristic"}
+        assert result["heuristic_scored"] == 2
+        assert metrics.snapshot()["counters"]["budget_exhausted_subsidies{node=score_subsidies}"] == 2
+
+    @pytest.mark.edge_case
+    def test_budget_below_the_reserve_skips_the_model(self):
+        model = SlowModel(0)
+        recommender = SubsidyRecommander(model=model, score_batch_size=1)
+
+        result = recommender.recommend_subsidies(FARMER_PROFILE, [dict(s) for s in SUBSIDIES], max_ms=50)
+
+        assert model.calls == 0
+        assert result["total_recommended"] == 2
+        assert result["heuristic_scored"] == 2
+
+
+@pytest.mark.django_db
+class TestMaxMsParameter:
+
+    def post(self, data, query=""):
+        request = APIRequestFactory().post(f"/api/subsidy-recommendations/recommend/{query}", data, format="json")
+        return recommend_subsidies(request)
+
+    @pytest.mark.edge_case
+    def test_invalid_max_ms_is_rejected(self):
+        response = self.post(FARMER_PROFILE, "?max_ms=fast")
+
+        assert response.status_code == 400
+        assert "max_ms" in response.data["error"]
+
+    @pytest.mark.happy_path
+    def test_heuristic_result_is_returned_but_not_cached(self):
+        Subsidy.objects.create(title="Wheat seed", description="Seeds", amount=100, application_start_date=date.today(),
+                               eligibility=["Must own land"])
+
+        with patch("SubsidyRecommandation.views.get_recommender", return_value=SubsidyRecommander(model=SlowModel(2), score_batch_size=1)):
+            response = self.post(dict(FARMER_PROFILE, max_ms=300))
+
+        assert response.status_code == 200
+        assert response.data["heuristic_scored"] == 1
+        assert response.data["recommendations"][0]["scored_by"] == "heuristic"
+        assert cache.get(recommendation_cache_key(build_farmer_profile(FARMER_PROFILE), catalogue_generation())) is None
@@ -0,0 +1,55 @@
+"""
+Unit tests for SubsidyRecommander.stream_recommendations.
+"""
+
+import asyncio
+import json
+import time
+import pytest
+from types import SimpleNamespace
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+
+
+class DelayedChatModel:
+    """Scores every subsidy with the length of its title after delays[title] seconds."""
+
+    def __init__(self, delays):
+        self.delays = delays
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        title = next(t for t in self.delays if f"Subsidy: {t} -" in prompt)
+        await asyncio.sleep(self.delays[title])
+        return SimpleNamespace(content=json.dumps({"score": len(title), "reasoning": title, "key_benefits": []}))
+
+
+SUBSIDIES = [
+    {"id": 1, "title": "Fast", "description": "d", "amount": 100.0, "eligibility_criteria": []},
+    {"id": 2, "title": "Slowest", "description": "d", "amount": 200.0, "eligibility_criteria": []},
+]
+
+
+class TestStreamRecommendations:
+
+    @pytest.mark.happy_path
+    def test_event_order(self):
+        recommender = SubsidyRecommander(model=DelayedChatModel({"Fast": 0, "Slowest": 0}), score_batch_size=1)
+
+        events = list(recommender.stream_recommendations({}, [dict(s) for s in SUBSIDIES]))
+
+        assert events[0] == ("eligibility", {"eligible_count": 2})
+        assert sorted(payload["subsidy_id"] for event, payload in events if event == "scored") == [1, 2]
+        assert events[-1][0] == "final"
+        assert [r["subsidy_id"] for r in events[-1][1]["recommended_subsidies"]] == [2, 1]
+
+    @pytest.mark.happy_path
+    def test_scored_events_arrive_before_node_finishes(self):
+        recommender = SubsidyRecommander(model=DelayedChatModel({"Fast": 0, "Slowest": 0.6}), score_batch_size=1)
+        start = time.time()
+
+        for event, payload in recommender.stream_recommendations({}, [dict(s) for s in SUBSIDIES]):
+            if event == "scored":
+                assert payload["subsidy_id"] == 1
+                assert time.time() - start < 0.5
+                break
@@ -0,0 +1,85 @@
+"""
+Unit tests for the offline recommender benchmark.
+"""
+
+import asyncio
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from SubsidyRecommandation.benchmark import FakeChatModel, generate_subsidies, run_benchmark
+from SubsidyRecommandation.resilience import is_transient
+
+
+class TestFakeChatModel:
+
+    @pytest.mark.happy_path
+    def test_same_prompt_same_answer(self):
+        messages = [SystemMessage(content="You are a subsidy scorer."), HumanMessage(content="Subsidy: Seed scheme - d")]
+
+        first = asyncio.run(FakeChatModel(seed=3).ainvoke(messages))
+        second = asyncio.run(FakeChatModel(seed=3).ainvoke(messages))
+
+        assert first.content == second.content
+        assert first.usage_metadata["input_tokens"] > 0
+
+    @pytest.mark.edge_case
+    def test_failure_rate_one_always_raises_transient_errors(self):
+        model = FakeChatModel(failure_rate=1.0)
+        messages = [SystemMessage(content="You are an eligibility checker."), HumanMessage(content="x")]
+
+        for _ in range(5):
+            with pytest.raises(Exception) as raised:
+                asyncio.run(model.ainvoke(messages))
+            assert is_transient(raised.value)
+        assert model.stats()["failures"] == 5
+
+    @pytest.mark.edge_case
+    def test_permanent_share_raises_permanent_errors(self):
+        model = FakeChatModel(failure_rate=1.0, permanent_share=1.0)
+        messages = [SystemMessage(content="You are an eligibility checker."), HumanMessage(content="x")]
+
+        with pytest.raises(Exception) as raised:
+            asyncio.run(model.ainvoke(messages))
+        assert raised.value.status_code == 400
+        assert not is_transient(raised.value)
+
+    @pytest.mark.edge_case
+    def test_retried_prompt_draws_a_new_failure(self):
+        model = FakeChatModel(failure_rate=0.5, seed=1)
+        messages = [SystemMessage(content="You are an eligibility checker."), HumanMessage(content="x")]
+
+        outcomes = set()
+        for _ in range(20):
+            try:
+                asyncio.run(model.ainvoke(messages))
+                outcomes.add("ok")
+            except Exception:
+                outcomes.add("failed")
+        assert outcomes == {"ok", "failed"}
+
+
+class TestRunBenchmark:
+
+    @pytest.mark.happy_path
+    def test_report_shape(self):
+        report = run_benchmark(sizes=[10, 40], runs=3, latency=0, jitter=0, failure_rate=0)
+
+        assert [result["catalogue_size"] for result in report["results"]] == [10, 40]
+        result = report["results"][1]
+        assert set(result["total_ms"]) == {"p50", "p95", "p99", "mean"}
+        assert "score_subsidies" in result["node_ms"]
+        assert result["llm_calls"]["total"] > 0
+        assert result["tokens"]["prompt"] > 0
+
+    @pytest.mark.edge_case
+    def test_transient_failures_are_retried_and_reported(self):
+        report = run_benchmark(sizes=[20], runs=2, latency=0, jitter=0, failure_rate=0.3)
+
+        llm_calls = report["results"][0]["llm_calls"]
+        assert llm_calls["failed"] > 0
+        assert llm_calls["retries"] > 0
+        assert "short_circuited" in llm_calls
+
+    @pytest.mark.edge_case
+    def test_catalogue_is_deterministic(self):
+        assert generate_subsidies(20, seed=1) == generate_subsidies(20, seed=1)
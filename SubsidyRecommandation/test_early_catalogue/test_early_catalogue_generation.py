@@ -0,0 +1,88 @@
+"""
+Unit tests for the catalogue generation and the caches keyed on it.
+"""
+
+import pytest
+from django.core.cache import cache
+
+from app.models import Subsidy
+from SubsidyRecommandation.catalogue import bump_catalogue_generation, catalogue_generation
+from SubsidyRecommandation.models import CatalogueGeneration
+from SubsidyRecommandation.views import load_subsidies, recommendation_cache_key
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestCatalogueGeneration:
+
+    @pytest.mark.happy_path
+    def test_bump_increments(self):
+        assert catalogue_generation() == 0
+
+        bump_catalogue_generation()
+        bump_catalogue_generation()
+
+        assert catalogue_generation() == 2
+
+    @pytest.mark.happy_path
+    def test_subsidy_writes_bump_after_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            subsidy = Subsidy.objects.create(title="Seed", description="d", amount=1)
+        created = catalogue_generation()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            subsidy.delete()
+
+        assert created == 1
+        assert catalogue_generation() == 2
+
+    @pytest.mark.edge_case
+    def test_rating_only_save_keeps_generation(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            subsidy = Subsidy.objects.create(title="Seed", description="d", amount=1)
+            subsidy.rating = 3
+            subsidy.save(update_fields=["rating"])
+
+        assert catalogue_generation() == 1
+
+    @pytest.mark.edge_case
+    def test_racing_first_bumps_both_count(self, monkeypatch):
+        get_or_create = CatalogueGeneration.objects.get_or_create
+
+        def lose_the_race(**kwargs):
+            # the other worker's first bump creates the row between our update and our create
+            get_or_create(**kwargs)
+            return get_or_create(**kwargs)
+
+        monkeypatch.setattr(CatalogueGeneration.objects, "get_or_create", lose_the_race)
+        bump_catalogue_generation()
+
+        assert catalogue_generation() == 2
+
+
+@pytest.mark.django_db
+class TestLoadSubsidies:
+
+    @pytest.mark.happy_path
+    def test_new_subsidy_is_visible_despite_cached_catalogue(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            Subsidy.objects.create(title="Seed", description="d", amount=1)
+        assert [s["title"] for s in load_subsidies()] == ["Seed"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Subsidy.objects.create(title="Tractor", description="d", amount=1)
+
+        assert sorted(s["title"] for s in load_subsidies()) == ["Seed", "Tractor"]
+
+    @pytest.mark.edge_case
+    def test_recommendation_key_changes_with_generation(self):
+        profile = {"state": "Gujarat"}
+
+        assert recommendation_cache_key(profile, 1) != recommendation_cache_key(profile, 2)
+        assert recommendation_cache_key(profile, 1) == recommendation_cache_key(dict(profile), 1)
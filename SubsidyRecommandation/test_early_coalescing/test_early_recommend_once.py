@@ -0,0 +1,85 @@
+"""
+Unit tests for coalescing.recommend_once.
+"""
+
+import threading
+import time
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+
+from SubsidyRecommandation.coalescing import recommend_once
+from SubsidyRecommandation.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    metrics.reset()
+    yield
+    cache.clear()
+
+
+def run_concurrently(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestRecommendOnce:
+
+    @pytest.mark.happy_path
+    def test_identical_requests_share_one_run(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"recommended_subsidies": [{"subsidy_id": 1}]}
+
+        results = run_concurrently(5, lambda: recommend_once("subsidy_rec_same", compute))
+
+        assert len(calls) == 1
+        assert all(result == {"recommended_subsidies": [{"subsidy_id": 1}]} for result in results)
+        assert metrics.snapshot()["counters"]["coalesced_requests"] == 4
+
+    @pytest.mark.edge_case
+    def test_different_keys_run_in_parallel(self):
+        start = time.time()
+        keys = iter(["subsidy_rec_a", "subsidy_rec_b", "subsidy_rec_c"])
+        lock = threading.Lock()
+
+        def request():
+            with lock:
+                key = next(keys)
+            return recommend_once(key, lambda: time.sleep(0.3) or {"key": key})
+
+        results = run_concurrently(3, request)
+
+        assert len(results) == 3
+        assert time.time() - start < 0.8
+
+    @pytest.mark.edge_case
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "plain"}})
+    def test_plain_cache_backend_coalesces_threads(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"recommended_subsidies": []}
+
+        run_concurrently(3, lambda: recommend_once("subsidy_rec_plain", compute))
+
+        assert len(calls) == 1
+
+    @pytest.mark.edge_case
+    def test_failed_run_is_not_cached(self):
+        with pytest.raises(RuntimeError):
+            recommend_once("subsidy_rec_fail", lambda: (_ for _ in ()).throw(RuntimeError("groq down")))
+
+        assert recommend_once("subsidy_rec_fail", lambda: {"ok": True}) == {"ok": True}
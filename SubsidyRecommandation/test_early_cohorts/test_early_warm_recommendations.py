@@ -0,0 +1,134 @@
+"""
+Unit tests for cohorts.warm_recommendations, views.warm_result, cohort invalidation and precompute_cohort_recommendations.
+"""
+
+import pytest
+from datetime import date
+from unittest.mock import patch
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from app.models import Subsidy
+from SubsidyRecommandation import cohorts
+from SubsidyRecommandation.cohorts import cohort_key, flush_counts, store_result, warm_recommendations
+from SubsidyRecommandation.models import ProfileCohort
+from SubsidyRecommandation.views import warm_result
+
+
+FARMER_PROFILE = {"income": "100000", "farmer_type": "small", "land_size": "2", "crop_type": "Wheat", "state": "Gujarat"}
+RESULT = {"recommended_subsidies": [{"rank": 1, "subsidy_id": 1}], "total_recommended": 1}
+
+
+@pytest.fixture(autouse=True)
+def no_pending_counts(monkeypatch):
+    monkeypatch.setattr(cohorts, "_pending", {})
+    monkeypatch.setattr(cohorts, "_next_flush", 0.0)
+
+
+@pytest.mark.django_db
+class TestWarmRecommendations:
+
+    @pytest.mark.happy_path
+    def test_first_request_creates_cold_cohort(self):
+        assert warm_recommendations(FARMER_PROFILE) is None
+
+        cohort = ProfileCohort.objects.get()
+        assert (cohort.state, cohort.crop_type, cohort.farmer_type, cohort.request_count) == ("gujarat", "wheat", "small", 1)
+
+    @pytest.mark.happy_path
+    def test_similar_profile_gets_precomputed_result(self):
+        warm_recommendations(FARMER_PROFILE)
+        ProfileCohort.objects.update(result=RESULT, computed_at=timezone.now())
+
+        # same bands, different spelling and exact numbers
+        result = warm_recommendations(dict(FARMER_PROFILE, income="1,20,000", crop_type=" wheat ", land_size="1.5"))
+
+        assert result == RESULT
+        flush_counts()
+        assert ProfileCohort.objects.get().request_count == 2
+
+    @pytest.mark.edge_case
+    @override_settings(RECOMMENDER_COHORT_FLUSH_INTERVAL=60)
+    def test_counts_are_written_in_one_batch(self, django_assert_num_queries):
+        other = dict(FARMER_PROFILE, state="Punjab")
+        warm_recommendations(FARMER_PROFILE)
+        warm_recommendations(other)
+
+        # the first count flushes, the rest wait for the interval: each request is the cohort SELECT only
+        warm_recommendations(FARMER_PROFILE)
+        with django_assert_num_queries(3):
+            for profile in [FARMER_PROFILE, other, dict(FARMER_PROFILE, land_size="1.8")]:
+                warm_recommendations(profile)
+
+        with django_assert_num_queries(1):
+            assert flush_counts() == 2
+        counts = dict(ProfileCohort.objects.values_list("state", "request_count"))
+        assert counts == {"gujarat": 4, "punjab": 2}
+        assert ProfileCohort.objects.get(state="gujarat").farmer_profile["land_size"] == "1.8"
+
+    @pytest.mark.edge_case
+    def test_cohort_ranking_is_not_served_to_a_farmer_its_rules_rule_out(self):
+        subsidies = [{"id": 1, "title": "Anand dairy", "eligibility_criteria": {"income": {"max": 120000}, "districts": ["Anand"]}}]
+        warmed = dict(FARMER_PROFILE, income="110000", district="Anand")
+        warm_recommendations(warmed)
+        ProfileCohort.objects.update(result=RESULT, computed_at=timezone.now())
+
+        # same cohort, but over the income cap and in another district
+        assert warm_result(dict(FARMER_PROFILE, income="240000", district="Kutch"), subsidies) is None
+        assert warm_result(warmed, subsidies) == RESULT
+        assert ProfileCohort.objects.count() == 1
+
+    @pytest.mark.edge_case
+    def test_result_computed_before_invalidation_is_not_stored(self):
+        warm_recommendations(FARMER_PROFILE)
+        cohort = ProfileCohort.objects.get()
+        started_at = timezone.now()
+        ProfileCohort.objects.update(invalidated_at=timezone.now())
+
+        assert not store_result(cohort, RESULT, started_at)
+
+
+@pytest.mark.django_db
+class TestCohortInvalidation:
+
+    def warm_cohort(self):
+        warm_recommendations(FARMER_PROFILE)
+        ProfileCohort.objects.update(result=RESULT, computed_at=timezone.now())
+
+    @pytest.mark.happy_path
+    def test_subsidy_change_clears_results(self, django_capture_on_commit_callbacks):
+        self.warm_cohort()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Subsidy.objects.create(title="New", description="d", amount=1)
+
+        assert ProfileCohort.objects.get().result is None
+
+    @pytest.mark.edge_case
+    def test_rating_update_keeps_results(self, django_capture_on_commit_callbacks):
+        subsidy = Subsidy.objects.create(title="Old", description="d", amount=1)
+        self.warm_cohort()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            subsidy.rating = 4
+            subsidy.save(update_fields=["rating"])
+
+        assert ProfileCohort.objects.get().result == RESULT
+
+
+@pytest.mark.django_db
+class TestPrecomputeCommand:
+
+    @pytest.mark.happy_path
+    def test_computes_active_cohorts(self):
+        Subsidy.objects.create(title="Seed", description="d", amount=1, application_start_date=date(2026, 1, 1))
+        warm_recommendations(FARMER_PROFILE)
+
+        with patch("SubsidyRecommandation.management.commands.precompute_cohort_recommendations.get_recommender") as get_recommender:
+            get_recommender.return_value.recommend_subsidies.return_value = RESULT
+            call_command("precompute_cohort_recommendations")
+
+        get_recommender.return_value.recommend_subsidies.assert_called_once()
+        assert get_recommender.return_value.recommend_subsidies.call_args.args[0] == FARMER_PROFILE
+        assert ProfileCohort.objects.get(key=cohort_key(FARMER_PROFILE)).result == RESULT
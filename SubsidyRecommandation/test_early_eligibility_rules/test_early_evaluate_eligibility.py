@@ -0,0 +1,94 @@
+"""
+Unit tests for eligibility_rules.evaluate_eligibility.
+"""
+
+import pytest
+
+from SubsidyRecommandation.eligibility_rules import evaluate_eligibility, validate_rules
+
+
+@pytest.fixture
+def farmer_profile():
+    return {
+        "income": "1,50,000",
+        "land_size": "3",
+        "farmer_type": "Small",
+        "crop_type": "Wheat, Cotton",
+        "state": "Gujarat ",
+        "district": "Anand",
+        "season": "Rabi",
+    }
+
+
+class TestEvaluateEligibility:
+
+    @pytest.mark.happy_path
+    def test_all_rules_pass(self, farmer_profile):
+        rules = {
+            "income": {"max": 200000},
+            "land_size": {"min": 1, "max": 5},
+            "states": ["gujarat", "rajasthan"],
+            "farmer_types": ["small", "marginal"],
+            "crops": ["cotton"],
+            "seasons": ["rabi"],
+        }
+        assert evaluate_eligibility(rules, farmer_profile) is True
+
+    @pytest.mark.happy_path
+    def test_income_cap_rules_out(self, farmer_profile):
+        assert evaluate_eligibility([{"income": {"max": 100000}}], farmer_profile) is False
+
+    @pytest.mark.happy_path
+    def test_state_list_rules_out(self, farmer_profile):
+        assert evaluate_eligibility({"states": ["Punjab"]}, farmer_profile) is False
+
+    @pytest.mark.happy_path
+    def test_lakh_and_hectare_units(self, farmer_profile):
+        farmer_profile["income"] = "₹2.5 lakh"
+        farmer_profile["land_size"] = "2 hectares"
+        assert evaluate_eligibility({"income": {"max": 200000}}, farmer_profile) is False
+        assert evaluate_eligibility({"land_size": {"max": 4}}, farmer_profile) is False
+
+    # ---------------- EDGE CASES ----------------
+
+    @pytest.mark.edge_case
+    def test_free_text_is_undecided(self, farmer_profile):
+        assert evaluate_eligibility(["Must own land"], farmer_profile) is None
+        assert evaluate_eligibility(["Must own land", {"states": ["gujarat"]}], farmer_profile) is None
+
+    @pytest.mark.edge_case
+    def test_free_text_does_not_save_failed_rule(self, farmer_profile):
+        assert evaluate_eligibility({"states": ["Punjab"], "criteria": ["Must own land"]}, farmer_profile) is False
+
+    @pytest.mark.edge_case
+    def test_missing_profile_value_is_undecided(self, farmer_profile):
+        farmer_profile["income"] = ""
+        assert evaluate_eligibility({"income": {"max": 200000}}, farmer_profile) is None
+
+    @pytest.mark.edge_case
+    def test_validate_rules_rejects_malformed(self):
+        validate_rules(["free text", {"income": {"max": 100000}}])
+        with pytest.raises(ValueError):
+            validate_rules({"income": 100000})
+        with pytest.raises(ValueError):
+            validate_rules({"states": "Gujarat"})
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("eligibility", [
+        {"states": "Punjab"},
+        {"income": "below 2 lakh"},
+        {"income": {"max": "two lakh"}},
+        {"land_size": {"below": 2}},
+    ])
+    def test_malformed_known_rules_are_left_to_the_model(self, farmer_profile, eligibility):
+        # e.g. rows saved through the admin, which doesn't run validate_rules
+        assert evaluate_eligibility(eligibility, farmer_profile) is None
+        assert evaluate_eligibility([eligibility, {"states": ["Punjab"]}], farmer_profile) is False
+
+    @pytest.mark.edge_case
+    def test_unknown_keys_are_left_to_the_model(self, farmer_profile):
+        eligibility = {"income": {"max": 200000}, "caste": ["SC", "ST"], "ration_card": "BPL"}
+
+        validate_rules(eligibility)
+        assert evaluate_eligibility(eligibility, farmer_profile) is None
+        assert evaluate_eligibility({"income": {"max": 100000}, "caste": ["SC"]}, farmer_profile) is False
@@ -0,0 +1,118 @@
+"""
+Unit tests for the feature pre-ranker and how the recommender and views use it.
+"""
+
+import json
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+
+from app.models import Subsidy
+from subsidy.models import SubsidyApplication
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.feature_ranker import FeatureRanker
+from SubsidyRecommandation.views import add_applied_subsidies
+
+
+def make_subsidy(subsidy_id, title, description="", rating=0, eligibility=None):
+    return {"id": subsidy_id, "title": title, "description": description, "amount": 1000.0, "rating": rating,
+            "eligibility_criteria": eligibility or [], "application_start_date": None, "application_end_date": None}
+
+
+PROFILE = {"crop_type": "cotton", "season": "Kharif", "soil_type": "Black soil", "water_sources": ["borewell", "canal"],
+           "rainfall_region": "Low rainfall", "temperature_zone": "Hot"}
+
+
+class CountingModel:
+
+    def __init__(self):
+        self.eligibility_calls = 0
+
+    async def ainvoke(self, messages):
+        if "eligibility" in messages[0].content:
+            self.eligibility_calls += 1
+            return SimpleNamespace(content=json.dumps({"eligible": True, "reason": "ok"}))
+        return SimpleNamespace(content=json.dumps({"score": 50, "reasoning": "r", "key_benefits": []}))
+
+
+class TestFeatureRanker:
+
+    @pytest.mark.happy_path
+    def test_ranks_on_profile_fields_then_rating(self):
+        subsidies = [
+            make_subsidy(1, "Tractor loan", "Loan for tractors", rating=5),
+            make_subsidy(2, "Drip kit", "Drip irrigation for borewell users on black soil in kharif"),
+            make_subsidy(3, "Cotton seed", "Kharif cotton seed for black soil in hot, low rainfall districts"),
+        ]
+
+        ranked = FeatureRanker().rank(PROFILE, subsidies)
+
+        assert [subsidy["id"] for subsidy in ranked] == [3, 2, 1]
+
+    @pytest.mark.happy_path
+    def test_leaves_out_past_subsidies_by_id_or_title(self):
+        subsidies = [make_subsidy(1, "Tractor loan"), make_subsidy(2, "Drip kit"), make_subsidy(3, "Cotton seed")]
+
+        ranked = FeatureRanker().rank(dict(PROFILE, past_subsidies=["1", "cotton  SEED"]), subsidies)
+
+        assert [subsidy["id"] for subsidy in ranked] == [2]
+
+    @pytest.mark.edge_case
+    def test_empty_profile_keeps_catalogue_order_among_equal_ratings(self):
+        subsidies = [make_subsidy(subsidy_id, f"Scheme {subsidy_id}") for subsidy_id in range(1, 5)]
+
+        assert FeatureRanker().rank({}, subsidies) == subsidies
+        assert FeatureRanker().scores({}, []).size == 0
+
+    @pytest.mark.edge_case
+    def test_eligibility_edit_refits_the_term_matrix(self):
+        ranker = FeatureRanker()
+        subsidies = [make_subsidy(1, "Tractor loan"), make_subsidy(2, "Drip kit")]
+        assert [subsidy["id"] for subsidy in ranker.rank(PROFILE, subsidies)] == [1, 2]
+
+        subsidies[1] = make_subsidy(2, "Drip kit", eligibility=[{"crops": ["cotton"], "seasons": ["kharif"]}])
+
+        assert [subsidy["id"] for subsidy in ranker.rank(PROFILE, subsidies)] == [2, 1]
+
+
+class TestPrerankedHead:
+
+    @pytest.mark.happy_path
+    def test_only_the_preranked_head_is_checked_and_scored_by_the_model(self):
+        model = CountingModel()
+        recommender = SubsidyRecommander(model=model, score_batch_size=1)
+        recommender.prerank_size, recommender.shortlist_size = 3, 2
+        free_text = ["Applicant must hold a bank account"]
+        subsidies = [make_subsidy(subsidy_id, f"Scheme {subsidy_id}", eligibility=free_text) for subsidy_id in range(1, 9)]
+        subsidies[6]["description"] = "Kharif cotton on black soil"
+
+        result = recommender.recommend_subsidies(PROFILE, subsidies)
+
+        assert model.eligibility_calls == 3
+        assert result["recommended_subsidies"][0]["subsidy_id"] == 7
+        assert len(result["recommended_subsidies"]) == 2
+        assert result["total_recommended"] == 8
+
+
+@pytest.mark.django_db
+class TestAddAppliedSubsidies:
+
+    @pytest.mark.happy_path
+    def test_applied_subsidies_become_past_subsidies(self):
+        user = get_user_model().objects.create_user(full_name="U", email_address="farmer@example.com", password="pw")
+        subsidy = Subsidy.objects.create(title="Seed", description="d", amount=100, application_start_date=date.today())
+        SubsidyApplication.objects.create(
+            user=user, subsidy=subsidy, full_name="U", mobile="1", email="e", aadhaar="1", address="a", state="s",
+            district="d", taluka="t", village="v", land_area=1, land_unit="acre", soil_type="black", ownership="own",
+            bank_name="b", account_number="1", ifsc="i",
+        )
+
+        profile = add_applied_subsidies({"past_subsidies": "PM Kisan, "}, user)
+
+        assert profile["past_subsidies"] == sorted(["PM Kisan", str(subsidy.id)])
+
+    @pytest.mark.edge_case
+    def test_anonymous_profile_is_unchanged(self):
+        profile = {"past_subsidies": ["3"]}
+        assert add_applied_subsidies(profile, SimpleNamespace(is_authenticated=False)) == {"past_subsidies": ["3"]}
@@ -0,0 +1,127 @@
+"""
+Unit tests for jobs.run_job, jobs.submit_job and the job endpoints.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+
+from SubsidyRecommandation import jobs
+from SubsidyRecommandation.models import RecommendationJob
+from SubsidyRecommandation.views import recommendation_job_status
+
+
+FARMER_PROFILE = {"income": "100000", "farmer_type": "small", "land_size": "2", "crop_type": "wheat", "state": "Gujarat"}
+
+
+def fake_stream(farmer_profile, subsidies):
+    yield "eligibility", {"eligible_count": 2}
+    yield "scored", {"subsidy_id": 1, "relevance_score": 40}
+    yield "scored", {"subsidy_id": 2, "relevance_score": 90}
+    yield "final", {"recommended_subsidies": [{"rank": 1, "subsidy_id": 2}], "total_recommended": 2}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def keep_test_connection():
+    with patch("SubsidyRecommandation.jobs.close_old_connections"):
+        yield
+
+
+@pytest.fixture
+def recommender_mock():
+    with patch("SubsidyRecommandation.jobs.get_recommender") as get_recommender:
+        get_recommender.return_value.stream_recommendations.side_effect = fake_stream
+        get_recommender.return_value.worst_case_seconds.return_value = 5
+        yield get_recommender
+
+
+@pytest.mark.django_db
+class TestRunJob:
+
+    @pytest.mark.happy_path
+    def test_job_completes_with_result(self, recommender_mock):
+        job = RecommendationJob.objects.create(farmer_profile=FARMER_PROFILE, total_subsidies=3)
+
+        jobs.run_job(job.pk, FARMER_PROFILE, [], "rec_key")
+
+        job.refresh_from_db()
+        assert job.status == "done"
+        assert job.eligible_count == 2
+        assert job.scored_count == 2
+        assert [r["subsidy_id"] for r in job.partial_results] == [2, 1]
+        assert job.result["total_recommended"] == 2
+
+    @pytest.mark.edge_case
+    def test_duplicate_job_takes_cached_result(self, recommender_mock):
+        cache.set("rec_key", {"recommended_subsidies": [], "total_recommended": 0})
+        job = RecommendationJob.objects.create(farmer_profile=FARMER_PROFILE)
+
+        jobs.run_job(job.pk, FARMER_PROFILE, [], "rec_key")
+
+        job.refresh_from_db()
+        assert job.status == "done"
+        recommender_mock.return_value.stream_recommendations.assert_not_called()
+
+    @pytest.mark.edge_case
+    def test_failure_is_recorded(self, recommender_mock):
+        recommender_mock.return_value.stream_recommendations.side_effect = RuntimeError("groq down")
+        job = RecommendationJob.objects.create(farmer_profile=FARMER_PROFILE)
+
+        jobs.run_job(job.pk, FARMER_PROFILE, [], "rec_key")
+
+        job.refresh_from_db()
+        assert job.status == "failed"
+        assert job.error == "groq down"
+
+    @pytest.mark.happy_path
+    def test_submit_job_queues_on_executor(self):
+        executor = MagicMock()
+        with patch("SubsidyRecommandation.jobs._get_executor", return_value=executor):
+            job = jobs.submit_job(FARMER_PROFILE, [{"id": 1}], "rec_key")
+
+        assert job.status == "queued"
+        assert len(job.job_id) == 26
+        executor.submit.assert_called_once_with(jobs.run_job, job.pk, FARMER_PROFILE, [{"id": 1}], "rec_key")
+
+    @pytest.mark.edge_case
+    def test_submit_job_with_cached_result_is_done(self):
+        executor = MagicMock()
+        with patch("SubsidyRecommandation.jobs._get_executor", return_value=executor):
+            job = jobs.submit_job(FARMER_PROFILE, [], "rec_key", cached_result={"recommended_subsidies": []})
+
+        assert job.status == "done"
+        executor.submit.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestRecommendationJobStatus:
+
+    @pytest.mark.happy_path
+    def test_running_job_returns_partial_results(self):
+        job = RecommendationJob.objects.create(
+            farmer_profile=FARMER_PROFILE, status="running", stage="score_subsidies",
+            scored_count=1, partial_results=[{"rank": 1, "subsidy_id": 7}],
+        )
+        request = APIRequestFactory().get(f"/api/subsidy-recommendations/jobs/{job.job_id}/")
+
+        response = recommendation_job_status(request, job_id=job.job_id)
+
+        assert response.status_code == 200
+        assert response.data["progress"]["scored_count"] == 1
+        assert response.data["recommendations"] == [{"rank": 1, "subsidy_id": 7}]
+
+    @pytest.mark.edge_case
+    def test_unknown_job_is_404(self):
+        request = APIRequestFactory().get("/api/subsidy-recommendations/jobs/nope/")
+
+        response = recommendation_job_status(request, job_id="nope")
+
+        assert response.status_code == 404
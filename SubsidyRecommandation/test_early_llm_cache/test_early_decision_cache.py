@@ -0,0 +1,126 @@
+"""
+Unit tests for llm_cache.DecisionCache and its use by SubsidyRecommander.
+"""
+
+import json
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from django.utils import timezone
+
+from SubsidyRecommandation.llm_cache import DecisionCache, profile_bucket
+from SubsidyRecommandation.models import LLMDecision
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.routing import ModelRouter
+
+
+class CountingChatModel:
+    def __init__(self, model_name="stub"):
+        self.model_name = model_name
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        if "eligibility checker" in messages[0].content:
+            return SimpleNamespace(content=json.dumps({"eligible": True, "reason": "stub"}))
+        return SimpleNamespace(content=json.dumps({"score": 70, "reasoning": "stub", "key_benefits": ["b"]}))
+
+
+def make_profile(**overrides):
+    profile = {"income": "120000", "land_size": "3", "farmer_type": "Small", "crop_type": "Wheat", "state": "Gujarat", "district": "Anand"}
+    profile.update(overrides)
+    return profile
+
+
+SUBSIDIES = [
+    {"id": 1, "title": "Drip irrigation", "description": "d", "amount": 5000.0, "eligibility_criteria": ["Owns land"]},
+    {"id": 2, "title": "Seed kit", "description": "d", "amount": 800.0, "eligibility_criteria": []},
+]
+
+
+class TestProfileBucket:
+
+    @pytest.mark.happy_path
+    def test_near_identical_profiles_share_bucket(self):
+        assert profile_bucket(make_profile()) == profile_bucket(make_profile(income="1,40,000", land_size="4.5", state=" gujarat", district="Surat"))
+
+    @pytest.mark.edge_case
+    def test_different_band_changes_bucket(self):
+        assert profile_bucket(make_profile()) != profile_bucket(make_profile(income="300000"))
+
+    @pytest.mark.edge_case
+    def test_scores_are_bucketed_per_district(self):
+        cache = DecisionCache()
+
+        assert cache.bucket(make_profile(), "eligibility") == cache.bucket(make_profile(district="Surat"), "eligibility")
+        assert cache.bucket(make_profile(), "score") != cache.bucket(make_profile(district="Surat"), "score")
+        assert cache.bucket(make_profile(), "score") == cache.bucket(make_profile(district=" anand"), "score")
+
+
+@pytest.mark.django_db
+class TestDecisionCache:
+
+    @pytest.mark.happy_path
+    def test_set_then_get(self):
+        cache = DecisionCache()
+        cache.set_many("score", {"k1": {"subsidy_id": 1, "value": {"score": 10}}})
+
+        assert cache.get_many(["k1", "k2"]) == {"k1": {"score": 10}}
+
+    @pytest.mark.edge_case
+    def test_expired_entries_miss(self):
+        cache = DecisionCache()
+        cache.set_many("score", {"k1": {"subsidy_id": 1, "value": {"score": 10}}})
+        LLMDecision.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        assert cache.get_many(["k1"]) == {}
+
+    @pytest.mark.edge_case
+    def test_prunes_least_recently_used(self):
+        cache = DecisionCache(max_entries=2, prune_interval=0)
+        cache.set_many("score", {"old": {"subsidy_id": 1, "value": {}}})
+        LLMDecision.objects.filter(key="old").update(last_used_at=timezone.now() - timedelta(days=1))
+        cache.set_many("score", {"a": {"subsidy_id": 2, "value": {}}, "b": {"subsidy_id": 3, "value": {}}})
+
+        assert set(LLMDecision.objects.values_list("key", flat=True)) == {"a", "b"}
+
+    @pytest.mark.edge_case
+    def test_prunes_once_per_interval(self, django_assert_num_queries):
+        cache = DecisionCache(max_entries=1, prune_interval=60)
+        cache.set_many("score", {"a": {"subsidy_id": 1, "value": {}}})
+
+        # only the upsert until the interval has passed
+        with django_assert_num_queries(1):
+            cache.set_many("score", {"b": {"subsidy_id": 2, "value": {}}})
+        assert LLMDecision.objects.count() == 2
+
+        cache._next_prune = 0
+        cache.set_many("score", {"c": {"subsidy_id": 3, "value": {}}})
+        assert set(LLMDecision.objects.values_list("key", flat=True)) == {"c"}
+
+    @pytest.mark.happy_path
+    def test_recommender_reuses_decisions_across_instances(self):
+        first_model, second_model = CountingChatModel(), CountingChatModel()
+
+        SubsidyRecommander(model=first_model, decision_cache=DecisionCache()).recommend_subsidies(
+            make_profile(), [dict(s) for s in SUBSIDIES])
+        result = SubsidyRecommander(model=second_model, decision_cache=DecisionCache()).recommend_subsidies(
+            make_profile(income="110000"), [dict(s) for s in SUBSIDIES])
+
+        assert first_model.calls > 0
+        assert second_model.calls == 0
+        assert [r["subsidy_id"] for r in result["recommended_subsidies"]] == [1, 2]
+
+    @pytest.mark.edge_case
+    def test_rerouted_model_does_not_reuse_decisions(self):
+        scorer = CountingChatModel("big")
+        SubsidyRecommander(model=scorer, router=ModelRouter(scorer, {"eligibility": CountingChatModel("small")}),
+                           decision_cache=DecisionCache()).recommend_subsidies(make_profile(), [dict(s) for s in SUBSIDIES])
+
+        # the eligibility route now points at another model, the scores it didn't answer are still reused
+        scorer, checker = CountingChatModel("big"), CountingChatModel("smaller")
+        SubsidyRecommander(model=scorer, router=ModelRouter(scorer, {"eligibility": checker}),
+                           decision_cache=DecisionCache()).recommend_subsidies(make_profile(), [dict(s) for s in SUBSIDIES])
+
+        assert checker.calls == 1
+        assert scorer.calls == 0
@@ -0,0 +1,110 @@
+"""
+Unit tests for the recommender metrics registry, its instrumentation and endpoint.
+"""
+
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.metrics import MetricsRegistry, metrics
+from SubsidyRecommandation.views import recommender_metrics
+
+
+class ScoringModel:
+
+    async def ainvoke(self, messages):
+        return SimpleNamespace(
+            content=json.dumps({"score": 50, "reasoning": "r", "key_benefits": []}),
+            usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+        )
+
+
+class FailingModel:
+
+    async def ainvoke(self, messages):
+        raise RuntimeError("groq down")
+
+
+SUBSIDIES = [{"id": i, "title": f"S{i}", "description": "d", "amount": 1.0, "eligibility_criteria": []} for i in range(1, 4)]
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+
+
+class TestMetricsRegistry:
+
+    @pytest.mark.happy_path
+    def test_histogram_percentiles(self):
+        registry = MetricsRegistry(window=60, max_samples=1000)
+        for value in range(1, 101):
+            registry.observe("node_ms", value, node="score_subsidies")
+
+        summary = registry.snapshot()["histograms"]["node_ms{node=score_subsidies}"]
+
+        assert summary["count"] == 100
+        assert (summary["p50"], summary["p95"], summary["p99"], summary["max"]) == (50, 95, 99, 100)
+
+    @pytest.mark.edge_case
+    def test_samples_outside_window_are_dropped(self):
+        registry = MetricsRegistry(window=10, max_samples=1000)
+        with patch("SubsidyRecommandation.metrics.time.monotonic", return_value=0):
+            registry.observe("node_ms", 5)
+        with patch("SubsidyRecommandation.metrics.time.monotonic", return_value=100):
+            assert registry.snapshot()["histograms"]["node_ms"] == {"count": 0}
+
+
+class TestInstrumentation:
+
+    @pytest.mark.happy_path
+    def test_nodes_calls_and_tokens_are_recorded(self):
+        recommender = SubsidyRecommander(model=ScoringModel(), score_batch_size=1)
+
+        recommender.recommend_subsidies({}, [dict(s) for s in SUBSIDIES])
+
+        snapshot = metrics.snapshot()
+        assert snapshot["counters"]["llm_calls{kind=score,outcome=ok}"] == 3
+        assert snapshot["counters"]["llm_prompt_tokens{kind=score}"] == 300
+        assert snapshot["counters"]["node_runs{node=score_subsidies,outcome=ok}"] == 1
+        assert snapshot["histograms"]["recommendation_ms"]["count"] == 1
+
+    @pytest.mark.edge_case
+    def test_failed_calls_are_counted_as_errors(self):
+        recommender = SubsidyRecommander(model=FailingModel(), score_batch_size=1, max_retries=0)
+
+        recommender.recommend_subsidies({}, [dict(s) for s in SUBSIDIES])
+
+        assert metrics.snapshot()["counters"]["llm_calls{kind=score,outcome=error}"] == 3
+
+
+@pytest.mark.django_db
+class TestRecommenderMetricsView:
+
+    def request_as(self, is_staff):
+        user = get_user_model().objects.create_user(full_name="U", email_address="user@example.com", password="pw")
+        user.is_staff = is_staff
+        request = APIRequestFactory().get("/api/subsidy-recommendations/metrics/")
+        force_authenticate(request, user=user)
+        return recommender_metrics(request)
+
+    @pytest.mark.happy_path
+    def test_staff_sees_metrics(self):
+        metrics.observe("node_ms", 12, node="filter_eligibility")
+
+        response = self.request_as(is_staff=True)
+
+        assert response.status_code == 200
+        assert response.data["metrics"]["histograms"]["node_ms{node=filter_eligibility}"]["count"] == 1
+
+    @pytest.mark.edge_case
+    def test_non_staff_is_forbidden(self):
+        response = self.request_as(is_staff=False)
+
+        assert response.status_code == 403
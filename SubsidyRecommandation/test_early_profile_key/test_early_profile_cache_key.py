@@ -0,0 +1,57 @@
+"""
+Unit tests for profile_key canonicalization and the cache key hit-rate report.
+"""
+
+import pytest
+
+from SubsidyRecommandation.benchmark import cache_key_hit_rate
+from SubsidyRecommandation.profile_key import canonical_profile, profile_cache_key
+
+
+FARMER_PROFILE = {"income": "150000", "farmer_type": "small", "land_size": "5", "crop_type": "Wheat", "state": "Gujarat",
+                  "district": "Anand", "water_sources": ["canal", "borewell"], "past_subsidies": []}
+
+
+class TestProfileCacheKey:
+
+    @pytest.mark.happy_path
+    def test_equivalent_spellings_share_a_key(self):
+        respelled = dict(
+            FARMER_PROFILE, income="1.5 lakh", land_size="5.0 acres", crop_type=" wheat", state="GUJARAT ",
+            water_sources=["Borewell", "canal", "canal"], past_subsidies="",
+        )
+
+        assert profile_cache_key(respelled, 3) == profile_cache_key(FARMER_PROFILE, 3)
+
+    @pytest.mark.happy_path
+    def test_units_are_converted(self):
+        assert canonical_profile({"land_size": "2 hectares", "income": "1.37 lakh"}) == {"land_size": "4.942", "income": "137000"}
+
+    @pytest.mark.edge_case
+    def test_values_either_side_of_a_threshold_differ(self):
+        assert canonical_profile({"income": "2,50,000", "land_size": 5.0}) == {"income": "250000", "land_size": "5"}
+        assert profile_cache_key(dict(FARMER_PROFILE, income="250001"), 3) != profile_cache_key(dict(FARMER_PROFILE, income=250000), 3)
+        assert profile_cache_key(dict(FARMER_PROFILE, land_size="5.01"), 3) != profile_cache_key(FARMER_PROFILE, 3)
+
+    @pytest.mark.edge_case
+    def test_different_profiles_and_generations_differ(self):
+        key = profile_cache_key(FARMER_PROFILE, 3)
+
+        assert profile_cache_key(dict(FARMER_PROFILE, land_size="5.5"), 3) != key
+        assert profile_cache_key(dict(FARMER_PROFILE, state="Punjab"), 3) != key
+        assert profile_cache_key(FARMER_PROFILE, 4) != key
+
+    @pytest.mark.edge_case
+    def test_unparseable_numbers_are_kept_as_text(self):
+        assert canonical_profile({"land_size": "Not Sure", "season": None}) == {"land_size": "not sure"}
+
+
+class TestCacheKeyHitRate:
+
+    @pytest.mark.happy_path
+    def test_canonical_key_reaches_the_best_possible_hit_rate(self):
+        report = cache_key_hit_rate(requests=300, farmers=30, seed=1)
+
+        assert report["canonical"]["distinct_keys"] == 30
+        assert report["canonical"]["hit_rate"] == report["best_possible_hit_rate"]
+        assert report["raw"]["hit_rate"] < report["canonical"]["hit_rate"]
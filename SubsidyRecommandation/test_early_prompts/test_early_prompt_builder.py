@@ -0,0 +1,88 @@
+"""
+Unit tests for prompt compaction and token budgeting.
+"""
+
+import pytest
+
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.benchmark import generate_profiles, generate_subsidies
+from SubsidyRecommandation.metrics import metrics
+from SubsidyRecommandation.prompts import (
+    PromptBuilder, compact, eligibility_text, estimate_tokens, profile_summary, shorten,
+)
+
+
+class TestPromptText:
+
+    @pytest.mark.happy_path
+    def test_compact_strips_indentation_and_blank_lines(self):
+        assert compact("""Score this.
+                Farmer:   small
+
+                Subsidy: seed   """) == "Score this.\nFarmer: small\nSubsidy: seed"
+
+    @pytest.mark.happy_path
+    def test_shorten_keeps_whole_sentences_within_budget(self):
+        text = "First sentence is here. Second sentence is somewhat longer than the first one."
+        assert shorten(text, 8) == "First sentence is here."
+        assert shorten(text, 100) == text
+
+    @pytest.mark.edge_case
+    def test_shorten_cuts_at_a_word_when_no_sentence_fits(self):
+        shortened = shorten("one two three four five six seven eight nine ten", 4)
+        assert shortened.endswith("…")
+        assert len(shortened) <= 16
+
+    @pytest.mark.happy_path
+    def test_profile_summary_skips_empty_and_repeated_values(self):
+        profile = {"crop_type": "Wheat", "state": "Gujarat", "district": "gujarat", "land_size": "2", "income": "2", "season": ""}
+        summary = profile_summary(profile, {"crop_type": "Crop", "state": "State", "district": "District",
+                                            "land_size": "Land", "income": "Income", "season": "Season"})
+        assert summary == "Crop: Wheat; State: Gujarat; Land: 2; Income: 2"
+
+    @pytest.mark.happy_path
+    def test_eligibility_text_renders_rules_and_free_text(self):
+        text = eligibility_text([{"income": {"max": 250000}, "states": ["Gujarat", "Punjab"]}, "Must own a bank account"])
+        assert text == "income ≤ 250000; states: Gujarat, Punjab; Must own a bank account"
+        assert eligibility_text([]) == "none stated"
+
+
+class TestRecommenderPrompts:
+
+    @pytest.mark.happy_path
+    def test_batch_prompt_fits_the_token_budget(self):
+        recommender = SubsidyRecommander(model=object(), decision_cache=False)
+        recommender.prompts = PromptBuilder(token_budget=400)
+        subsidies = generate_subsidies(8, seed=1)
+        for subsidy in subsidies:
+            subsidy["description"] = subsidy["description"] * 10
+
+        messages = recommender._batch_score_prompt(generate_profiles(1)[0], subsidies)
+
+        assert PromptBuilder.estimated_tokens(messages) <= 400
+        assert all(f"- id {subsidy['id']}:" in messages[1].content for subsidy in subsidies)
+
+    @pytest.mark.happy_path
+    def test_prompts_record_estimated_tokens(self):
+        metrics.reset()
+        recommender = SubsidyRecommander(model=object(), decision_cache=False)
+        messages = recommender._eligibility_prompt(generate_profiles(1)[0], generate_subsidies(1)[0])
+
+        summary = metrics.snapshot()["histograms"]["prompt_tokens_estimated{kind=eligibility}"]
+        assert summary["count"] == 1
+        assert summary["max"] == sum(estimate_tokens(message.content) for message in messages)
+        assert "    " not in messages[1].content
+
+    @pytest.mark.edge_case
+    def test_eligibility_criteria_are_never_cut(self):
+        metrics.reset()
+        recommender = SubsidyRecommander(model=object(), decision_cache=False)
+        recommender.prompts = PromptBuilder(token_budget=200)
+        criteria = [f"Criterion {i}: the applicant must hold document number {i} issued by the district office" for i in range(40)]
+        subsidy = dict(generate_subsidies(1)[0], eligibility_criteria=criteria)
+
+        messages = recommender._eligibility_prompt(generate_profiles(1)[0], subsidy)
+
+        assert eligibility_text(criteria) in messages[1].content
+        assert "…" not in messages[1].content
+        assert metrics.snapshot()["counters"]["prompt_over_budget{kind=eligibility}"] == 1
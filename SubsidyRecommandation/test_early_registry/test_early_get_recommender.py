@@ -0,0 +1,103 @@
+"""
+Unit tests for registry.get_recommender.
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+from django.test import override_settings
+
+from SubsidyRecommandation import registry
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+from SubsidyRecommandation.routing import ModelRouter
+
+
+class ScoreEverythingRouter(ModelRouter):
+
+    def model_for(self, kind):
+        return self.default
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    registry._current = None
+    with patch("SubsidyRecommandation.registry.ChatGroq") as chat_groq:
+        yield chat_groq
+    registry._current = None
+
+
+class TestGetRecommender:
+
+    @pytest.mark.happy_path
+    def test_returns_same_instance(self, fresh_registry):
+        first = registry.get_recommender()
+        second = registry.get_recommender()
+
+        assert first is second
+        # the scoring model and the eligibility model
+        assert fresh_registry.call_count == 2
+
+    @pytest.mark.happy_path
+    def test_rebuilds_when_model_config_changes(self, fresh_registry):
+        first = registry.get_recommender()
+
+        with override_settings(SUBSIDY_RECOMMENDER_MODEL={"MODEL": "llama-3.1-8b-instant"}):
+            second = registry.get_recommender()
+
+        assert second is not first
+        assert fresh_registry.call_args.kwargs["model"] == "llama-3.1-8b-instant"
+
+    @pytest.mark.edge_case
+    def test_concurrent_first_calls_build_once(self, fresh_registry):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get_recommender())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(r) for r in results}) == 1
+        assert fresh_registry.call_count == 2
+
+    @pytest.mark.happy_path
+    def test_eligibility_is_routed_to_its_own_model(self, fresh_registry):
+        with override_settings(SUBSIDY_RECOMMENDER_ROUTES={"eligibility": {"MODEL": "small", "MAX_TOKENS": 50}}):
+            recommender = registry.get_recommender()
+
+        models = {call.kwargs["model"]: call.kwargs for call in fresh_registry.call_args_list}
+        assert models["small"]["max_tokens"] == 50
+        assert models["small"]["temperature"] == models["openai/gpt-oss-120b"]["temperature"]
+        assert set(recommender.router.models) == {"eligibility"}
+        assert recommender.router.model_for("score") is recommender.model
+
+    @pytest.mark.edge_case
+    def test_route_set_to_none_uses_the_default_model(self, fresh_registry):
+        with override_settings(SUBSIDY_RECOMMENDER_ROUTES={"eligibility": None}):
+            recommender = registry.get_recommender()
+
+        assert fresh_registry.call_count == 1
+        assert recommender.router.models == {}
+
+    @pytest.mark.edge_case
+    def test_custom_router_is_plugged_in(self, fresh_registry):
+        with override_settings(SUBSIDY_RECOMMENDER_ROUTER="SubsidyRecommandation.test_early_registry.test_early_get_recommender.ScoreEverythingRouter"):
+            recommender = registry.get_recommender()
+
+        assert isinstance(recommender.router, ScoreEverythingRouter)
+        assert recommender.router.model_for("eligibility") is recommender.model
+
+    @pytest.mark.edge_case
+    def test_bare_recommender_uses_the_configured_default_model(self, fresh_registry):
+        with override_settings(SUBSIDY_RECOMMENDER_MODEL={"MODEL": "big", "TIMEOUT": 12}):
+            recommender = SubsidyRecommander()
+
+        assert fresh_registry.call_args.kwargs["model"] == "big"
+        assert fresh_registry.call_args.kwargs["timeout"] == 12
+        assert recommender.model is fresh_registry.return_value
+        assert recommender.call_timeout.maximum == 12
+
+    @pytest.mark.edge_case
+    def test_reload_builds_new_instance(self, fresh_registry):
+        first = registry.get_recommender()
+
+        assert registry.reload_recommender() is not first
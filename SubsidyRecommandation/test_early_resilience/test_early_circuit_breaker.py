@@ -0,0 +1,87 @@
+"""
+Unit tests for resilience.CircuitBreaker and resilience.AdaptiveTimeout.
+"""
+
+import pytest
+
+from SubsidyRecommandation.resilience import AdaptiveTimeout, CircuitBreaker, backoff_delay
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    @pytest.mark.happy_path
+    def test_opens_after_threshold_and_probes_after_reset(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+
+        for _ in range(3):
+            assert breaker.allow()
+            breaker.record_failure()
+
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        clock.now = 10
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # one probe at a time
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    @pytest.mark.edge_case
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == "open"
+        clock.now = 15
+        assert not breaker.allow()
+
+    @pytest.mark.edge_case
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == "closed"
+
+
+class TestAdaptiveTimeout:
+
+    @pytest.mark.happy_path
+    def test_starts_at_maximum_then_tracks_latency(self):
+        timeout = AdaptiveTimeout(minimum=1, maximum=30)
+        assert timeout.current() == 30
+
+        for _ in range(50):
+            timeout.observe(2.0)
+
+        assert 1 <= timeout.current() < 3
+
+    @pytest.mark.edge_case
+    def test_clamped_to_minimum(self):
+        timeout = AdaptiveTimeout(minimum=5, maximum=30)
+        for _ in range(50):
+            timeout.observe(0.01)
+
+        assert timeout.current() == 5
+
+    @pytest.mark.edge_case
+    def test_backoff_is_capped(self):
+        assert all(0 <= backoff_delay(10, base=0.5, cap=2) <= 2 for _ in range(100))
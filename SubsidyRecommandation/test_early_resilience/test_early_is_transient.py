@@ -0,0 +1,41 @@
+"""
+Unit tests for resilience.is_transient.
+"""
+
+import asyncio
+
+import groq
+import httpx
+import pytest
+
+from SubsidyRecommandation.resilience import is_transient
+
+
+def status_error(status):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    return groq.APIStatusError("error", response=response, body=None)
+
+
+class TestIsTransient:
+
+    @pytest.mark.happy_path
+    @pytest.mark.parametrize("error", [
+        asyncio.TimeoutError(),
+        ConnectionError("reset"),
+        httpx.ConnectTimeout("slow"),
+        status_error(429),
+        status_error(503),
+    ])
+    def test_retryable_errors(self, error):
+        assert is_transient(error)
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("error", [
+        status_error(401),
+        status_error(400),
+        ValueError("malformed request"),
+        KeyError("model"),
+    ])
+    def test_errors_that_fail_every_time(self, error):
+        assert not is_transient(error)
@@ -0,0 +1,96 @@
+"""
+Unit tests for semantic_index.SubsidyIndex.
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from SubsidyRecommandation.semantic_index import SubsidyIndex
+from SubsidyRecommandation.SubsidyRecommander import SubsidyRecommander
+
+
+SUBSIDIES = [
+    {"id": 1, "title": "Cotton seed subsidy", "description": "Certified cotton seed for kharif sowing", "eligibility_criteria": []},
+    {"id": 2, "title": "Dairy shed grant", "description": "Cattle shed construction for dairy farmers", "eligibility_criteria": []},
+    {"id": 3, "title": "Drip irrigation", "description": "Micro irrigation for cotton and groundnut in Gujarat", "eligibility_criteria": []},
+    {"id": 4, "title": "Fishery pond", "description": "Inland fish pond excavation", "eligibility_criteria": []},
+]
+
+PROFILE = {"farmer_type": "small", "crop_type": "Cotton", "season": "kharif", "state": "Gujarat", "water_sources": ["borewell"]}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SubsidyIndex(tmp_path / "index.npz")
+
+
+class TestNearest:
+
+    @pytest.mark.happy_path
+    def test_returns_most_similar_in_original_order(self, index):
+        assert [s["id"] for s in index.nearest(PROFILE, SUBSIDIES, 2)] == [1, 3]
+
+    @pytest.mark.happy_path
+    def test_persists_and_reloads_from_disk(self, index, tmp_path):
+        index.upsert(SUBSIDIES)
+
+        reloaded = SubsidyIndex(tmp_path / "index.npz")
+        reloaded._load_if_changed()
+
+        assert sorted(reloaded._rows) == [1, 2, 3, 4]
+        assert np.array_equal(reloaded._matrix, index._matrix)
+
+    @pytest.mark.happy_path
+    def test_upsert_replaces_and_remove_drops_rows(self, index):
+        index.upsert(SUBSIDIES)
+        before = index._matrix[index._rows[4]].copy()
+        index.upsert([{"id": 4, "title": "Cotton picker", "description": "cotton harvest", "eligibility_criteria": []}])
+        index.remove([2])
+
+        assert sorted(index._rows) == [1, 3, 4]
+        assert len(index._matrix) == 3
+        assert not np.array_equal(index._matrix[index._rows[4]], before)
+
+    # ---------------- EDGE CASES ----------------
+
+    @pytest.mark.edge_case
+    def test_small_candidate_list_is_returned_untouched(self, index):
+        assert index.nearest(PROFILE, SUBSIDIES[:2], 5) == SUBSIDIES[:2]
+        assert not index.path.exists()
+
+    @pytest.mark.edge_case
+    def test_custom_embedding_function(self, tmp_path):
+        def embed(texts):
+            return [[1.0, 0.0] if "cotton" in text.lower() else [0.0, 1.0] for text in texts]
+
+        index = SubsidyIndex(tmp_path / "dense.npz", embedding_function=embed)
+
+        assert [s["id"] for s in index.nearest(PROFILE, SUBSIDIES, 2)] == [1, 3]
+
+    @pytest.mark.edge_case
+    def test_recommender_shortlists_with_retriever(self, index):
+        recommender = SubsidyRecommander(model=object(), retriever=index)
+        recommender.shortlist_size = 2
+
+        state = recommender._shortlist_subsidies({"farmer_profile": PROFILE, "eligible_subsidies": SUBSIDIES})
+
+        assert [s["id"] for s in state["shortlisted_subsidies"]] == [1, 3]
+
+    @pytest.mark.edge_case
+    def test_concurrent_remove_waits_for_nearest(self, index):
+        upsert, removals = index.upsert, []
+
+        def upsert_then_race(subsidies):
+            upsert(subsidies)
+            removal = threading.Thread(target=index.remove, args=([1],))
+            removal.start()
+            removal.join(timeout=0.2)
+            removals.append(removal)
+
+        index.upsert = upsert_then_race
+
+        assert [s["id"] for s in index.nearest(PROFILE, SUBSIDIES, 2)] == [1, 3]
+        removals[0].join()
+        assert sorted(index._rows) == [2, 3, 4]
@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import recommend_subsidies, recommendation_status
+from .views import recommend_subsidies, recommendation_status, create_recommendation_job, recommendation_job_status, stream_recommendations, recommender_metrics
 
 urlpatterns = [
     path('recommend/', recommend_subsidies, name='recommend-subsidies'),
+    path('recommend/stream/', stream_recommendations, name='recommend-subsidies-stream'),
     path('status/', recommendation_status, name='recommendation-status'),
+    path('metrics/', recommender_metrics, name='recommender-metrics'),
+    path('jobs/', create_recommendation_job, name='recommendation-job-create'),
+    path('jobs/<str:job_id>/', recommendation_job_status, name='recommendation-job-status'),
 ]
@@ -1,41 +1,169 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
 from django.views.decorators.csrf import csrf_exempt
+from django.http import StreamingHttpResponse
 from django.core.cache import cache
-from .SubsidyRecommander import SubsidyRecommander
+from django.utils import timezone
+from django.conf import settings
+from .registry import get_recommender
+from .jobs import submit_job
+from .cohorts import warm_recommendations
+from .catalogue import catalogue_generation
+from .eligibility_rules import evaluate_eligibility
+from .coalescing import RESULT_TIMEOUT, cached_or_coalesced, recommend_once, single_flight
+from .feature_ranker import is_past_subsidy, past_subsidy_keys
+from .profile_key import profile_cache_key
+from .metrics import metrics
+from .models import RecommendationJob
 from app.models import Subsidy
+from subsidy.models import SubsidyApplication
 import os
-import hashlib
 import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def build_farmer_profile(request_data):
+    return {
+        "income": request_data.get("income", ""),
+        "farmer_type": request_data.get("farmer_type", ""),
+        "land_size": request_data.get("land_size", ""),
+        "crop_type": request_data.get("crop_type", ""),
+        "season": request_data.get("season", ""),
+        "soil_type": request_data.get("soil_type", ""),
+        "water_sources": request_data.get("water_sources", []),
+        "state": request_data.get("state", ""),
+        "district": request_data.get("district", ""),
+        "rainfall_region": request_data.get("rainfall_region", ""),
+        "temperature_zone": request_data.get("temperature_zone", ""),
+        "past_subsidies": request_data.get("past_subsidies", []),
+    }
+
+
+def add_applied_subsidies(farmer_profile, user):
+    """Count the subsidies the signed-in farmer already applied for as past subsidies, so they aren't recommended again."""
+    if not getattr(user, "is_authenticated", False):
+        return farmer_profile
+    applied = SubsidyApplication.objects.filter(user=user).values_list("subsidy_id", flat=True)
+    past = farmer_profile.get("past_subsidies") or []
+    past = past.split(",") if isinstance(past, str) else past
+    # sorted, so the recommendation cache key doesn't depend on the order
+    farmer_profile["past_subsidies"] = sorted({str(item).strip() for item in past if str(item).strip()} | {str(subsidy_id) for subsidy_id in applied})
+    return farmer_profile
+
+
+def warm_result(farmer_profile, subsidies):
+    """The cohort's precomputed result, without the subsidies this farmer already had or applied for.
+
+    The ranking was computed for another profile in the same coarse bucket, so it is only served when the
+    structured rules rule none of its subsidies out for this farmer, otherwise the farmer gets a real run.
+    """
+    recommendation_result = warm_recommendations(farmer_profile)
+    if recommendation_result is None:
+        return None
+    eligibility = {subsidy['id']: subsidy.get('eligibility_criteria') for subsidy in subsidies}
+    if any(evaluate_eligibility(eligibility.get(recommendation.get("subsidy_id")), farmer_profile) is False
+           for recommendation in recommendation_result.get("recommended_subsidies", [])):
+        return None
+    keys = past_subsidy_keys(farmer_profile)
+    if not keys:
+        return recommendation_result
+    return dict(recommendation_result, recommended_subsidies=[
+        recommendation for recommendation in recommendation_result.get("recommended_subsidies", [])
+        if not is_past_subsidy(keys, recommendation.get("subsidy_id"), recommendation.get("title"))
+    ])
+
+
+def latency_budget(request):
+    """The optional max_ms latency budget, from the query string or the body. Raises ValueError if it isn't a positive number."""
+    max_ms = request.query_params.get("max_ms", request.data.get("max_ms"))
+    if max_ms in (None, ""):
+        return None
+    max_ms = float(max_ms)
+    if not max_ms > 0:
+        raise ValueError(max_ms)
+    return max_ms
+
+
+def missing_profile_fields(farmer_profile):
+    required_field = ["income", "farmer_type", "land_size", "crop_type", "state"]
+    return [field for field in required_field if not farmer_profile.get(field)]
+
+
+def load_subsidies(generation=None):
+    """Subsidy catalogue in the shape the recommender expects (with caching)."""
+    # Try to get subsidies from cache first, the key changes with every Subsidy write
+    if generation is None:
+        generation = catalogue_generation()
+    subsidies_cache_key = f"all_subsidies_data:{generation}"
+    subsidies = cache.get(subsidies_cache_key)
+    
+    if subsidies is None:
+        subsidies = Subsidy.objects.all().values(
+            'id', 'title', 'description', 'amount', 'eligibility', 'documents_required', 
+            'application_start_date', 'application_end_date', 'rating'
+        )
+        cache.set(subsidies_cache_key, list(subsidies), getattr(settings, "RECOMMENDER_CATALOGUE_CACHE_TTL", 6 * 3600))
+        print("Loaded subsidies from database")
+    else:
+        print("Loaded subsidies from cache")
+    
+    # Convert to list and format for recommender
+    subsidies_list = []
+    for subsidy in subsidies:
+        subsidies_list.append({
+            'id': subsidy['id'],
+            'title': subsidy['title'],
+            'description': subsidy['description'],
+            'amount': float(subsidy['amount']),
+            'eligibility_criteria': subsidy['eligibility'] if subsidy['eligibility'] else [],
+            'documents_required': subsidy['documents_required'] if subsidy['documents_required'] else [],
+            'application_start_date': subsidy['application_start_date'].isoformat() if subsidy['application_start_date'] else None,
+            'application_end_date': subsidy['application_end_date'].isoformat() if subsidy['application_end_date'] else None,
+            'rating': subsidy.get('rating') or 0,
+        })
+    return subsidies_list
+
+
+def recommendation_cache_key(farmer_profile, generation):
+    # equivalent spellings of the same profile share one key, see profile_key.py
+    return profile_cache_key(farmer_profile, generation)
+
+
+def format_recommendation_response(farmer_profile, recommendation_result):
+    # Format response to match frontend expectations
+    return {
+        "success": True,
+        "recommendations": recommendation_result.get("recommended_subsidies", []),
+        "total_found": recommendation_result.get("total_recommended", 0),
+        # recommendations ranked locally because the latency budget ran out, see each item's scored_by
+        "heuristic_scored": recommendation_result.get("heuristic_scored", 0),
+        "summary": f"Based on your profile as a {farmer_profile.get('farmer_type', 'farmer')} with {farmer_profile.get('land_size', 'unknown')} acres growing {farmer_profile.get('crop_type', 'crops')} in {farmer_profile.get('district', 'your area')}, {farmer_profile.get('state', '')}, we found {recommendation_result.get('total_recommended', 0)} eligible subsidies tailored to your needs."
+    }
+
 
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def recommend_subsidies(request):
+    started = time.monotonic()
+    try:
+        max_ms = latency_budget(request)
+    except (TypeError, ValueError):
+        return Response({
+            "success": False,
+            "error": "max_ms must be a positive number of milliseconds."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
     try:
         # Extract farmer_profile from request
         request_data = request.data.get('farmer_profile', request.data)
+        farmer_profile = add_applied_subsidies(build_farmer_profile(request_data), request.user)
         
-        farmer_profile = {
-            "income": request_data.get("income", ""),
-            "farmer_type": request_data.get("farmer_type", ""),
-            "land_size": request_data.get("land_size", ""),
-            "crop_type": request_data.get("crop_type", ""),
-            "season": request_data.get("season", ""),
-            "soil_type": request_data.get("soil_type", ""),
-            "water_sources": request_data.get("water_sources", []),
-            "state": request_data.get("state", ""),
-            "district": request_data.get("district", ""),
-            "rainfall_region": request_data.get("rainfall_region", ""),
-            "temperature_zone": request_data.get("temperature_zone", ""),
-            "past_subsidies": request_data.get("past_subsidies", []),
-        }
-        
-        required_field = ["income", "farmer_type", "land_size", "crop_type", "state"]
-        missing_fields = [field for field in required_field if not farmer_profile.get(field)]
-        
+        missing_fields = missing_profile_fields(farmer_profile)
         if missing_fields:
             return Response({
                 "success": False,
@@ -43,59 +171,36 @@ def recommend_subsidies(request):
             }, status=status.HTTP_400_BAD_REQUEST)
             
         # ------------------------ Load Subsidy From Backend (with caching) ---------------------
-        # Try to get subsidies from cache first
-        subsidies_cache_key = "all_subsidies_data"
-        subsidies = cache.get(subsidies_cache_key)
+        generation = catalogue_generation()
+        subsidies_list = load_subsidies(generation)
         
-        if subsidies is None:
-            subsidies = Subsidy.objects.all().values(
-                'id', 'title', 'description', 'amount', 'eligibility', 'documents_required', 
-                'application_start_date', 'application_end_date'
-            )
-            # Cache subsidies for 30 minutes (they don't change frequently)
-            cache.set(subsidies_cache_key, list(subsidies), 1800)
-            print("Loaded subsidies from database")
-        else:
-            print("Loaded subsidies from cache")
-        
-        if not subsidies:
+        if not subsidies_list:
             return Response({
                 "success": False,
                 "error": "No subsidies available in the system."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        # Convert to list and format for recommender
-        subsidies_list = []
-        for subsidy in subsidies:
-            subsidies_list.append({
-                'id': subsidy['id'],
-                'title': subsidy['title'],
-                'description': subsidy['description'],
-                'amount': float(subsidy['amount']),
-                'eligibility_criteria': subsidy['eligibility'] if subsidy['eligibility'] else [],
-                'documents_required': subsidy['documents_required'] if subsidy['documents_required'] else [],
-                'application_start_date': subsidy['application_start_date'].isoformat() if subsidy['application_start_date'] else None,
-                'application_end_date': subsidy['application_end_date'].isoformat() if subsidy['application_end_date'] else None,
-            })
-        
         # Create cache key for this specific farmer profile
-        cache_key_data = {
-            'farmer_profile': farmer_profile,
-            'subsidy_count': len(subsidies_list)
-        }
-        cache_key = f"subsidy_rec_{hashlib.md5(json.dumps(cache_key_data, sort_keys=True).encode()).hexdigest()}"
+        cache_key = recommendation_cache_key(farmer_profile, generation)
         
-        # Try to get from cache first (5-minute cache)
-        recommendation_result = cache.get(cache_key)
+        # Precomputed cohort rankings first, then the 5-minute cache
+        recommendation_result = warm_result(farmer_profile, subsidies_list) or cache.get(cache_key)
         
-        if recommendation_result is None:
-            # Get recommendations using FastSubsidyRecommander
+        if recommendation_result is None and max_ms:
+            # a budgeted run can't wait on an identical run in flight, and only caches a result the model fully scored
+            remaining_ms = max_ms - (time.monotonic() - started) * 1000
+            recommendation_result = get_recommender().recommend_subsidies(farmer_profile, subsidies_list, max_ms=max(remaining_ms, 1))
+            if not recommendation_result.get("heuristic_scored"):
+                cache.set(cache_key, recommendation_result, RESULT_TIMEOUT)
+            logger.debug("Generated recommendations within a %.0fms budget", max_ms)
+        elif recommendation_result is None:
+            # Get recommendations using FastSubsidyRecommander, identical concurrent requests share one run
             try:
-                recommender = SubsidyRecommander()
-                recommendation_result = recommender.recommend_subsidies(farmer_profile, subsidies_list)
-                
-                # Cache the result for 5 minutes
-                cache.set(cache_key, recommendation_result, 300)
+                recommender = get_recommender()
+                recommendation_result = recommend_once(
+                    cache_key, lambda: recommender.recommend_subsidies(farmer_profile, subsidies_list),
+                    lock_timeout=recommender.worst_case_seconds(),
+                )
                 print(f"Generated new recommendations for farmer profile")
             except Exception as e:
                 print(f"Error creating or using recommender: {e}")
@@ -105,15 +210,112 @@ def recommend_subsidies(request):
         else:
             print(f"Retrieved recommendations from cache")
         
-        # Format response to match frontend expectations
-        formatted_response = {
-            "success": True,
-            "recommendations": recommendation_result.get("recommended_subsidies", []),
-            "total_found": recommendation_result.get("total_recommended", 0),
-            "summary": f"Based on your profile as a {farmer_profile.get('farmer_type', 'farmer')} with {farmer_profile.get('land_size', 'unknown')} acres growing {farmer_profile.get('crop_type', 'crops')} in {farmer_profile.get('district', 'your area')}, {farmer_profile.get('state', '')}, we found {recommendation_result.get('total_recommended', 0)} eligible subsidies tailored to your needs."
-        }
+        return Response(format_recommendation_response(farmer_profile, recommendation_result), status=status.HTTP_200_OK)
+    
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return Response({
+            "success": False,
+            "error": str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def stream_recommendations(request):
+    """Server-sent events: eligibility count, then each subsidy as it is scored, then the final top 5."""
+    request_data = request.data.get('farmer_profile', request.data)
+    farmer_profile = add_applied_subsidies(build_farmer_profile(request_data), request.user)
+    
+    missing_fields = missing_profile_fields(farmer_profile)
+    if missing_fields:
+        return Response({
+            "success": False,
+            "error": f"Missing required fields: {', '.join(missing_fields)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    generation = catalogue_generation()
+    subsidies_list = load_subsidies(generation)
+    if not subsidies_list:
+        return Response({
+            "success": False,
+            "error": "No subsidies available in the system."
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    cache_key = recommendation_cache_key(farmer_profile, generation)
+    
+    def events():
+        recommendation_result = warm_result(farmer_profile, subsidies_list) or cache.get(cache_key)
+        if recommendation_result is not None:
+            yield sse_event("eligibility", {"eligible_count": recommendation_result.get("total_recommended", 0)})
+            yield sse_event("final", format_recommendation_response(farmer_profile, recommendation_result))
+            return
         
-        return Response(formatted_response, status=status.HTTP_200_OK)
+        try:
+            # an identical request already streaming holds the lock, this one then replays its cached result
+            recommender = get_recommender()
+            with single_flight(cache_key, recommender.worst_case_seconds()):
+                recommendation_result = cached_or_coalesced(cache_key)
+                if recommendation_result is not None:
+                    yield sse_event("eligibility", {"eligible_count": recommendation_result.get("total_recommended", 0)})
+                    yield sse_event("final", format_recommendation_response(farmer_profile, recommendation_result))
+                    return
+                
+                for event, payload in recommender.stream_recommendations(farmer_profile, subsidies_list):
+                    if event == "final":
+                        cache.set(cache_key, payload, RESULT_TIMEOUT)
+                        payload = format_recommendation_response(farmer_profile, payload)
+                    yield sse_event(event, payload)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"success": False, "error": str(e)})
+    
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let proxies buffer the stream
+    return response
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def create_recommendation_job(request):
+    """Queue a recommendation run and return its job id immediately; poll recommendation_job_status for the result."""
+    try:
+        request_data = request.data.get('farmer_profile', request.data)
+        farmer_profile = add_applied_subsidies(build_farmer_profile(request_data), request.user)
+        
+        missing_fields = missing_profile_fields(farmer_profile)
+        if missing_fields:
+            return Response({
+                "success": False,
+                "error": f"Missing required fields: {', '.join(missing_fields)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        generation = catalogue_generation()
+        subsidies_list = load_subsidies(generation)
+        if not subsidies_list:
+            return Response({
+                "success": False,
+                "error": "No subsidies available in the system."
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        cache_key = recommendation_cache_key(farmer_profile, generation)
+        cached_result = warm_result(farmer_profile, subsidies_list) or cache.get(cache_key)
+        job = submit_job(farmer_profile, subsidies_list, cache_key, cached_result=cached_result)
+        
+        return Response({
+            "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
+        }, status=status.HTTP_202_ACCEPTED)
     
     except Exception as e:
         import traceback
@@ -123,6 +325,49 @@ def recommend_subsidies(request):
             "error": str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def recommendation_job_status(request, job_id):
+    job = RecommendationJob.objects.filter(job_id=job_id, expires_at__gt=timezone.now()).first()
+    if job is None:
+        return Response({
+            "success": False,
+            "error": "Job not found or expired."
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    data = {
+        "success": job.status != "failed",
+        "job_id": job.job_id,
+        "status": job.status,
+        "progress": {
+            "stage": job.stage,
+            "total_subsidies": job.total_subsidies,
+            "eligible_count": job.eligible_count,
+            "scored_count": job.scored_count,
+        },
+    }
+    
+    if job.status == "done":
+        data.update(format_recommendation_response(job.farmer_profile, job.result or {}))
+    elif job.status == "failed":
+        data["error"] = job.error
+    else:
+        data["recommendations"] = job.partial_results
+    
+    return Response(data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def recommender_metrics(request):
+    """Counters and rolling latency/token histograms of this worker's recommender, and its cache hit rates."""
+    return Response({
+        "success": True,
+        "metrics": metrics.snapshot(),
+        "cache": cache.stats() if hasattr(cache, "stats") else None,
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def recommendation_status(request):
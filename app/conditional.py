@@ -0,0 +1,70 @@
+"""
+Conditional GET for the public catalogue endpoints.
+
+The subsidy list, top_rated and the news articles are fetched on every page
+load. @conditional(state) answers a request from a version of the data it
+can read in one cheap query, before any serializing: the ETag is that
+version hashed with the URL and Accept header, Last-Modified is when it last
+changed, and a request whose If-None-Match / If-Modified-Since still matches
+gets an empty 304. Every response carries Cache-Control: public with
+CATALOGUE_HTTP_MAX_AGE seconds (60 by default), so browsers and CDNs reuse
+it meanwhile and revalidate afterwards.
+
+State functions:
+- catalogue_state: the subsidies and ratings generations
+  (SubsidyRecommandation.catalogue), bumped after every committed write.
+- articles_state: the count and latest updated_at of the articles.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from SubsidyRecommandation.catalogue import RATINGS, SUBSIDIES, generations
+
+
+def max_age() -> int:
+    return getattr(settings, "CATALOGUE_HTTP_MAX_AGE", 60)
+
+
+def catalogue_state(request):
+    """(version, last modified) of everything the subsidy endpoints serve."""
+    counters = generations(SUBSIDIES, RATINGS)
+    version = "-".join(str(counters.get(name, (0, None))[0]) for name in (SUBSIDIES, RATINGS))
+    return version, max((updated_at for _, updated_at in counters.values()), default=None)
+
+
+def articles_state(request):
+    from news_post.models import Article
+
+    state = Article.objects.aggregate(count=Count("pk"), updated_at=Max("updated_at"))
+    updated_at = state["updated_at"]
+    return f"{state['count']}-{updated_at.timestamp() if updated_at else 0}", updated_at
+
+
+def conditional(state):
+    """Decorates a view method with ETag/Last-Modified/Cache-Control from `state(request)` and 304s."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(self, request, *args, **kwargs):
+            version, last_modified = state(request)
+            key = f"{version}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+            etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = view(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault("ETag", etag)
+            if timestamp is not None:
+                response.headers.setdefault("Last-Modified", http_date(timestamp))
+            patch_cache_control(response, public=True, max_age=max_age())
+            return response
+        return wrapped
+    return decorator
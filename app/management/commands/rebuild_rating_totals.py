@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from app.models import Subsidy
+
+
+class Command(BaseCommand):
+    help = "Recount every subsidy's rating_sum, rating_count and average from its ratings, repairing drift."
+
+    def handle(self, *args, **options):
+        drifted = Subsidy.rebuild_rating_totals()
+        self.stdout.write(f"Rebuilt rating totals, {drifted} of {Subsidy.objects.count()} subsidies had drifted")
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_alter_subsidy_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubsidySearchDocument',
+            fields=[
+                ('subsidy', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='app.subsidy')),
+                ('title', models.TextField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('eligibility', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
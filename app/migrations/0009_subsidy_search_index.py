@@ -0,0 +1,97 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = "app_subsidysearchdocument_fts"
+
+
+def _weighted(field, weight):
+    # each stored token becomes a `token:1` tsvector lexeme, so setweight has a position to weigh;
+    # the tokens are already normalized and must not go through a text search parser again
+    return f"setweight(regexp_replace({field}, '(\\S+)', '\\1:1', 'g')::tsvector, '{weight}')"
+
+
+POSTGRES_INDEX = [
+    "ALTER TABLE app_subsidysearchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    f"{_weighted('title', 'A')} || {_weighted('description', 'B')} || {_weighted('eligibility', 'C')}"
+    ") STORED",
+    "CREATE INDEX app_subsidysearchdocument_search_vector ON app_subsidysearchdocument USING gin (search_vector)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS app_subsidysearchdocument_search_vector",
+    "ALTER TABLE app_subsidysearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# tokenize='ascii' treats every non-ASCII character as part of a token, so Indic words stay whole
+SQLITE_INDEX = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, description, eligibility, "
+    "content='app_subsidysearchdocument', content_rowid='subsidy_id', tokenize='ascii')",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON app_subsidysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, eligibility)
+        VALUES (new.subsidy_id, new.title, new.description, new.eligibility);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON app_subsidysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, eligibility)
+        VALUES ('delete', old.subsidy_id, old.title, old.description, old.eligibility);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON app_subsidysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, eligibility)
+        VALUES ('delete', old.subsidy_id, old.title, old.description, old.eligibility);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, eligibility)
+        VALUES (new.subsidy_id, new.title, new.description, new.eligibility);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def build_documents(apps, schema_editor):
+    from app.search import document_fields
+
+    Subsidy = apps.get_model('app', 'Subsidy')
+    SubsidySearchDocument = apps.get_model('app', 'SubsidySearchDocument')
+    SubsidySearchDocument.objects.bulk_create(
+        [SubsidySearchDocument(subsidy_id=subsidy.pk, **document_fields(subsidy)) for subsidy in Subsidy.objects.iterator()],
+        batch_size=500,
+    )
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_INDEX)
+    elif vendor == 'sqlite':
+        try:
+            _execute(schema_editor, SQLITE_INDEX)
+        except OperationalError:
+            # SQLite built without FTS5, app.search falls back to its in-memory index
+            _execute(schema_editor, SQLITE_DROP)
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_DROP)
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_subsidysearchdocument'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_subsidy_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subsidy',
+            index=models.Index(fields=['-created_at', '-id'], name='subsidy_created_idx'),
+        ),
+    ]
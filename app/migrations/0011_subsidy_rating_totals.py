@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:24
+
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+def count_ratings(apps, schema_editor):
+    Subsidy = apps.get_model('app', 'Subsidy')
+    SubsidyRating = apps.get_model('app', 'SubsidyRating')
+    ratings = SubsidyRating.objects.filter(subsidy=OuterRef('pk')).order_by().values('subsidy')
+    rating_sum = Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0)
+    rating_count = Coalesce(Subquery(ratings.annotate(total=Count('pk')).values('total')), 0)
+    Subsidy.objects.update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Coalesce(Round(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), 1), 0.0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_subsidy_subsidy_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subsidy',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of ratings, kept by SubsidyRating'),
+        ),
+        migrations.AddField(
+            model_name='subsidy',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, help_text='Total stars of all ratings, kept by SubsidyRating'),
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,14 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
+
+
+def average_rating(rating_sum, rating_count):
+    """The stored average as an expression of the totals: rounded to one decimal, 0 without ratings."""
+    return Coalesce(Round(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), 1), 0.0)
 
 
 class Subsidy(models.Model):
@@ -16,18 +22,42 @@ class Subsidy(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='created_subsidies', help_text='User who created this subsidy (subsidy_provider)')
     rating = models.FloatField(default=0, validators=[MinValueValidator(0), MaxValueValidator(5)], help_text="Average rating from 0 to 5 stars")
+    rating_sum = models.PositiveIntegerField(default=0, help_text="Total stars of all ratings, kept by SubsidyRating")
+    rating_count = models.PositiveIntegerField(default=0, help_text="Number of ratings, kept by SubsidyRating")
+
+    @classmethod
+    def add_to_rating_totals(cls, subsidy_id, stars, ratings):
+        """Move a subsidy's rating totals by stars/ratings and re-derive its average, in one UPDATE."""
+        rating_sum = F("rating_sum") + stars
+        rating_count = F("rating_count") + ratings
+        cls.objects.filter(pk=subsidy_id).update(
+            rating_sum=rating_sum, rating_count=rating_count, rating=average_rating(rating_sum, rating_count)
+        )
 
-    def update_average_rating(self):
-        """Recalculate and store the average rating for this subsidy."""
-        avg = self.ratings.aggregate(avg_rating=Avg("rating"))["avg_rating"]
-        self.rating = round(avg or 0.0, 1)
-        self.save(update_fields=["rating"])
+    @classmethod
+    def rebuild_rating_totals(cls):
+        """Recount the rating totals of every subsidy from its ratings, returns how many had drifted."""
+        ratings = SubsidyRating.objects.filter(subsidy=OuterRef("pk")).order_by().values("subsidy")
+        actual_sum = Coalesce(Subquery(ratings.annotate(total=Sum("rating")).values("total")), 0)
+        actual_count = Coalesce(Subquery(ratings.annotate(total=Count("pk")).values("total")), 0)
+        drifted = list(
+            cls.objects.annotate(actual_sum=actual_sum, actual_count=actual_count)
+            .exclude(rating_sum=F("actual_sum"), rating_count=F("actual_count"), rating=average_rating(F("actual_sum"), F("actual_count")))
+            .values_list("pk", flat=True)
+        )
+        if drifted:
+            cls.objects.filter(pk__in=drifted).update(
+                rating_sum=actual_sum, rating_count=actual_count, rating=average_rating(actual_sum, actual_count)
+            )
+        return len(drifted)
 
     def __str__(self):
         return f"{self.title} ({self.rating}⭐)"
 
     class Meta:
         verbose_name_plural = "Subsidies"
+        # the subsidy list in cursor order (app.pagination)
+        indexes = [models.Index(fields=['-created_at', '-id'], name='subsidy_created_idx')]
 
 
 class SubsidyRating(models.Model):
@@ -44,12 +74,61 @@ class SubsidyRating(models.Model):
     def __str__(self):
         return f"{self.user} rated {self.subsidy} {self.rating}/5"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # what the subsidy's totals hold for this rating, so an edit moves them by the difference
+        if "subsidy_id" in instance.__dict__ and "rating" in instance.__dict__:
+            instance._counted = (instance.subsidy_id, instance.rating)
+        return instance
+
+    def _counted_rating(self):
+        """(subsidy id, stars) this rating adds to the totals, None when it isn't stored yet."""
+        if self._state.adding:
+            return None
+        counted = getattr(self, "_counted", None)
+        if counted is None:
+            counted = SubsidyRating.objects.filter(pk=self.pk).values_list("subsidy_id", "rating").first()
+        return counted
+
     def save(self, *args, **kwargs):
-        """Update subsidy average rating when saved."""
-        super().save(*args, **kwargs)
-        self.subsidy.update_average_rating()
+        """Save and move the subsidy's rating totals by the change, in the same transaction."""
+        with transaction.atomic(savepoint=False):
+            counted = self._counted_rating()
+            super().save(*args, **kwargs)
+            stars, ratings = int(self.rating), 1
+            if counted is not None:
+                counted_subsidy_id, counted_stars = counted
+                if counted_subsidy_id == self.subsidy_id:
+                    stars, ratings = stars - counted_stars, 0
+                else:
+                    Subsidy.add_to_rating_totals(counted_subsidy_id, -counted_stars, -1)
+            if stars or ratings:
+                Subsidy.add_to_rating_totals(self.subsidy_id, stars, ratings)
+            self._counted = (self.subsidy_id, int(self.rating))
 
     def delete(self, *args, **kwargs):
-        """Update subsidy average rating when deleted."""
-        super().delete(*args, **kwargs)
-        self.subsidy.update_average_rating()
+        """Delete and take the rating out of the subsidy's totals, in the same transaction."""
+        with transaction.atomic(savepoint=False):
+            counted = self._counted_rating()
+            result = super().delete(*args, **kwargs)
+            if counted is not None and result[0]:
+                Subsidy.add_to_rating_totals(counted[0], -counted[1], -1)
+            self._counted = None
+        return result
+
+
+class SubsidySearchDocument(models.Model):
+    """
+    Normalized, space-separated search tokens of a subsidy (see app.search),
+    kept in step with every Subsidy save. The database indexes it: a generated
+    tsvector column with a GIN index on Postgres, an FTS5 table on SQLite.
+    """
+    subsidy = models.OneToOneField(Subsidy, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    eligibility = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"Search document of subsidy {self.subsidy_id}"
@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination for the newest-first lists.
+
+Page-number pagination counts the whole list and skips `OFFSET` rows for
+every page, so deep pages get slower. KeysetPagination orders by
+(ordering_field, id), newest first, and its `next`/`previous` links carry
+the position of the last/first item seen: a page is one indexed range
+query whatever its depth. Ties on the timestamp (bulk-created
+notifications share one) are broken by id, not by offset.
+
+The envelope is the page-number one, `{"count", "next", "previous",
+"results"}`. Pass ?include_count=false to skip the COUNT query, `count`
+is then null. Clients still sending ?page=N get that page by offset, with
+page-number links, until they move to the links.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def wants_count(request) -> bool:
+    return request.query_params.get("include_count", "").lower() not in ("0", "false", "no")
+
+
+class _LegacyPagePagination(PageNumberPagination):
+
+    def __init__(self, keyset):
+        self.page_size = keyset.page_size
+        self.page_size_query_param = keyset.page_size_query_param
+        self.max_page_size = keyset.max_page_size
+
+
+class KeysetPagination(BasePagination):
+    """Newest first by (ordering_field, id), paged by position rather than offset."""
+
+    ordering_field = "created_at"
+    page_size = api_settings.PAGE_SIZE or 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    # ---------------------- cursors ---------------------- #
+    def encode_cursor(self, item, reverse: bool) -> str:
+        position = {"t": getattr(item, self.ordering_field).isoformat(), "id": item.pk}
+        if reverse:
+            position["r"] = 1
+        return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return datetime.fromisoformat(position["t"]), int(position["id"]), bool(position.get("r"))
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _link(self, item, reverse: bool) -> str:
+        url = remove_query_param(self.request.build_absolute_uri(), "page")
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(item, reverse))
+
+    # ---------------------- pages ---------------------- #
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.legacy = None
+        if request.query_params.get("page") and not request.query_params.get(self.cursor_query_param):
+            self.legacy = _LegacyPagePagination(self)
+            return self.legacy.paginate_queryset(queryset.order_by(f"-{self.ordering_field}", "-pk"), request, view)
+
+        self.count = queryset.count() if wants_count(request) else None
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        field = self.ordering_field
+
+        if cursor is None:
+            items = list(queryset.order_by(f"-{field}", "-pk")[:size + 1])
+            more_before, more_after = False, len(items) > size
+        else:
+            moment, pk, reverse = cursor
+            if reverse:
+                # the page before the cursor: read it oldest first, then flip it
+                after = Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "pk__gt": pk})
+                items = list(queryset.filter(after).order_by(field, "pk")[:size + 1])
+                more_before, more_after = len(items) > size, True
+                items = items[:size][::-1]
+            else:
+                before = Q(**{f"{field}__lt": moment}) | Q(**{field: moment, "pk__lt": pk})
+                items = list(queryset.filter(before).order_by(f"-{field}", "-pk")[:size + 1])
+                more_before, more_after = True, len(items) > size
+
+        self.page = items[:size]
+        self.next_link = self._link(self.page[-1], reverse=False) if more_after and self.page else None
+        self.previous_link = self._link(self.page[0], reverse=True) if more_before and self.page else None
+        return self.page
+
+    def get_next_link(self):
+        return self.legacy.get_next_link() if self.legacy else self.next_link
+
+    def get_previous_link(self):
+        return self.legacy.get_previous_link() if self.legacy else self.previous_link
+
+    def get_paginated_response(self, data):
+        count = self.legacy.page.paginator.count if self.legacy else self.count
+        return Response({
+            "count": count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["count", "results"],
+            "properties": {
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class SubmittedPagination(KeysetPagination):
+    """Subsidy applications, newest submission first."""
+
+    ordering_field = "submitted_at"
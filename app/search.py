@@ -0,0 +1,217 @@
+"""
+Full-text search over subsidies.
+
+Every Subsidy save stores its title, description and eligibility as normalized
+tokens in SubsidySearchDocument (see signals.py). The tokenizer keeps
+Devanagari and Gujarati vowel signs inside their words, folds nukta and
+chandrabindu spellings together and reads Indian digits as ASCII ones, so the
+database never has to understand those scripts. On top of that table:
+
+- Postgres: a generated tsvector column built from the tokens as-is, with a
+  GIN index (migration 0009), ranked with ts_rank.
+- SQLite: an FTS5 table kept in step by triggers, ranked with bm25.
+- anything else, or SQLite without FTS5: an in-memory inverted index per
+  worker, caught up from the table's updated_at before each search.
+
+Every query token matches as a prefix, so results update on each keystroke,
+and a subsidy must match all of them. Titles weigh most, eligibility least.
+"""
+
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Max, When
+from rest_framework.filters import BaseFilterBackend
+
+FIELD_WEIGHTS = {"title": 10.0, "description": 4.0, "eligibility": 1.0}
+MAX_QUERY_TOKENS = 8
+MAX_RESULTS = 500
+FTS_TABLE = "app_subsidysearchdocument_fts"
+
+# nukta, zero-width joiners and chandrabindu (written as anusvara) are spelled both ways
+_INDIC_FOLD = str.maketrans({"\u093c": None, "\u0abc": None, "\u200c": None, "\u200d": None, "\u0901": "\u0902", "\u0a81": "\u0a82"})
+# letters and digits, plus the Devanagari and Gujarati blocks whole (their vowel signs are marks, not letters) minus the dandas
+_TOKEN_RE = re.compile(r"(?:[^\W_]|[\u0900-\u0963\u0966-\u097f\u0a81-\u0aff])+")
+
+
+def tokenize(text: Any) -> List[str]:
+    text = unicodedata.normalize("NFD", str(text or "")).casefold().translate(_INDIC_FOLD)
+    tokens = []
+    for token in _TOKEN_RE.findall(unicodedata.normalize("NFC", text)):
+        # "૨૦૨૬" and "२०२६" find "2026"
+        tokens.append("".join(str(unicodedata.decimal(char, char)) for char in token))
+    return tokens
+
+
+def _strings(value: Any) -> List[str]:
+    """Text values of an eligibility JSON value, without its keys."""
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _strings(item)]
+    if isinstance(value, (list, tuple)):
+        return [text for item in value for text in _strings(item)]
+    return [] if value is None else [str(value)]
+
+
+def document_fields(subsidy) -> Dict[str, str]:
+    """The SubsidySearchDocument fields of a subsidy."""
+    return {
+        "title": " ".join(tokenize(subsidy.title)),
+        "description": " ".join(tokenize(subsidy.description)),
+        "eligibility": " ".join(tokenize(" ".join(_strings(subsidy.eligibility)))),
+    }
+
+
+def update_document(subsidy) -> None:
+    from .models import SubsidySearchDocument
+
+    SubsidySearchDocument.objects.update_or_create(subsidy_id=subsidy.pk, defaults=document_fields(subsidy))
+
+
+def query_tokens(query: str) -> List[str]:
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+
+
+# ---------------------- backends ---------------------- #
+class PostgresSearchBackend:
+
+    def ranked_ids(self, tokens: List[str], limit: int) -> List[int]:
+        # tokens are letters, marks and digits only, so they can't break out of the quotes
+        tsquery = " & ".join(f"'{token}':*" for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT subsidy_id FROM app_subsidysearchdocument WHERE search_vector @@ %s::tsquery "
+                "ORDER BY ts_rank(search_vector, %s::tsquery) DESC, subsidy_id DESC LIMIT %s",
+                [tsquery, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteSearchBackend:
+
+    def ranked_ids(self, tokens: List[str], limit: int) -> List[int]:
+        match = " AND ".join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {FIELD_WEIGHTS['title']}, {FIELD_WEIGHTS['description']}, {FIELD_WEIGHTS['eligibility']}), rowid DESC LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class MemorySearchBackend:
+    """Inverted index of SubsidySearchDocument in this worker, ranked by field weight times idf."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._postings = defaultdict(dict)  # token -> {subsidy id: weight}
+        self._documents = {}  # subsidy id -> its tokens
+        self._vocabulary = []  # sorted tokens, for prefix lookups
+        self._updated_at = None
+
+    def _add(self, document) -> None:
+        self._remove(document.subsidy_id)
+        tokens = set()
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in getattr(document, field).split():
+                postings = self._postings[token]
+                if not postings:
+                    bisect.insort(self._vocabulary, token)
+                postings[document.subsidy_id] = postings.get(document.subsidy_id, 0) + weight
+                tokens.add(token)
+        self._documents[document.subsidy_id] = tokens
+
+    def _remove(self, subsidy_id: int) -> None:
+        for token in self._documents.pop(subsidy_id, ()):
+            self._postings[token].pop(subsidy_id, None)
+
+    def _sync(self) -> None:
+        """Catch up with documents saved since the last search, rebuilding when some were deleted."""
+        from .models import SubsidySearchDocument
+
+        state = SubsidySearchDocument.objects.aggregate(count=Count("pk"), updated_at=Max("updated_at"))
+        if state["updated_at"] == self._updated_at and state["count"] == len(self._documents):
+            return
+
+        if self._updated_at is not None and state["count"] >= len(self._documents):
+            for document in SubsidySearchDocument.objects.filter(updated_at__gte=self._updated_at):
+                self._add(document)
+        if len(self._documents) != state["count"]:
+            # first search, or a subsidy was deleted
+            self._clear()
+            for document in SubsidySearchDocument.objects.all():
+                self._add(document)
+        self._updated_at = state["updated_at"]
+
+    def ranked_ids(self, tokens: List[str], limit: int) -> List[int]:
+        with self._lock:
+            self._sync()
+            total = max(len(self._documents), 1)
+            scores = None
+            for token in tokens:
+                matches = defaultdict(float)
+                position = bisect.bisect_left(self._vocabulary, token)
+                while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+                    postings = self._postings[self._vocabulary[position]]
+                    position += 1
+                    idf = math.log(1 + total / len(postings)) if postings else 0
+                    for subsidy_id, weight in postings.items():
+                        matches[subsidy_id] = max(matches[subsidy_id], weight * idf)
+                scores = matches if scores is None else {
+                    subsidy_id: score + matches[subsidy_id] for subsidy_id, score in scores.items() if subsidy_id in matches
+                }
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda subsidy_id: (-scores[subsidy_id], -subsidy_id))[:limit]
+
+
+_memory_backend = MemorySearchBackend()
+_fts_tables = {}  # database name -> whether its FTS5 table exists
+
+
+def _has_fts_table() -> bool:
+    name = str(connection.settings_dict["NAME"])
+    if name not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_tables[name] = cursor.fetchone() is not None
+    return _fts_tables[name]
+
+
+def get_search_backend():
+    """SUBSIDY_SEARCH_BACKEND ("postgres", "sqlite" or "memory"), or by default the best one the database supports."""
+    name = getattr(settings, "SUBSIDY_SEARCH_BACKEND", "auto")
+    if name == "auto":
+        name = {"postgresql": "postgres", "sqlite": "sqlite"}.get(connection.vendor, "memory")
+    if name == "postgres":
+        return PostgresSearchBackend()
+    if name == "sqlite" and _has_fts_table():
+        return SQLiteSearchBackend()
+    return _memory_backend
+
+
+class SubsidySearchFilter(BaseFilterBackend):
+    """?search= over the subsidy search index, best match first."""
+
+    search_param = "search"
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = query_tokens(request.query_params.get(self.search_param, ""))
+        if not tokens:
+            return queryset
+
+        ids = get_search_backend().ranked_ids(tokens, MAX_RESULTS)
+        if not ids:
+            return queryset.none()
+        ranking = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+        return queryset.filter(pk__in=ids).order_by(ranking)
@@ -1,10 +1,17 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Subsidy, SubsidyRating
+from SubsidyRecommandation.eligibility_rules import validate_rules
 
 User = get_user_model()
 
 
+def embedded_ratings_limit():
+    """How many of a subsidy's latest ratings are embedded when ratings are requested."""
+    return getattr(settings, "SUBSIDY_EMBEDDED_RATINGS", 5)
+
+
 # ------------------- Rating Serializer -------------------
 class SubsidyRatingSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.full_name', read_only=True)
@@ -16,8 +23,13 @@ class SubsidyRatingSerializer(serializers.ModelSerializer):
 
 # ------------------- Subsidy Serializer -------------------
 class SubsidySerializer(serializers.ModelSerializer):
-    ratings_count = serializers.IntegerField(source='ratings.count', read_only=True)
-    ratings = SubsidyRatingSerializer(many=True, read_only=True)
+    """
+    Lists stay lean: ratings_count is the subsidy's stored rating_count and
+    the latest ratings are only embedded when the context sets include_ratings
+    (SubsidyViewSet prefetches them, with their users, in one query).
+    """
+    ratings_count = serializers.IntegerField(source='rating_count', read_only=True)
+    ratings = serializers.SerializerMethodField()
     created_by = serializers.SerializerMethodField()
 
     class Meta:
@@ -36,10 +48,29 @@ class SubsidySerializer(serializers.ModelSerializer):
             'rating',             # average rating
             'ratings_count',      # ⭐ number of reviews
 
-            'ratings',            # list of all reviews (optional)
+            'ratings',            # latest reviews, only with include_ratings
             'created_by',
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context.get("include_ratings"):
+            fields.pop("ratings")
+        return fields
+
+    def get_ratings(self, obj):
+        ratings = getattr(obj, "latest_ratings", None)
+        if ratings is None:
+            ratings = obj.ratings.select_related("user").order_by("-created_at")[:embedded_ratings_limit()]
+        return SubsidyRatingSerializer(ratings, many=True).data
+
+    def validate_eligibility(self, value):
+        try:
+            validate_rules(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
+
     def get_created_by(self, obj):
         if not obj.created_by:
             return None
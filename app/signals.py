@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from SubsidyRecommandation.catalogue import RATINGS, bump_generation
+from .models import Subsidy, SubsidyRating
+from .search import update_document
+
+SEARCHED_FIELDS = {"title", "description", "eligibility"}
+
+
+@receiver(post_save, sender=Subsidy)
+def update_search_document(sender, instance, update_fields=None, **kwargs):
+    # in the same transaction as the subsidy, so search never sees a half-saved edit;
+    # saving only the rating fields doesn't change the searched text
+    if update_fields and not SEARCHED_FIELDS & set(update_fields):
+        return
+    update_document(instance)
+
+
+@receiver(post_save, sender=SubsidyRating)
+@receiver(post_delete, sender=SubsidyRating)
+def ratings_changed(sender, instance, **kwargs):
+    # the subsidy list shows ratings, so its ETag must change (see conditional.py)
+    transaction.on_commit(lambda: bump_generation(RATINGS))
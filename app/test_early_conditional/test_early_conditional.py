@@ -0,0 +1,93 @@
+"""
+Unit tests for conditional GETs on the subsidy and news lists.
+"""
+
+import datetime
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from app.models import Subsidy, SubsidyRating
+from news_post.models import Article
+
+
+@pytest.fixture
+def catalogue(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        return Subsidy.objects.create(title="Drip irrigation", description="d", amount=100)
+
+
+@pytest.mark.django_db
+class TestSubsidyEndpoints:
+
+    @pytest.mark.happy_path
+    @pytest.mark.parametrize("url", ["/api/subsidies/", "/api/subsidies/top_rated/"])
+    def test_unchanged_catalogue_is_not_modified(self, catalogue, url, django_assert_num_queries):
+        client = APIClient()
+        first = client.get(url)
+        assert first.status_code == 200
+        assert first["Last-Modified"]
+        assert "public" in first["Cache-Control"] and "max-age=60" in first["Cache-Control"]
+
+        # answered from the catalogue version alone
+        with django_assert_num_queries(1):
+            again = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again["ETag"] == first["ETag"]
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]).status_code == 304
+
+    @pytest.mark.happy_path
+    def test_subsidy_and_rating_writes_change_the_etag(self, catalogue, django_capture_on_commit_callbacks):
+        client = APIClient()
+        etag = client.get("/api/subsidies/")["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Subsidy.objects.create(title="Tractor loan", description="d", amount=100)
+        response = client.get("/api/subsidies/", HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.data["results"]) == 2
+
+        user = get_user_model().objects.create_user(full_name="Farmer", email_address="farmer@example.com", password="pw")
+        with django_capture_on_commit_callbacks(execute=True):
+            SubsidyRating.objects.create(subsidy=catalogue, user=user, rating=5)
+        assert client.get("/api/subsidies/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 200
+
+    @pytest.mark.edge_case
+    def test_etag_depends_on_the_query(self, catalogue):
+        client = APIClient()
+        etag = client.get("/api/subsidies/")["ETag"]
+
+        response = client.get("/api/subsidies/?include_ratings=true", HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    @pytest.mark.edge_case
+    @override_settings(CATALOGUE_HTTP_MAX_AGE=5)
+    def test_max_age_comes_from_settings(self, catalogue):
+        assert "max-age=5" in APIClient().get("/api/subsidies/top_rated/")["Cache-Control"]
+
+
+@pytest.mark.django_db
+class TestArticleList:
+
+    @pytest.mark.happy_path
+    def test_edits_and_deletes_change_the_etag(self):
+        provider = get_user_model().objects.create_user(full_name="Provider", email_address="p@example.com", password="pw")
+        article = Article.objects.create(provider=provider, title="Monsoon advisory", date=datetime.date(2026, 6, 1),
+                                         source="IMD", description="d")
+        Article.objects.create(provider=provider, title="Seed fair", date=datetime.date(2026, 6, 2), source="KVK", description="d")
+        client = APIClient()
+        etag = client.get("/news/articles/")["ETag"]
+        assert client.get("/news/articles/", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        article.title = "Monsoon advisory (updated)"
+        article.save()
+        edited = client.get("/news/articles/", HTTP_IF_NONE_MATCH=etag)
+        assert edited.status_code == 200
+
+        article.delete()
+        assert client.get("/news/articles/", HTTP_IF_NONE_MATCH=edited["ETag"]).status_code == 200
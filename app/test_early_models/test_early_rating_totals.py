@@ -0,0 +1,121 @@
+"""
+Unit tests for the rating totals SubsidyRating keeps on Subsidy.
+"""
+
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from app.models import Subsidy, SubsidyRating
+
+
+def make_users(count):
+    return [get_user_model().objects.create_user(full_name=f"Farmer {i}", email_address=f"farmer{i}@example.com", password="pw")
+            for i in range(count)]
+
+
+def totals(subsidy):
+    subsidy.refresh_from_db()
+    return subsidy.rating_sum, subsidy.rating_count, subsidy.rating
+
+
+@pytest.fixture
+def subsidy(db):
+    return Subsidy.objects.create(title="Drip irrigation", description="d", amount=100)
+
+
+@pytest.mark.django_db
+class TestRatingTotals:
+
+    @pytest.mark.happy_path
+    def test_ratings_add_up(self, subsidy):
+        for user, stars in zip(make_users(3), [5, 4, 4]):
+            SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=stars)
+
+        assert totals(subsidy) == (13, 3, 4.3)
+
+    @pytest.mark.happy_path
+    def test_rating_write_is_constant_time(self, subsidy, django_assert_num_queries):
+        users = make_users(6)
+        for user in users[:5]:
+            SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=3)
+
+        # the insert and one UPDATE of the totals, however many ratings there are
+        with django_assert_num_queries(2):
+            SubsidyRating.objects.create(subsidy=subsidy, user=users[5], rating=5)
+        assert totals(subsidy) == (20, 6, 3.3)
+
+    @pytest.mark.happy_path
+    def test_edit_moves_the_sum_only(self, subsidy):
+        user, other = make_users(2)
+        SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=2)
+        SubsidyRating.objects.create(subsidy=subsidy, user=other, rating=4)
+
+        SubsidyRating.objects.update_or_create(subsidy=subsidy, user=user, defaults={"rating": 5, "review": "better now"})
+
+        assert totals(subsidy) == (9, 2, 4.5)
+
+    @pytest.mark.edge_case
+    def test_review_only_edit_leaves_the_totals_alone(self, subsidy, django_assert_num_queries):
+        rating = SubsidyRating.objects.create(subsidy=subsidy, user=make_users(1)[0], rating=4)
+        rating.review = "good"
+
+        with django_assert_num_queries(1):
+            rating.save()
+        assert totals(subsidy) == (4, 1, 4.0)
+
+    @pytest.mark.edge_case
+    def test_deletes_take_ratings_out(self, subsidy):
+        first, second = (SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=stars)
+                         for user, stars in zip(make_users(2), [1, 5]))
+
+        first.delete()
+        assert totals(subsidy) == (5, 1, 5.0)
+        SubsidyRating.objects.get(pk=second.pk).delete()
+        assert totals(subsidy) == (0, 0, 0.0)
+
+    @pytest.mark.edge_case
+    def test_moving_a_rating_moves_its_stars(self, subsidy):
+        other = Subsidy.objects.create(title="Tractor loan", description="d", amount=100)
+        rating = SubsidyRating.objects.create(subsidy=subsidy, user=make_users(1)[0], rating=3)
+
+        rating.subsidy = other
+        rating.save()
+
+        assert totals(subsidy) == (0, 0, 0.0)
+        assert totals(other) == (3, 1, 3.0)
+
+
+@pytest.mark.django_db
+class TestRateAndRebuild:
+
+    @pytest.mark.happy_path
+    def test_rating_again_updates_the_average(self, subsidy):
+        client = APIClient()
+        client.force_authenticate(make_users(1)[0])
+
+        client.post(f"/api/subsidies/{subsidy.pk}/rate/", {"rating": 2})
+        response = client.post(f"/api/subsidies/{subsidy.pk}/rate/", {"rating": 5})
+
+        assert response.data["message"] == "Rating updated!"
+        assert response.data["subsidy_average"] == 5.0
+        assert totals(subsidy) == (5, 1, 5.0)
+        assert client.get(f"/api/subsidies/{subsidy.pk}/").data["ratings_count"] == 1
+
+    @pytest.mark.edge_case
+    def test_rebuild_repairs_drift(self, subsidy):
+        ratings = [SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=4) for user in make_users(2)]
+        Subsidy.objects.create(title="Tractor loan", description="d", amount=100)
+        # a queryset delete skips SubsidyRating.delete
+        SubsidyRating.objects.filter(pk=ratings[0].pk).delete()
+        assert totals(subsidy) == (8, 2, 4.0)
+
+        out = StringIO()
+        call_command("rebuild_rating_totals", stdout=out)
+
+        assert totals(subsidy) == (4, 1, 4.0)
+        assert "1 of 2 subsidies had drifted" in out.getvalue()
+        assert Subsidy.rebuild_rating_totals() == 0
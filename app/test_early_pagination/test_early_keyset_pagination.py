@@ -0,0 +1,142 @@
+"""
+Unit tests for KeysetPagination on the subsidy, notification and application lists.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.models import Subsidy
+from notifications.models import Notification
+from subsidy.models import SubsidyApplication
+
+
+def walk(client, url):
+    """Every page of the list, following the next links."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.data)
+        url = response.data["next"]
+    return pages
+
+
+@pytest.fixture
+def subsidies(db):
+    for i in range(7):
+        Subsidy.objects.create(title=f"Scheme {i}", description="d", amount=100)
+    # four share a timestamp, so ids break the tie
+    Subsidy.objects.filter(title__in=["Scheme 1", "Scheme 2", "Scheme 3", "Scheme 4"]).update(created_at=timezone.now())
+    return list(Subsidy.objects.order_by("-created_at", "-id").values_list("title", flat=True))
+
+
+@pytest.mark.django_db
+class TestSubsidyList:
+
+    @pytest.mark.happy_path
+    def test_next_links_walk_every_subsidy_once(self, subsidies):
+        pages = walk(APIClient(), "/api/subsidies/?page_size=3")
+
+        assert [subsidy["title"] for page in pages for subsidy in page["results"]] == subsidies
+        assert [len(page["results"]) for page in pages] == [3, 3, 1]
+        assert all(page["count"] == 7 for page in pages)
+        assert pages[0]["previous"] is None
+
+    @pytest.mark.happy_path
+    def test_previous_link_returns_the_page_before(self, subsidies):
+        client = APIClient()
+        second = client.get("/api/subsidies/?page_size=3").data["next"]
+        third = client.get(second).data["next"]
+
+        back = client.get(client.get(third).data["previous"]).data
+
+        assert [subsidy["title"] for subsidy in back["results"]] == subsidies[3:6]
+        first = client.get(back["previous"]).data
+        assert [subsidy["title"] for subsidy in first["results"]] == subsidies[:3]
+        assert first["previous"] is None
+
+    @pytest.mark.edge_case
+    def test_deep_pages_cost_the_same_without_count(self, subsidies, django_assert_num_queries):
+        client = APIClient()
+        url = "/api/subsidies/?page_size=2&include_count=false"
+        while url:
+            # the catalogue version and the page
+            with django_assert_num_queries(2):
+                response = client.get(url)
+            assert response.data["count"] is None
+            url = response.data["next"]
+
+    @pytest.mark.edge_case
+    def test_page_numbers_still_work(self, subsidies):
+        response = APIClient().get("/api/subsidies/?page=2&page_size=3")
+
+        assert [subsidy["title"] for subsidy in response.data["results"]] == subsidies[3:6]
+        assert response.data["count"] == 7
+        assert "page=3" in response.data["next"]
+
+    @pytest.mark.edge_case
+    def test_invalid_cursor_is_not_found(self, subsidies):
+        assert APIClient().get("/api/subsidies/?cursor=not-a-cursor").status_code == 404
+
+
+@pytest.mark.django_db
+class TestOtherLists:
+
+    @pytest.mark.happy_path
+    def test_notifications_page_by_cursor(self):
+        user = get_user_model().objects.create_user(full_name="Farmer", email_address="farmer@example.com", password="pw")
+        Notification.objects.bulk_create([
+            Notification(receiver=user, receiver_role="farmer", notif_type="subsidy", subject=f"N{i}", message="m")
+            for i in range(25)
+        ])
+        Notification.objects.update(created_at=timezone.now())
+        client = APIClient()
+        client.force_authenticate(user)
+
+        pages = walk(client, "/notify/")
+
+        subjects = [notification["title"] for page in pages for notification in page["results"]]
+        assert [len(page["results"]) for page in pages] == [10, 10, 5]
+        assert sorted(subjects, key=lambda subject: int(subject[1:])) == [f"N{i}" for i in range(25)]
+        assert subjects[0] == "N24"
+
+    @pytest.mark.edge_case
+    def test_officer_dashboard_pages_only_when_asked(self):
+        users = get_user_model().objects
+        officer = users.create_user(full_name="Officer", email_address="officer@example.com", password="pw", role="officer")
+        subsidy = Subsidy.objects.create(title="Scheme", description="d", amount=100)
+        for i in range(3):
+            farmer = users.create_user(full_name=f"Farmer {i}", email_address=f"farmer{i}@example.com", password="pw")
+            SubsidyApplication.objects.create(
+                user=farmer, subsidy=subsidy, assigned_officer=officer, full_name=f"Farmer {i}", mobile="1", email="e",
+                aadhaar="1", address="a", state="s", district="d", taluka="t", village="v", land_area=1, land_unit="acre",
+                soil_type="black", ownership="owned", bank_name="b", account_number="1", ifsc="i",
+            )
+        client = APIClient()
+        client.force_authenticate(officer)
+
+        assert [app["full_name"] for app in client.get("/subsidy/officer/dashboard/").data] == ["Farmer 2", "Farmer 1", "Farmer 0"]
+        pages = walk(client, "/subsidy/officer/dashboard/?page_size=2")
+        assert [[app["full_name"] for app in page["results"]] for page in pages] == [["Farmer 2", "Farmer 1"], ["Farmer 0"]]
+
+    @pytest.mark.edge_case
+    def test_provider_applications_page_only_when_asked(self):
+        users = get_user_model().objects
+        provider = users.create_user(full_name="Provider", email_address="provider@example.com", password="pw", role="subsidy_provider")
+        subsidy = Subsidy.objects.create(title="Scheme", description="d", amount=100, created_by=provider)
+        for i in range(3):
+            farmer = users.create_user(full_name=f"Farmer {i}", email_address=f"farmer{i}@example.com", password="pw")
+            SubsidyApplication.objects.create(
+                user=farmer, subsidy=subsidy, full_name=f"Farmer {i}", mobile="1", email="e",
+                aadhaar="1", address="a", state="s", district="d", taluka="t", village="v", land_area=1, land_unit="acre",
+                soil_type="black", ownership="owned", bank_name="b", account_number="1", ifsc="i",
+            )
+        client = APIClient()
+        client.force_authenticate(provider)
+        url = f"/api/subsidy_provider/subsidies/{subsidy.pk}/applications/"
+
+        assert [app["full_name"] for app in client.get(url).data] == ["Farmer 2", "Farmer 1", "Farmer 0"]
+        pages = walk(client, f"{url}?page_size=2")
+        assert [[app["full_name"] for app in page["results"]] for page in pages] == [["Farmer 2", "Farmer 1"], ["Farmer 0"]]
@@ -0,0 +1,117 @@
+"""
+Unit tests for the subsidy full-text search.
+"""
+
+import pytest
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from app import search
+from app.models import Subsidy, SubsidySearchDocument
+from app.search import MemorySearchBackend, SQLiteSearchBackend, get_search_backend, tokenize
+
+
+def titles(query):
+    response = APIClient().get("/api/subsidies/", {"search": query})
+    assert response.status_code == 200
+    return [subsidy["title"] for subsidy in response.data["results"]]
+
+
+@pytest.fixture
+def catalogue(db):
+    Subsidy.objects.create(title="Drip irrigation subsidy", description="Micro irrigation for orchards", amount=100)
+    Subsidy.objects.create(title="Tractor loan", description="Includes drip kits for irrigation", amount=100)
+    Subsidy.objects.create(title="કિસાન સહાય યોજના", description="ખેડૂત માટે સહાય", amount=100)
+    Subsidy.objects.create(title="किसान सम्मान निधि", description="छोटे किसानों के लिए", amount=100,
+                           eligibility={"state": ["Gujarat"]})
+
+
+@pytest.fixture
+def memory_backend(monkeypatch):
+    backend = MemorySearchBackend()
+    monkeypatch.setattr(search, "_memory_backend", backend)
+    with override_settings(SUBSIDY_SEARCH_BACKEND="memory"):
+        yield backend
+
+
+class TestTokenize:
+
+    @pytest.mark.happy_path
+    def test_indic_words_stay_whole(self):
+        assert tokenize("किसान सम्मान निधि, ખેડૂત સહાય।") == ["किसान", "सम्मान", "निधि", "ખેડૂત", "સહાય"]
+
+    @pytest.mark.edge_case
+    def test_folds_case_nukta_and_indian_digits(self):
+        assert tokenize("Drip-IRRIGATION ज़मीन ૨૦૨૬ २०२६") == ["drip", "irrigation", "जमीन", "2026", "2026"]
+
+
+@pytest.mark.django_db
+class TestSubsidySearch:
+
+    @pytest.mark.happy_path
+    def test_sqlite_uses_fts(self, catalogue):
+        assert isinstance(get_search_backend(), SQLiteSearchBackend)
+
+    @pytest.mark.happy_path
+    @pytest.mark.parametrize("backend", ["sqlite", "memory"])
+    def test_title_matches_rank_first(self, catalogue, backend, monkeypatch):
+        monkeypatch.setattr(search, "_memory_backend", MemorySearchBackend())
+        with override_settings(SUBSIDY_SEARCH_BACKEND=backend):
+            assert titles("drip irrigation") == ["Drip irrigation subsidy", "Tractor loan"]
+            assert titles("કિસાન") == ["કિસાન સહાય યોજના"]
+            assert titles("किसान gujarat") == ["किसान सम्मान निधि"]
+
+    @pytest.mark.happy_path
+    @pytest.mark.parametrize("backend", ["sqlite", "memory"])
+    def test_every_word_matches_as_a_prefix(self, catalogue, backend, monkeypatch):
+        monkeypatch.setattr(search, "_memory_backend", MemorySearchBackend())
+        with override_settings(SUBSIDY_SEARCH_BACKEND=backend):
+            assert titles("irr") == ["Drip irrigation subsidy", "Tractor loan"]
+            assert titles("tract irr") == ["Tractor loan"]
+            assert titles("tract orchard") == []
+
+    @pytest.mark.edge_case
+    def test_blank_query_lists_everything(self, catalogue):
+        assert len(titles("  ,. ")) == 4
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("backend", ["sqlite", "memory"])
+    def test_edits_and_deletes_update_results(self, catalogue, backend, monkeypatch):
+        monkeypatch.setattr(search, "_memory_backend", MemorySearchBackend())
+        with override_settings(SUBSIDY_SEARCH_BACKEND=backend):
+            assert titles("tractor") == ["Tractor loan"]
+
+            tractor = Subsidy.objects.get(title="Tractor loan")
+            tractor.title = "Harvester loan"
+            tractor.save()
+            assert titles("tractor") == []
+            assert titles("harvest") == ["Harvester loan"]
+
+            Subsidy.objects.create(title="Tractor rental", description="", amount=10)
+            assert titles("tractor") == ["Tractor rental"]
+
+            tractor.delete()
+            assert titles("loan") == []
+            assert SubsidySearchDocument.objects.count() == 4
+
+    @pytest.mark.edge_case
+    def test_rating_saves_leave_the_document_alone(self, catalogue):
+        subsidy = Subsidy.objects.get(title="Tractor loan")
+        updated_at = subsidy.search_document.updated_at
+
+        subsidy.rating = 4
+        subsidy.save(update_fields=["rating"])
+
+        assert SubsidySearchDocument.objects.get(pk=subsidy.pk).updated_at == updated_at
+
+    @pytest.mark.edge_case
+    def test_memory_index_catches_up_incrementally(self, catalogue, memory_backend):
+        assert titles("drip") == ["Drip irrigation subsidy", "Tractor loan"]
+        indexed = dict(memory_backend._documents)
+
+        Subsidy.objects.create(title="Drip kit grant", description="", amount=10)
+
+        assert titles("drip") == ["Drip kit grant", "Drip irrigation subsidy", "Tractor loan"]
+        # only the newest old document is read again, at the updated_at boundary
+        reread = [subsidy_id for subsidy_id, tokens in indexed.items() if memory_backend._documents[subsidy_id] is not tokens]
+        assert len(reread) <= 1
@@ -0,0 +1,59 @@
+"""
+Unit tests for the SubsidyViewSet list representation and its query count.
+"""
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from app.models import Subsidy, SubsidyRating
+
+
+def make_catalogue(subsidies, raters):
+    users = [get_user_model().objects.create_user(full_name=f"Farmer {i}", email_address=f"farmer{i}@example.com", password="pw")
+             for i in range(raters)]
+    for i in range(subsidies):
+        subsidy = Subsidy.objects.create(title=f"Scheme {i}", description="d", amount=100, created_by=users[0] if users else None)
+        for user in users:
+            SubsidyRating.objects.create(subsidy=subsidy, user=user, rating=4, review="good")
+
+
+@pytest.mark.django_db
+class TestSubsidyList:
+
+    @pytest.mark.happy_path
+    def test_list_is_lean_by_default(self):
+        make_catalogue(subsidies=2, raters=3)
+
+        response = APIClient().get("/api/subsidies/")
+
+        subsidy = response.data["results"][0]
+        assert "ratings" not in subsidy
+        assert subsidy["ratings_count"] == 3
+        assert subsidy["created_by"]["full_name"] == "Farmer 0"
+
+    @pytest.mark.happy_path
+    @override_settings(SUBSIDY_EMBEDDED_RATINGS=2)
+    def test_included_ratings_are_capped_to_the_latest(self):
+        make_catalogue(subsidies=2, raters=3)
+
+        response = APIClient().get("/api/subsidies/?include_ratings=true")
+
+        subsidy = response.data["results"][0]
+        assert subsidy["ratings_count"] == 3
+        assert [rating["user_name"] for rating in subsidy["ratings"]] == ["Farmer 2", "Farmer 1"]
+
+    @pytest.mark.edge_case
+    @pytest.mark.parametrize("subsidies", [1, 10])
+    def test_query_count_does_not_grow_with_the_page(self, subsidies, django_assert_num_queries):
+        make_catalogue(subsidies=subsidies, raters=3)
+        client = APIClient()
+
+        # catalogue version (for the ETag), page count and subsidies with their creators
+        with django_assert_num_queries(3):
+            assert client.get("/api/subsidies/").status_code == 200
+        # plus the latest ratings with their users
+        with django_assert_num_queries(4):
+            response = client.get("/api/subsidies/?include_ratings=true")
+        assert len(response.data["results"]) == subsidies
@@ -1,15 +1,18 @@
 from django.shortcuts import render
 from rest_framework import viewsets
-from rest_framework import filters
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from SubsidyRecommandation import SubsidyRecommander
+from SubsidyRecommandation.registry import get_recommender
+from SubsidyRecommandation.views import load_subsidies
 from .models import Subsidy, SubsidyRating
-from .serializers import SubsidySerializer, SubsidyRatingSerializer
+from .serializers import SubsidySerializer, SubsidyRatingSerializer, embedded_ratings_limit
 from .permissions import IsSubsidyProviderOrAdmin 
+from .conditional import catalogue_state, conditional
+from .pagination import KeysetPagination
+from .search import SubsidySearchFilter, query_tokens
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Count
+from django.db.models import Prefetch
 from notifications.utils import notify_user
 from loginSignup.models import User
 # only needed for bulk option:
@@ -20,8 +23,13 @@ import os
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'SubsidyRecommandation'))
 
 
-class SubsidyPagination(PageNumberPagination):
+class SubsidyPagination(KeysetPagination):
     page_size = 10                     # Return 10 per page
+
+
+class SubsidySearchPagination(PageNumberPagination):
+    # search results come best match first and stop at search.MAX_RESULTS, so they are paged by number
+    page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 50
 
@@ -32,19 +40,52 @@ def index(request):
     return render(request, "index.html")
 
 
+def subsidy_queryset(include_ratings=False):
+    """Subsidies with their creator, plus their latest ratings and raters when asked for."""
+    queryset = Subsidy.objects.select_related('created_by')
+    if include_ratings:
+        latest = SubsidyRating.objects.select_related('user').order_by('-created_at')[:embedded_ratings_limit()]
+        queryset = queryset.prefetch_related(Prefetch('ratings', queryset=latest, to_attr='latest_ratings'))
+    return queryset
+
+
 class SubsidyViewSet(viewsets.ModelViewSet):
     """
     Main ViewSet for Subsidy management.
+
+    Pass ?include_ratings=true to embed each subsidy's latest ratings (always embedded on retrieve).
+    The list is paged by cursor (see app.pagination), search results by page number.
+    The list and top_rated answer conditional GETs with 304 (see app.conditional).
     """
-    queryset = Subsidy.objects.select_related('created_by').annotate(
-        ratings_count=Count('ratings')
-    ).order_by('-created_at')
+    queryset = subsidy_queryset().order_by('-created_at')
     
     serializer_class = SubsidySerializer
     pagination_class = SubsidyPagination
-    filter_backends = [filters.SearchFilter]
-    search_fields = ["title", "description", "eligibility"]
-
+    filter_backends = [SubsidySearchFilter]
+
+    def include_ratings(self):
+        if self.action == 'retrieve':
+            return True
+        return self.request.query_params.get('include_ratings', '').lower() in ('1', 'true', 'yes')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            searching = query_tokens(self.request.query_params.get('search', ''))
+            self._paginator = SubsidySearchPagination() if searching else SubsidyPagination()
+        return self._paginator
+
+    def get_queryset(self):
+        if self.include_ratings():
+            return subsidy_queryset(include_ratings=True).order_by('-created_at')
+        return super().get_queryset()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_ratings'] = self.include_ratings()
+        return context
+
+    @conditional(catalogue_state)
     def list(self, request, *args, **kwargs):
         """Paginated list of subsidies."""
         queryset = self.filter_queryset(self.get_queryset())
@@ -118,6 +159,9 @@ class SubsidyViewSet(viewsets.ModelViewSet):
             defaults={"rating": rating_value, "review": review_text}
         )
 
+        # the rating moved the totals in the database, this instance still holds the old average
+        subsidy.refresh_from_db(fields=['rating', 'rating_sum', 'rating_count'])
+
         serializer = SubsidyRatingSerializer(rating_obj)
         message = "Rating submitted!" if created else "Rating updated!"
 
@@ -131,23 +175,24 @@ class SubsidyViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def ratings(self, request, pk=None):
         subsidy = self.get_object()
-        ratings = SubsidyRating.objects.filter(subsidy=subsidy)
+        ratings = SubsidyRating.objects.filter(subsidy=subsidy).select_related('user')
         serializer = SubsidyRatingSerializer(ratings, many=True)
         return Response(serializer.data)
 
     # 🔹 TOP 5 rated subsidies
     @action(detail=False, methods=['get'])
+    @conditional(catalogue_state)
     def top_rated(self, request):
-        top = Subsidy.objects.order_by('-rating')[:5]
-        serializer = SubsidySerializer(top, many=True)
+        top = subsidy_queryset(self.include_ratings()).order_by('-rating')[:5]
+        serializer = SubsidySerializer(top, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
     # 🔹 MY SUBSIDIES
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_subsidies(self, request):
         user = request.user
-        qs = Subsidy.objects.filter(created_by=user)
-        serializer = SubsidySerializer(qs, many=True)
+        qs = subsidy_queryset(self.include_ratings()).filter(created_by=user)
+        serializer = SubsidySerializer(qs, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
 
 
@@ -161,8 +206,7 @@ def get_subsidy_recommendations(request):
         if not farmer_profile:
             return Response({"error": "farmer_profile required"}, status=400)
 
-        recommender = SubsidyRecommander()
-        recommendations = recommender.recommend_subsidies(farmer_profile)
+        recommendations = get_recommender().recommend_subsidies(farmer_profile, load_subsidies())
 
         return Response({"success": True, "data": recommendations})
     except Exception as e:
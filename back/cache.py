@@ -0,0 +1,228 @@
+"""
+Two-tier cache backend.
+
+A small in-process LRU sits in front of a shared cache alias (file-based or a
+database table by default, see CACHES in settings.py), so every gunicorn worker
+reuses what another worker cached and entries survive restarts, while hot keys
+are still served from memory. Local entries live at most LOCAL_TIMEOUT seconds,
+which bounds how long a delete in another worker can go unseen.
+
+get_or_set() and single_flight() make sure only one thread in one worker
+recomputes a missing key, the others wait for it and read its result.
+"""
+
+import hashlib
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, single-flight is then per worker only
+    fcntl = None
+
+_MISSING = object()
+
+
+class TwoTierCache(BaseCache):
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED_ALIAS", "shared")
+        self.local_max_entries = options.get("LOCAL_MAX_ENTRIES", 1000)
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 30)
+        self.lock_timeout = options.get("LOCK_TIMEOUT", 60)
+        self.lock_dir = Path(options.get("LOCK_DIR") or Path(tempfile.gettempdir()) / "django-cache-locks")
+
+        self._local = OrderedDict()  # key -> (expires_at, pickled value)
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, waiters]
+        self._stats = dict.fromkeys(["local_hits", "shared_hits", "misses", "sets", "recomputes", "coalesced"], 0)
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self.shared_alias]
+
+    # ---------------------- local tier ---------------------- #
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def _local_set(self, key, value, timeout) -> None:
+        timeout = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        if timeout <= 0:
+            self._local_delete(key)
+            return
+        # pickled like LocMemCache, so callers mutating a returned value never change the cached one
+        entry = (time.monotonic() + timeout, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            self._local[key] = entry
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key) -> None:
+        with self._lock:
+            self._local.pop(key, None)
+
+    def _timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    # ---------------------- cache API ---------------------- #
+    def _get(self, key, default=None, version=None, count=True):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            if count:
+                self._count("local_hits")
+            return value
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            if count:
+                self._count("misses")
+            return default
+        if count:
+            self._count("shared_hits")
+        self._local_set(local_key, value, self.local_timeout)
+        return value
+
+    def get(self, key, default=None, version=None):
+        return self._get(key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        self._count("sets")
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._timeout(timeout)
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, self._timeout(timeout), version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local_get(self.make_and_validate_key(key, version=version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    # ---------------------- single flight ---------------------- #
+    @contextmanager
+    def single_flight(self, key, version=None, timeout=None):
+        """Hold the recompute lock for key, across this worker's threads and, through a lock file, across workers.
+
+        Waiting gives up after timeout seconds (LOCK_TIMEOUT by default) and proceeds unlocked rather than
+        stalling a request forever, so a caller whose computation can run longer should pass its own.
+        """
+        if timeout is None:
+            timeout = self.lock_timeout
+        local_key = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entry = self._key_locks.setdefault(local_key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            locked = entry[0].acquire(timeout=timeout)
+            try:
+                with self._file_lock(local_key, timeout):
+                    yield
+            finally:
+                if locked:
+                    entry[0].release()
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[local_key]
+
+    @contextmanager
+    def _file_lock(self, local_key, timeout):
+        if fcntl is None:
+            yield
+            return
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        path = self.lock_dir / f"{hashlib.sha1(local_key.encode()).hexdigest()}.lock"
+        with open(path, "w") as lock_file:
+            deadline = time.monotonic() + timeout
+            locked = False
+            while not locked:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(0.05)
+            try:
+                yield
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """Like BaseCache.get_or_set, but concurrent misses compute default once and share its result."""
+        value = self._get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+
+        with self.single_flight(key, version=version):
+            # another thread or worker may have filled it while this one waited
+            value = self._get(key, _MISSING, version=version, count=False)
+            if value is not _MISSING:
+                self._count("coalesced")
+                return value
+
+            value = default() if callable(default) else default
+            self._count("recomputes")
+            if value is not None:
+                self.set(key, value, timeout, version=version)
+            return value
+
+    # ---------------------- stats ---------------------- #
+    def stats(self):
+        """Per-worker counters since start, with the overall and in-process hit rates."""
+        with self._lock:
+            stats = dict(self._stats, local_entries=len(self._local))
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["local_hits"] + stats["shared_hits"]) / lookups, 3) if lookups else None
+        stats["local_hit_rate"] = round(stats["local_hits"] / lookups, 3) if lookups else None
+        return stats
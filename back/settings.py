@@ -10,6 +10,7 @@
 # https://docs.djangoproject.com/en/5.2/ref/settings/
 # """
 # import sys
+import tempfile
 
 # import cloudinary
 # from datetime import timedelta
@@ -475,17 +476,93 @@ CSRF_TRUSTED_ORIGINS = [origin.strip() for origin in CSRF_TRUSTED_ORIGINS]
 WSGI_APPLICATION = 'back.wsgi.application'
 
 # Cache configuration for faster responses
+# Two tiers (back/cache.py): a per-worker LRU in front of the "shared" cache every gunicorn worker reads.
+# CACHE_BACKEND=db keeps the shared tier in a database table (python manage.py createcachetable), for several instances.
+SHARED_CACHES = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'var' / 'cache')),
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'kru_cache',
+    },
+}
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'back.cache.TwoTierCache',
         'TIMEOUT': 300,  # 5 minutes default
         'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 30,  # seconds a worker may serve an entry another worker deleted
+            'LOCK_TIMEOUT': 60,  # get_or_set's wait, recommendation runs wait their worst case (SubsidyRecommandation.coalescing)
+        }
+    },
+    'shared': {
+        **SHARED_CACHES[os.getenv('CACHE_BACKEND', 'file')],
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
             'CULL_FREQUENCY': 3,
         }
-    }
+    },
+}
+
+# Latest ratings embedded per subsidy when the subsidies API is asked for ?include_ratings=true
+SUBSIDY_EMBEDDED_RATINGS = int(os.getenv("SUBSIDY_EMBEDDED_RATINGS", 5))
+
+# Cache-Control max-age of the public subsidy and news lists, which revalidate with ETags after that (app.conditional)
+CATALOGUE_HTTP_MAX_AGE = int(os.getenv("CATALOGUE_HTTP_MAX_AGE", 60))
+
+# Subsidy ?search= backend (app.search): "postgres", "sqlite", "memory", or "auto" for the best one the database supports
+SUBSIDY_SEARCH_BACKEND = os.getenv("SUBSIDY_SEARCH_BACKEND", "auto")
+
+# Chat model used by the shared SubsidyRecommander (SubsidyRecommandation.registry), changing it rebuilds the recommender
+SUBSIDY_RECOMMENDER_MODEL = {
+    "MODEL": os.getenv("RECOMMENDER_MODEL", "openai/gpt-oss-120b"),
+    "TEMPERATURE": float(os.getenv("RECOMMENDER_TEMPERATURE", 0.3)),
+    "MAX_TOKENS": int(os.getenv("RECOMMENDER_MAX_TOKENS", 1500)),
+    "TIMEOUT": int(os.getenv("RECOMMENDER_TIMEOUT", 30)),
 }
+# Per-call overrides of that model: the yes/no eligibility checks go to a small, fast model with a tiny completion limit
+SUBSIDY_RECOMMENDER_ROUTES = {
+    "eligibility": {
+        "MODEL": os.getenv("RECOMMENDER_ELIGIBILITY_MODEL", "llama-3.1-8b-instant"),
+        "TEMPERATURE": float(os.getenv("RECOMMENDER_ELIGIBILITY_TEMPERATURE", 0)),
+        "MAX_TOKENS": int(os.getenv("RECOMMENDER_ELIGIBILITY_MAX_TOKENS", 100)),
+        "TIMEOUT": int(os.getenv("RECOMMENDER_ELIGIBILITY_TIMEOUT", 10)),
+    },
+}
+# Dotted path of the router class, called with default= and models= (see SubsidyRecommandation.routing)
+SUBSIDY_RECOMMENDER_ROUTER = os.getenv("RECOMMENDER_ROUTER", "SubsidyRecommandation.routing.ModelRouter")
+
+# Persistent cache of per-subsidy LLM eligibility/score decisions (SubsidyRecommandation.llm_cache)
+RECOMMENDER_DECISION_CACHE_TTL = int(os.getenv("RECOMMENDER_DECISION_CACHE_TTL", 7 * 24 * 3600))  # 7 days
+RECOMMENDER_DECISION_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMENDER_DECISION_CACHE_MAX_ENTRIES", 50000))
+RECOMMENDER_DECISION_CACHE_PRUNE_INTERVAL = int(os.getenv("RECOMMENDER_DECISION_CACHE_PRUNE_INTERVAL", 300))  # seconds between a worker's prunes
+
+# Local vector index used to shortlist subsidies before LLM scoring (SubsidyRecommandation.semantic_index)
+RECOMMENDER_INDEX_PATH = os.getenv("RECOMMENDER_INDEX_PATH", BASE_DIR / "var" / "subsidy_index.npz")
+# Optional dotted path to a CPU embedding callable (list of texts -> 2D array), hashed TF-IDF is used when unset
+RECOMMENDER_EMBEDDING_FUNCTION = os.getenv("RECOMMENDER_EMBEDDING_FUNCTION") or None
+
+# Background recommendation jobs (SubsidyRecommandation.jobs)
+RECOMMENDER_JOB_WORKERS = int(os.getenv("RECOMMENDER_JOB_WORKERS", 2))
+RECOMMENDER_JOB_TTL = int(os.getenv("RECOMMENDER_JOB_TTL", 3600))  # 1 hour
+
+# The catalogue cache key embeds a generation bumped on every Subsidy write, so it can live for hours
+RECOMMENDER_CATALOGUE_CACHE_TTL = int(os.getenv("RECOMMENDER_CATALOGUE_CACHE_TTL", 6 * 3600))
+
+# Cohorts requested within this many days are precomputed by precompute_cohort_recommendations
+RECOMMENDER_COHORT_ACTIVE_DAYS = int(os.getenv("RECOMMENDER_COHORT_ACTIVE_DAYS", 30))
+# Seconds a worker batches cohort request counts before writing them in one UPDATE
+RECOMMENDER_COHORT_FLUSH_INTERVAL = int(os.getenv("RECOMMENDER_COHORT_FLUSH_INTERVAL", 60))
+
+# Rolling window behind the staff recommender metrics endpoint (SubsidyRecommandation.metrics)
+RECOMMENDER_METRICS_WINDOW = int(os.getenv("RECOMMENDER_METRICS_WINDOW", 900))  # 15 minutes
+RECOMMENDER_METRICS_MAX_SAMPLES = int(os.getenv("RECOMMENDER_METRICS_MAX_SAMPLES", 2000))  # per metric
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -588,15 +665,32 @@ cloudinary.config(
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'metrics': {
+            'format': '%(asctime)s %(levelname)s %(name)s %(message)s',
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'metrics_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'metrics',
+        },
     },
     'root': {
         'handlers': ['console'],
         'level': 'INFO',
     },
+    'loggers': {
+        # per-node and per-LLM-call timings, DEBUG also logs every LLM call
+        'SubsidyRecommandation.metrics': {
+            'handlers': ['metrics_console'],
+            'level': os.getenv('RECOMMENDER_METRICS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -625,6 +719,10 @@ if IS_TEST:
         }
     }
     print("\n🔍 Using SQLite for TESTS — Neon DB is disabled.\n")
+    # nothing cached by one test run may leak into the next
+    CACHES['shared'] = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}
+    # tests rebuild the subsidy index, so they get their own file instead of the one under var/
+    RECOMMENDER_INDEX_PATH = Path(tempfile.mkdtemp(prefix="subsidy-index-")) / "subsidy_index.npz"
 
 # ========================================================
 # ✅ Normal runtime: If DATABASE_URL exists → NEON
@@ -0,0 +1,125 @@
+"""
+Unit tests for back.cache.TwoTierCache.
+"""
+
+import threading
+import time
+import pytest
+from django.core.cache import caches
+
+from back.cache import TwoTierCache
+
+
+def make_cache(tmp_path, **options):
+    return TwoTierCache(None, {"TIMEOUT": 300, "OPTIONS": {"SHARED_ALIAS": "shared", "LOCK_DIR": str(tmp_path), **options}})
+
+
+@pytest.fixture(autouse=True)
+def clear_shared():
+    caches["shared"].clear()
+    yield
+    caches["shared"].clear()
+
+
+class TestTwoTierCache:
+
+    @pytest.mark.happy_path
+    def test_other_worker_reads_shared_entry(self, tmp_path):
+        worker_a, worker_b = make_cache(tmp_path), make_cache(tmp_path)
+
+        worker_a.set("profile", {"score": 80})
+
+        assert worker_b.get("profile") == {"score": 80}
+        assert worker_b.get("profile") == {"score": 80}
+        assert worker_b.stats()["shared_hits"] == 1
+        assert worker_b.stats()["local_hits"] == 1
+        assert worker_b.stats()["hit_rate"] == 1.0
+
+    @pytest.mark.edge_case
+    def test_local_tier_is_bounded_lru(self, tmp_path):
+        cache = make_cache(tmp_path, LOCAL_MAX_ENTRIES=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, key)
+
+        assert cache.stats()["local_entries"] == 2
+        assert cache.get("a") == "a"  # still in the shared tier
+        assert cache.stats()["shared_hits"] == 1
+
+    @pytest.mark.edge_case
+    def test_returned_values_are_copies(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache.set("list", [1])
+
+        cache.get("list").append(2)
+
+        assert cache.get("list") == [1]
+
+    @pytest.mark.edge_case
+    def test_delete_clears_both_tiers(self, tmp_path):
+        cache = make_cache(tmp_path)
+        cache.set("key", 1)
+
+        cache.delete("key")
+
+        assert cache.get("key") is None
+        assert caches["shared"].get("key") is None
+
+
+class TestSingleFlight:
+
+    @pytest.mark.happy_path
+    def test_concurrent_misses_compute_once(self, tmp_path):
+        # two caches stand in for two workers, only the lock file is shared between them
+        workers = [make_cache(tmp_path), make_cache(tmp_path)]
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "ranked"
+
+        threads = [threading.Thread(target=lambda i=i: results.append(workers[i % 2].get_or_set("rec", compute, 60))) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["ranked"] * 6
+        assert sum(worker.stats()["coalesced"] for worker in workers) == 5
+
+    @pytest.mark.edge_case
+    def test_none_is_not_cached(self, tmp_path):
+        cache = make_cache(tmp_path)
+
+        assert cache.get_or_set("empty", lambda: None) is None
+        assert cache.stats()["recomputes"] == 1
+        assert cache.get_or_set("empty", lambda: 1) == 1
+
+    @pytest.mark.edge_case
+    def test_caller_timeout_outlasts_lock_timeout(self, tmp_path):
+        holder, waiter = make_cache(tmp_path, LOCK_TIMEOUT=0.05), make_cache(tmp_path, LOCK_TIMEOUT=0.05)
+        held = threading.Event()
+        waited = {}
+
+        def hold():
+            with holder.single_flight("rec"):
+                held.set()
+                time.sleep(0.3)
+
+        def wait(name, timeout):
+            start = time.monotonic()
+            with waiter.single_flight("rec", timeout=timeout):
+                waited[name] = time.monotonic() - start
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait()
+        wait("default", None)
+        wait("long", 5)
+        thread.join()
+
+        # the default wait gives up early, a run's own worst case sees the holder through
+        assert waited["default"] < 0.2
+        assert waited["long"] > 0.1
@@ -4,3 +4,4 @@ pip install -r requirements.txt
 python manage.py collectstatic --no-input
 python manage.py makemigrations
 python manage.py migrate --no-input
+python manage.py createcachetable
@@ -17,6 +17,8 @@ class Article(models.Model):
     image = CloudinaryField('image', blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # with the row count, the version behind the article list's ETag (app.conditional)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.title} ({self.provider.full_name})"
@@ -2,6 +2,7 @@ from rest_framework import generics, permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.exceptions import PermissionDenied
 
+from app.conditional import articles_state, conditional
 from .models import Article
 from .serializers import ArticleSerializer
 from .permissions import IsSubsidyProvider
@@ -29,6 +30,10 @@ class ArticleListView(generics.ListAPIView):
 
         return qs
 
+    @conditional(articles_state)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class ArticleDetailView(generics.RetrieveAPIView):
     queryset = Article.objects.all()
@@ -38,6 +38,8 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        # a user's notifications in cursor order (app.pagination)
+        indexes = [models.Index(fields=['receiver', '-created_at', '-id'], name='notif_receiver_created_idx')]
         verbose_name = "Notification"
         verbose_name_plural = "Notifications"
 
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_subsidy_search_index'),
+        ('subsidy', '0004_alter_subsidyapplication_application_id_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subsidyapplication',
+            index=models.Index(fields=['-submitted_at', '-id'], name='application_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subsidyapplication',
+            index=models.Index(fields=['assigned_officer', '-submitted_at', '-id'], name='application_officer_idx'),
+        ),
+    ]
@@ -94,6 +94,11 @@ class SubsidyApplication(models.Model):
 )
     class Meta:
         unique_together = ('user', 'subsidy')
+        # application lists in cursor order (app.pagination), all of them and an officer's
+        indexes = [
+            models.Index(fields=['-submitted_at', '-id'], name='application_submitted_idx'),
+            models.Index(fields=['assigned_officer', '-submitted_at', '-id'], name='application_officer_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self._state.adding and not self.application_id:
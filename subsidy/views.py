@@ -12,6 +12,7 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db import transaction
+from app.pagination import SubmittedPagination
 
 User = get_user_model()
 from .models import SubsidyApplication
@@ -25,6 +26,7 @@ class SubsidyApplicationViewSet(viewsets.ModelViewSet):
     queryset = SubsidyApplication.objects.all().select_related("subsidy", "user")
     serializer_class = SubsidyApplicationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmittedPagination
 
     def get_queryset(self):
         """
@@ -179,9 +181,16 @@ def officer_dashboard(request):
 
     apps = SubsidyApplication.objects.filter(
         assigned_officer=request.user
-    ).select_related('subsidy')
+    ).select_related('subsidy', 'assigned_officer')
 
-    serializer = OfficerSubsidyApplicationSerializer(apps, many=True)
+    # the whole list as before, or newest first in cursor pages once the client asks for them
+    paginator = SubmittedPagination()
+    if paginator.cursor_query_param in request.query_params or paginator.page_size_query_param in request.query_params:
+        page = paginator.paginate_queryset(apps, request)
+        serializer = OfficerSubsidyApplicationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = OfficerSubsidyApplicationSerializer(apps.order_by('-submitted_at', '-id'), many=True)
     return Response(serializer.data, status=200)
 
 
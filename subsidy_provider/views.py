@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from app.models import Subsidy as AppSubsidy
+from app.pagination import SubmittedPagination
 from subsidy.models import SubsidyApplication
 from .serializers import SubsidySerializer, SubsidyApplicationForProviderSerializer
 import sys
@@ -44,6 +45,14 @@ class SubsidyApplicationsAPIView(APIView):
         if subsidy.created_by_id != getattr(request.user, "id", None):
             return Response({"detail": "Forbidden - you are not the owner of this subsidy."}, status=status.HTTP_403_FORBIDDEN)
 
-        apps_qs = SubsidyApplication.objects.filter(subsidy=subsidy).order_by("-submitted_at")
-        serializer = SubsidyApplicationForProviderSerializer(apps_qs, many=True, context={"request": request})
+        apps_qs = SubsidyApplication.objects.filter(subsidy=subsidy)
+
+        # the whole list as before, or newest first in cursor pages once the client asks for them
+        paginator = SubmittedPagination()
+        if paginator.cursor_query_param in request.query_params or paginator.page_size_query_param in request.query_params:
+            page = paginator.paginate_queryset(apps_qs, request)
+            serializer = SubsidyApplicationForProviderSerializer(page, many=True, context={"request": request})
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = SubsidyApplicationForProviderSerializer(apps_qs.order_by("-submitted_at", "-id"), many=True, context={"request": request})
         return Response(serializer.data)